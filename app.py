@@ -2,114 +2,484 @@
 IPL STATS WEB INTERFACE - SIMPLIFIED VERSION
 """
 
-from flask import Flask, render_template, send_file, jsonify, request
-import pandas as pd
+from flask import Flask, Response, g, render_template, jsonify, request
 import os
 import json
+import hashlib
+import hmac
+import threading
+import time
+from dataset import DatasetCache
+from schema import TIER_COLUMNS
+from snapshot import changed_columns
+from refresh import RefreshWorker
+from responses import PreparedResponse, ResponseStore, client_has, make_etag, not_modified
+from instrument import PROFILE_MODES, Profiler, configure_logging, metrics, record
 
 app = Flask(__name__)
+configure_logging()
 
-def load_data():
-    """Load data from CSV or JSON"""
+# ?profile=cpu|memory profiles a single request, only if IPL_PROFILING=1
+PROFILING = os.environ.get('IPL_PROFILING') == '1'
+
+dataset_cache = DatasetCache()
+
+# Encoded bodies per dataset version (and per download file)
+response_store = ResponseStore()
+
+# Rendered index pages, kept apart so API queries cannot evict them.
+# Keys are normalized top-N counts; the bound caps what odd ?top=
+# values can add.
+PAGE_CACHE_SIZE = 16
+WARM_TOPS = (5, 10, 20, None)
+page_store = ResponseStore(max_entries=PAGE_CACHE_SIZE)
+file_responses = {}
+file_responses_lock = threading.Lock()
+
+def run_refresh():
+    """One scrape -> clean -> publish; the dataset cache picks up the new manifest"""
+    # Imported here so serving does not pay for the scraper's imports
+    from scraper import IPLScraper
+    return IPLScraper().refresh(concurrent=True, profile=REFRESH_PROFILE, matches=MATCHES_SOURCE)
+
+# Seconds between background refreshes (0: no timer)
+REFRESH_INTERVAL = float(os.environ.get('IPL_REFRESH_INTERVAL', '0'))
+# 'cpu' or 'memory' profiles every background refresh
+REFRESH_PROFILE = os.environ.get('IPL_REFRESH_PROFILE') or None
+# Cricsheet match files (directory or zip) to build the table from instead of scraping
+MATCHES_SOURCE = os.environ.get('IPL_MATCHES') or None
+# Bearer token that allows POST /api/refresh (unset: manual refreshes are disabled)
+REFRESH_TOKEN = os.environ.get('IPL_REFRESH_TOKEN') or None
+# Started by create_app(), not on import, so tools and tests get no thread
+refresh_worker = RefreshWorker(run_refresh, REFRESH_INTERVAL)
+
+# Rows serialized per chunk when streaming /api/players
+STREAM_BATCH = 500
+
+# Columns the index template shows (only these are read for the page)
+INDEX_FIELDS = ['Player', 'Runs', 'Matches', 'Average', 'Strike_Rate', 'Insight']
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    mode = request.args.get('profile') if PROFILING else None
+    if mode in PROFILE_MODES:
+        profiler = Profiler(mode, f"{request.endpoint}")
+        if profiler.start():
+            g.profiler = profiler
+
+@app.after_request
+def record_request_timing(response):
+    """
+    Time every route into the 'http' histogram
+    
+    Streamed bodies are timed up to their first byte; the rest is sent
+    after this hook.
+    """
+    started = g.pop('started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    record('http', elapsed, {'route': route, 'method': request.method,
+                             'status': response.status_code},
+           bytes=response.content_length)
+    response.headers['Server-Timing'] = f"app;dur={elapsed * 1000:.1f}"
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None and profiler.stop():
+        response.headers['X-Profile'] = profiler.path
+    return response
+
+@app.teardown_request
+def stop_request_profiler(error=None):
+    # A request that failed before after_request still frees the profiler
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def prepared_response(dataset, key, build, store=response_store):
+    """
+    Serve a response that only changes with the dataset version
+    
+    A matching If-None-Match gets a 304 before anything is built.
+    Otherwise the encoded body is built once per version and reused.
+    
+    Args:
+        dataset (Dataset): Current dataset
+        key (tuple): Route plus normalized arguments
+        build (callable): Returns the Flask response to cache
+        store (ResponseStore): Where the encoded body is kept
+    """
+    etag = make_etag(dataset.version, key)
+    if client_has(request, etag):
+        return not_modified(etag)
+    
+    prepared = store.get(dataset.version, key)
+    if prepared is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+        prepared = store.put(
+            dataset.version, key,
+            PreparedResponse(response.get_data(), response.mimetype, etag)
+        )
+    return prepared.to_response(request)
+
+def prepared_file(path, mimetype):
+    """
+    Serve a data file as a download, re-reading it only when it changes
+    
+    Args:
+        path (str): File to send
+        mimetype (str): Content type
+    """
     try:
-        # Try JSON first
-        if os.path.exists('ipl_most_runs_career.json'):
-            with open('ipl_most_runs_career.json', 'r') as f:
-                data = json.load(f)
-                players = data.get('players', [])
-                metadata = data.get('metadata', {})
-                return players, metadata
-        
-        # Try CSV
-        elif os.path.exists('ipl_most_runs_career.csv'):
-            df = pd.read_csv('ipl_most_runs_career.csv')
-            players = df.to_dict('records')
-            metadata = {
-                'last_updated': 'Today',
-                'season': 'IPL Career Runs',
-                'total_players': len(players)
-            }
-            return players, metadata
-        
-        return [], {}
-    
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return [], {}
+        st = os.stat(path)
+    except OSError:
+        return "File not found", 404
+    key = (st.st_mtime_ns, st.st_size)
+    
+    cached = file_responses.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        headers = {'Content-Disposition': f'attachment; filename={os.path.basename(path)}'}
+        cached = (key, PreparedResponse(body, mimetype, etag, headers))
+        with file_responses_lock:
+            file_responses[path] = cached
+    return cached[1].to_response(request)
 
 @app.route('/')
 def index():
     """Main page"""
-    players, metadata = load_data()
+    dataset = dataset_cache.get()
     
-    # Filter if requested
+    # Stats are precomputed when the dataset loads; top values past the
+    # end all render the same page
     top_n = request.args.get('top', type=int)
-    if top_n and top_n > 0:
-        players = players[:top_n]
+    count = dataset.stats_for_top(top_n)['total_players']
     
-    # Calculate stats
-    stats = {
-        'total_players': len(players),
-        'total_runs': sum(p.get('Runs', 0) for p in players),
-        'top_scorer': players[0]['Player'] if players else 'N/A',
-        'top_runs': players[0]['Runs'] if players else 0
-    }
+    return prepared_response(dataset, ('index', count), lambda: render_index(dataset, count),
+                             store=page_store)
+
+def render_index(dataset, count):
+    """Render the main page for the first count players"""
+    stats = dataset.stats_for_top(count)
+    
+    # Only the rows shown are turned into dicts
+    players = dataset.table.records(0, count, fields=INDEX_FIELDS)
     
-    return render_template(
+    return Response(render_template(
         'index.html',
         players=players,
         stats=stats,
-        metadata=metadata,
+        metadata=dataset.metadata,
         has_data=len(players) > 0
-    )
+    ), mimetype='text/html')
+
+def warm_pages(dataset):
+    """Render the commonly requested index pages for a new dataset"""
+    with app.app_context():
+        for top_n in WARM_TOPS:
+            count = dataset.stats_for_top(top_n)['total_players']
+            key = ('index', count)
+            response = render_index(dataset, count)
+            page_store.put(dataset.version, key, PreparedResponse(
+                response.get_data(), response.mimetype, make_etag(dataset.version, key)))
+
+def warm_dataset(dataset, previous=None):
+    """
+    Build the index pages and query indexes of a new dataset
+    
+    When the scraper recorded which columns changed since the previous
+    dataset, indexes of the unchanged columns are carried over instead
+    of being rebuilt.
+    """
+    if previous is not None:
+        changed = changed_columns(dataset.changes, previous.metadata)
+        if changed is not None:
+            dataset.index.reuse(previous.index, changed)
+    dataset.index.warm()
+    warm_pages(dataset)
+
+def switch_version(dataset):
+    """Point the response stores at a newly loaded dataset version"""
+    response_store.set_version(dataset.version)
+    page_store.set_version(dataset.version)
+
+# Registered first, so the stores have switched before pages are warmed
+dataset_cache.subscribe(lambda dataset, previous: switch_version(dataset))
+
+# Warm in the background so the request that triggered the load is not held up
+dataset_cache.subscribe(
+    lambda dataset, previous: threading.Thread(
+        target=warm_dataset, args=(dataset, previous), daemon=True).start()
+)
 
 @app.route('/download/csv')
 def download_csv():
     """Download CSV"""
-    if os.path.exists('ipl_most_runs_career.csv'):
-        return send_file('ipl_most_runs_career.csv', as_attachment=True)
-    return "File not found", 404
+    return prepared_file('ipl_most_runs_career.csv', 'text/csv')
 
 @app.route('/download/json')
 def download_json():
     """Download JSON"""
-    if os.path.exists('ipl_most_runs_career.json'):
-        return send_file('ipl_most_runs_career.json', as_attachment=True)
-    return "File not found", 404
+    return prepared_file('ipl_most_runs_career.json', 'application/json')
 
 @app.route('/api/players')
 def api_players():
-    """API endpoint"""
-    players, metadata = load_data()
-    return jsonify({
-        'success': True,
-        'count': len(players),
-        'players': players,
-        'metadata': metadata
-    })
+    """
+    API endpoint
+    
+    Query parameters:
+        offset / limit: Return one page of players (next_offset points at the next)
+        cursor: Same as offset (use the next_offset of the previous page)
+        fields: Comma-separated columns to include (e.g. fields=Player,Runs)
+        format: 'ndjson' for one player per line, 'stream' for chunked JSON
+        sort / order: Numeric column to sort by, 'desc' (default) or 'asc'
+        min_<Column> / max_<Column>: Inclusive range on a numeric column
+        insight: Comma-separated Insight tiers (e.g. insight=Legend,Elite)
+        prefix: Player name starts with (case-insensitive)
+        q: Player name contains (case-insensitive)
+    """
+    dataset = dataset_cache.get()
+    table, metadata = dataset.table, dataset.metadata
+    
+    offset = request.args.get('cursor', type=int)
+    if offset is None:
+        offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    if offset < 0 or (limit is not None and limit <= 0):
+        return jsonify({'success': False, 'error': 'offset must be >= 0 and limit > 0'}), 400
+    
+    fields = None
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',') if f.strip() in table]
+        if not fields:
+            return jsonify({'success': False, 'error': 'No known fields requested'}), 400
+    
+    try:
+        query = _parse_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    paged = limit is not None or offset > 0
+    
+    def select():
+        """(row numbers or None for every player in file order, start, stop, total)"""
+        rows = dataset.index.select(**query) if query else None
+        total = len(table) if rows is None else len(rows)
+        start = min(offset, total)
+        stop = total if limit is None else min(start + limit, total)
+        return rows, start, stop, total
+    
+    output = request.args.get('format', '').lower()
+    if output in ('ndjson', 'stream'):
+        try:
+            rows, start, stop, total = select()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if output == 'ndjson':
+            return Response(_ndjson_rows(table, rows, start, stop, fields),
+                            mimetype='application/x-ndjson',
+                            headers={'X-Total-Count': str(total)})
+        return Response(_streamed_json(table, rows, start, stop, fields, metadata, total, paged),
+                        mimetype='application/json')
+    
+    def build():
+        try:
+            rows, start, stop, total = select()
+        except ValueError as e:
+            response = jsonify({'success': False, 'error': str(e)})
+            response.status_code = 400
+            return response
+        players = _records(table, rows, start, stop, fields)
+        body = {
+            'success': True,
+            'count': len(players),
+            'players': players,
+            'metadata': metadata
+        }
+        if paged or query:
+            body.update(_page_info(start, stop, total))
+        return jsonify(body)
+    
+    # Keyed on the normalized arguments alone, so a client holding the
+    # current ETag gets its 304 before the query runs
+    key = ('players', offset, limit, tuple(fields) if fields else None, _query_key(query))
+    return prepared_response(dataset, key, build)
+
+def _query_key(query):
+    """Hashable form of a parsed query, the same whatever the argument order"""
+    if not query:
+        return None
+    return tuple(sorted((name, repr(sorted(value.items())) if isinstance(value, dict) else repr(value))
+                        for name, value in query.items()))
+
+def _parse_query(args):
+    """
+    Collect the sort/filter/search parameters of /api/players
+    
+    Returns:
+        dict: Keyword arguments for QueryIndex.select(), or None if the
+        request is a plain listing
+    
+    Raises:
+        ValueError: If a bound is not a number or order is unknown
+    """
+    query = {}
+    if args.get('sort'):
+        query['sort'] = args['sort']
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    
+    ranges = {}
+    for name, value in args.items():
+        for bound, prefix in enumerate(('min_', 'max_')):
+            if name.startswith(prefix) and value != '':
+                column = name[len(prefix):]
+                try:
+                    number = float(value)
+                except ValueError:
+                    raise ValueError(f"{name} must be a number") from None
+                low_high = list(ranges.get(column, (None, None)))
+                low_high[bound] = number
+                ranges[column] = tuple(low_high)
+    if ranges:
+        query['ranges'] = ranges
+    
+    tiers = {}
+    for column in TIER_COLUMNS:
+        value = args.get(column.lower())
+        if value:
+            tiers[column] = [v.strip() for v in value.split(',') if v.strip()]
+    if tiers:
+        query['tiers'] = tiers
+    
+    if args.get('prefix'):
+        query['prefix'] = args['prefix']
+    if args.get('q'):
+        query['contains'] = args['q']
+    
+    if not query:
+        return None
+    query['descending'] = order == 'desc'
+    return query
+
+def _records(table, rows, start, stop, fields):
+    """Rows start..stop of the result as dicts"""
+    if rows is None:
+        return table.records(start, stop, fields=fields)
+    return table.take(rows[start:stop], fields=fields)
+
+def _page_info(start, stop, total):
+    """Pagination fields added to paged responses"""
+    return {
+        'total': total,
+        'offset': start,
+        'next_offset': stop if stop < total else None
+    }
+
+def _row_batches(table, rows, start, stop, fields):
+    """Yield rows in small batches so only one batch is in memory"""
+    for batch_start in range(start, stop, STREAM_BATCH):
+        yield _records(table, rows, batch_start, min(batch_start + STREAM_BATCH, stop), fields)
+
+def _ndjson_rows(table, rows, start, stop, fields):
+    for batch in _row_batches(table, rows, start, stop, fields):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+
+def _streamed_json(table, rows, start, stop, fields, metadata, total, paged):
+    """Same document as the plain response, written out piece by piece"""
+    head = {'success': True, 'count': stop - start, 'metadata': metadata}
+    if paged:
+        head.update(_page_info(start, stop, total))
+    yield json.dumps(head, ensure_ascii=False)[:-1] + ', "players": ['
+    
+    first = True
+    for batch in _row_batches(table, rows, start, stop, fields):
+        chunk = ', '.join(json.dumps(row, ensure_ascii=False) for row in batch)
+        yield chunk if first else ', ' + chunk
+        first = False
+    yield ']}'
 
 @app.route('/api/stats')
 def api_stats():
     """Stats API"""
-    players, metadata = load_data()
-    
-    if not players:
+    dataset = dataset_cache.get()
+    return prepared_response(dataset, ('stats',), lambda: build_stats(dataset))
+
+def build_stats(dataset):
+    """Stats API body (from the aggregates computed at load time)"""
+    if not len(dataset.table):
         return jsonify({'success': False, 'error': 'No data'})
     
-    df = pd.DataFrame(players)
+    summary = dataset.stats
     stats = {
-        'total_players': len(players),
-        'total_runs': int(df['Runs'].sum()) if 'Runs' in df.columns else 0,
-        'average_runs': float(df['Runs'].mean()) if 'Runs' in df.columns else 0,
-        'top_scorer': df.iloc[0]['Player'] if len(df) > 0 else 'N/A'
+        'total_players': summary['total_players'],
+        'total_runs': summary['total_runs'] if dataset.has_runs else 0,
+        'average_runs': summary['avg_runs'] if dataset.has_runs else 0,
+        'median_runs': summary['median_runs'] if dataset.has_runs else 0,
+        'top_scorer': summary['top_scorer']
     }
     
     return jsonify({
         'success': True,
         'stats': stats,
-        'metadata': metadata
+        'metadata': dataset.metadata
     })
 
+def _refresh_allowed():
+    """True if the request carries the configured IPL_REFRESH_TOKEN"""
+    if REFRESH_TOKEN is None:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f'Bearer {REFRESH_TOKEN}'.encode())
+
+@app.route('/api/refresh', methods=['GET', 'POST'])
+def api_refresh():
+    """
+    Refresh status; POST starts a refresh unless one is already running
+    (only with IPL_REFRESH_TOKEN set and sent as a Bearer token)
+    """
+    if request.method == 'POST':
+        if REFRESH_TOKEN is None:
+            return jsonify({'success': False, 'error': 'Manual refresh is disabled'}), 403
+        if not _refresh_allowed():
+            return jsonify({'success': False, 'error': 'Invalid refresh token'}), 401
+        if not refresh_worker.trigger():
+            return jsonify({'success': False, 'error': 'Refresh already running',
+                            'refresh': refresh_worker.status()}), 409
+        return jsonify({'success': True, 'refresh': refresh_worker.status()}), 202
+    return jsonify({'success': True, 'refresh': refresh_worker.status()})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Latency histograms in Prometheus text format (?format=json for JSON)"""
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, 'spans': metrics.snapshot()})
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache')
+def api_cache():
+    """Dataset cache counters"""
+    return jsonify({
+        'success': True,
+        'dataset': dataset_cache.stats(),
+        'responses': response_store.stats(),
+        'pages': page_store.stats()
+    })
+
+def create_app():
+    """
+    The app with the background refresh timer running (if
+    IPL_REFRESH_INTERVAL is set); WSGI servers use 'app:create_app()'
+    """
+    refresh_worker.start()
+    return app
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("IPL STATS WEB SERVER")
@@ -120,4 +490,4 @@ if __name__ == '__main__':
     print("="*50)
     
     # Run the app
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+IPL STATS BENCHMARKS
+Run from the project root, e.g. python -m benchmarks.bench_extract
+"""
@@ -0,0 +1,148 @@
+"""
+BENCHMARK: CLEAN_DATA SCALING
+Times IPLScraper.clean_data on messy scraped-style tables
+from 20 to 1M rows, next to the old per-column/apply version
+
+Usage:
+    python -m benchmarks.bench_clean [--sizes 20 1000 ...] [--legacy-limit 100000]
+        [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import compare, save_results, summarize
+from scraper import IPLScraper
+
+SIZES = [20, 1_000, 10_000, 100_000, 1_000_000]
+
+# The old row-wise version gets slow quickly, so stop comparing here
+LEGACY_LIMIT = 100_000
+
+
+def messy_table(rows, seed=0):
+    """
+    Build a raw table the way it comes off the page: text cells with
+    thousands separators, '*' not-out markers and '-' placeholders
+
+    Returns:
+        DataFrame: Raw table with ESPN-style headers
+    """
+    rng = np.random.default_rng(seed)
+    runs = rng.integers(0, 8000, rows)
+    hs = rng.integers(0, 176, rows).astype(str).astype(object)
+    hs[rng.random(rows) < 0.3] += '*'
+    ave = np.round(rng.uniform(5, 55, rows), 2).astype(str).astype(object)
+    ave[rng.random(rows) < 0.05] = '-'
+    hundreds = rng.integers(0, 8, rows).astype(str).astype(object)
+    hundreds[rng.random(rows) < 0.2] = '-'
+
+    return pd.DataFrame({
+        'Player': [f'Player {i}' for i in range(rows)],
+        'Mat': rng.integers(1, 250, rows).astype(str),
+        'Inns': rng.integers(1, 240, rows).astype(str),
+        'Runs': [f'{r:,}' for r in runs],
+        'HS': hs,
+        'Ave': ave,
+        'SR': np.round(rng.uniform(90, 180, rows), 2).astype(str),
+        '100': hundreds,
+        '50': rng.integers(0, 60, rows).astype(str),
+        '4s': [f'{r:,}' for r in rng.integers(0, 800, rows)],
+        '6s': rng.integers(0, 360, rows).astype(str),
+    })
+
+
+def legacy_clean(df):
+    """Numeric conversion + insight as clean_data did it before"""
+    df = df.copy()
+    df['Runs'] = pd.to_numeric(
+        df['Runs'].astype(str).str.replace(',', '').str.replace('*', ''),
+        errors='coerce'
+    ).fillna(0).astype(int)
+    for col in ['Matches', 'Innings', 'Average', 'Strike_Rate', 'Centuries', 'Fifties', 'Fours', 'Sixes']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(
+                df[col].astype(str).str.replace(',', '').str.replace('*', '').str.replace('-', '0'),
+                errors='coerce'
+            )
+    df = df.sort_values('Runs', ascending=False).reset_index(drop=True)
+
+    def insight(row):
+        idx = row.name
+        if idx < 5:
+            return "Legend"
+        elif idx < 15:
+            return "Elite"
+        return "Good"
+
+    df['Insight'] = df.apply(insight, axis=1)
+    return df
+
+
+def time_it(func, repeats):
+    """Seconds taken by each of `repeats` calls"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time clean_data on messy scraped tables")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--legacy-limit', type=int, default=LEGACY_LIMIT,
+                        help="largest size also timed with the old version")
+    parser.add_argument('--out', help="result file (default: bench_results/clean-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 64)
+    print("CLEAN_DATA BENCHMARK")
+    print("=" * 64)
+    print(f"{'rows':>10}{'clean_data s':>15}{'legacy s':>12}{'speedup':>10}{'us/row':>10}")
+
+    results = {}
+    scraper = IPLScraper()
+    for rows in args.sizes:
+        raw = messy_table(rows)
+        repeats = 3 if rows <= 100_000 else 1
+
+        def run_new():
+            scraper.df = raw.copy()
+            scraper.clean_data()
+
+        # clean_data reports progress with print, keep the table readable
+        with redirect_stdout(io.StringIO()):
+            timings = time_it(run_new, repeats)
+            results[f'{rows}/clean_data'] = summarize(timings)
+            new_time = min(timings)
+            legacy_time = None
+            if rows <= args.legacy_limit:
+                scraper.df = raw.copy()
+                scraper.clean_data()
+                renamed = raw.rename(columns=dict(zip(raw.columns, scraper.df.columns)))
+                timings = time_it(lambda: legacy_clean(renamed), repeats)
+                results[f'{rows}/legacy'] = summarize(timings)
+                legacy_time = min(timings)
+
+        legacy = f"{legacy_time:>12.3f}" if legacy_time else f"{'-':>12}"
+        speedup = f"{legacy_time / new_time:>9.1f}x" if legacy_time else f"{'-':>10}"
+        print(f"{rows:>10,}{new_time:>15.3f}{legacy}{speedup}{new_time / rows * 1e6:>10.2f}")
+
+    path = save_results('clean', {'sizes': args.sizes, 'legacy_limit': args.legacy_limit},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 64)
+
+
+if __name__ == '__main__':
+    main()
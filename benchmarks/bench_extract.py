@@ -0,0 +1,184 @@
+"""
+BENCHMARK: TABLE EXTRACTION
+Compares pd.read_html over the whole page with the streaming
+extractor on saved pages (time and peak memory)
+
+Usage:
+    python -m benchmarks.bench_extract [page.html ...] [--repeats 5] [--out FILE]
+        [--compare BASELINE]
+
+Without arguments a synthetic ESPN-like page is generated.
+Each measurement runs in a fresh interpreter so peak RSS is not
+polluted by the other method.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from benchmarks.harness import compare, save_results, summarize
+
+REPEATS = 5
+
+
+def build_page(filler_tables=40, filler_rows=50, players=500):
+    """
+    Build a large page: lots of unrelated tables, stats table near the end
+
+    Returns:
+        str: Page HTML
+    """
+    parts = ['<html><head><title>Records</title></head><body>']
+    for t in range(filler_tables):
+        parts.append('<table><thead><tr><th>Date</th><th>Match</th><th>Venue</th></tr></thead><tbody>')
+        for r in range(filler_rows):
+            parts.append(f'<tr><td>2024-04-{r % 28 + 1:02}</td><td>Match {t}-{r}</td><td>Ground {r}</td></tr>')
+        parts.append('</tbody></table>')
+
+    parts.append('<table><thead><tr><th>Player</th><th>Span</th><th>Mat</th><th>Inns</th>'
+                 '<th>Runs</th><th>HS</th><th>Ave</th><th>SR</th><th>100</th><th>50</th>'
+                 '<th>4s</th><th>6s</th></tr></thead><tbody>')
+    for i in range(players):
+        parts.append(f'<tr><td><a href="/p/{i}">Player {i}</a></td><td>2008-2024</td>'
+                     f'<td>{200 - i % 150}</td><td>{190 - i % 150}</td><td>{8000 - i * 7:,}</td>'
+                     f'<td>{100 + i % 60}*</td><td>{30 + i % 20}.12</td><td>{120 + i % 40}.5</td>'
+                     f'<td>{i % 5}</td><td>{i % 40}</td><td>{600 - i}</td><td>{200 - i % 200}</td></tr>')
+    parts.append('</tbody></table>')
+
+    # Footer tables after the stats table (skipped by the extractor)
+    for t in range(10):
+        parts.append('<table><tr><th>Link</th></tr>' + '<tr><td>x</td></tr>' * 100 + '</table>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def read_html_path(html):
+    """The original approach: parse every table, then pick one"""
+    import pandas as pd
+    tables = pd.read_html(StringIO(html))
+    for table in tables:
+        if len(table.columns) >= 4:
+            col_names = str(table.columns).lower()
+            if any(keyword in col_names for keyword in ['player', 'runs', 'matches']):
+                return table.copy()
+    return None
+
+
+def extractor_path(html):
+    from table_extract import STATS_KEYWORDS, extract_table
+    return extract_table(html, keywords=STATS_KEYWORDS, min_columns=4, fallback_rows=10)
+
+
+METHODS = {
+    'read_html': read_html_path,
+    'extract_table': extractor_path,
+}
+
+
+def run_worker(method, path, repeats=REPEATS):
+    """Measure one method on one page in this process and print JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    func = METHODS[method]
+
+    # Import everything up front so only parsing shows in peak RSS
+    import pandas  # noqa: F401
+    import table_extract  # noqa: F401
+    from lxml import etree  # noqa: F401
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    rows = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        table = func(html)
+        times.append(time.perf_counter() - start)
+        rows = len(table) if table is not None else 0
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Separate pass: tracemalloc slows everything down
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        'method': method,
+        'times': times,
+        'best_ms': min(times) * 1000,
+        'mean_ms': sum(times) / len(times) * 1000,
+        'python_peak_kb': peak / 1024,
+        'rss_growth_kb': rss_after - rss_before,
+        'rows': rows
+    }))
+
+
+def measure(method, path, repeats=REPEATS):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_extract', '--worker', method, path,
+         '--repeats', str(repeats)],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare read_html with the streaming extractor")
+    parser.add_argument('pages', nargs='*', help="saved pages (default: a synthetic page)")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="timed runs per method")
+    parser.add_argument('--out', help="result file (default: bench_results/extract-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    parser.add_argument('--worker', nargs=2, metavar=('METHOD', 'PAGE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.repeats)
+        return
+
+    paths = args.pages
+    tmp = None
+    if not paths:
+        tmp = tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8')
+        tmp.write(build_page())
+        tmp.close()
+        paths = [tmp.name]
+
+    print("\n" + "=" * 78)
+    print("TABLE EXTRACTION BENCHMARK")
+    print("=" * 78)
+    results = {}
+    try:
+        for path in paths:
+            size_kb = os.path.getsize(path) / 1024
+            # The synthetic page gets a stable name so runs can be compared
+            page = 'synthetic' if tmp is not None else os.path.basename(path)
+            print(f"\nPage: {page} ({size_kb:,.0f} KB)")
+            print(f"{'method':<15}{'best ms':>10}{'mean ms':>10}{'py peak KB':>13}{'RSS +KB':>10}{'rows':>7}")
+            for method in METHODS:
+                r = measure(method, path, args.repeats)
+                summary = results[f'{page}/{method}'] = summarize(r['times'])
+                summary.update({key: r[key] for key in ('python_peak_kb', 'rss_growth_kb', 'rows')})
+                print(f"{r['method']:<15}{r['best_ms']:>10.1f}{r['mean_ms']:>10.1f}"
+                      f"{r['python_peak_kb']:>13,.0f}{r['rss_growth_kb']:>10,}{r['rows']:>7}")
+    finally:
+        if tmp is not None:
+            os.remove(tmp.name)
+
+    config = {'pages': args.pages or None, 'repeats': args.repeats}
+    path = save_results('extract', config, results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 78)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+BENCHMARK: BALL-BY-BALL INGESTION
+Writes a season-sized history of simulated Cricsheet-style T20 match
+files (JSON, optionally some in the older YAML layout), then times
+cricsheet.ingest over the directory and a zip of it, inline and on a
+process pool, checking that every run produces the same totals
+
+Usage:
+    python -m benchmarks.bench_ingest [--matches 1200] [--workers 1 4]
+        [--yaml 0.1] [--repeats 3] [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import zipfile
+
+from benchmarks.harness import compare, save_results, summarize
+from cricsheet import ingest, to_frame
+
+OUTCOMES = (0, 1, 2, 3, 4, 6)
+WEIGHTS = (35, 35, 8, 1, 14, 7)
+WICKET_KINDS = ('caught', 'bowled', 'lbw', 'run out', 'stumped')
+
+
+def simulate_innings(rng, batting, bowling, target=None):
+    """
+    Returns:
+        list: Overs, each a list of JSON-layout deliveries
+    """
+    order = list(batting)
+    striker, non_striker = order.pop(0), order.pop(0)
+    overs = []
+    total = wickets = 0
+    for number in range(20):
+        bowler = bowling[number % 5 + 6]
+        deliveries = []
+        legal = 0
+        while legal < 6 and wickets < 10 and (target is None or total < target):
+            ball = {'batter': striker, 'bowler': bowler, 'non_striker': non_striker}
+            if rng.random() < 0.03:
+                ball['runs'] = {'batter': 0, 'extras': 1, 'total': 1}
+                ball['extras'] = {'wides': 1}
+                total += 1
+                deliveries.append(ball)
+                continue
+            legal += 1
+            if rng.random() < 0.05:
+                kind = rng.choice(WICKET_KINDS)
+                out = non_striker if kind == 'run out' and rng.random() < 0.4 else striker
+                ball['runs'] = {'batter': 0, 'extras': 0, 'total': 0}
+                ball['wickets'] = [{'player_out': out, 'kind': kind}]
+                deliveries.append(ball)
+                wickets += 1
+                if wickets < 10:
+                    if out == striker:
+                        striker = order.pop(0)
+                    else:
+                        non_striker = order.pop(0)
+                continue
+            runs = rng.choices(OUTCOMES, WEIGHTS)[0]
+            ball['runs'] = {'batter': runs, 'extras': 0, 'total': runs}
+            deliveries.append(ball)
+            total += runs
+            if runs % 2:
+                striker, non_striker = non_striker, striker
+        overs.append({'over': number, 'deliveries': deliveries})
+        striker, non_striker = non_striker, striker
+        if wickets >= 10 or (target is not None and total >= target):
+            break
+    return overs, total
+
+
+def simulate_match(number, seed, pool):
+    """One T20 match in the current Cricsheet JSON layout"""
+    rng = random.Random(f'{seed}-{number}')
+    squad = rng.sample(pool, 22)
+    teams = (f'Team {number % 10}', f'Team {(number + 3) % 10}')
+    players = {teams[0]: squad[:11], teams[1]: squad[11:]}
+    first, total = simulate_innings(rng, squad[:11], squad[11:])
+    second, _ = simulate_innings(rng, squad[11:], squad[:11], target=total + 1)
+    return {
+        'meta': {'data_version': '1.1.0'},
+        'info': {'event': {'name': 'Indian Premier League'}, 'match_type': 'T20',
+                 'season': str(2008 + number // 70), 'teams': list(teams), 'players': players},
+        'innings': [{'team': teams[0], 'overs': first}, {'team': teams[1], 'overs': second}],
+    }
+
+
+def to_yaml_layout(match):
+    """The same match in the older YAML layout (numbered balls, 'batsman')"""
+    innings = []
+    for position, entry in enumerate(match['innings']):
+        deliveries = []
+        for over in entry['overs']:
+            for i, ball in enumerate(over['deliveries']):
+                ball = dict(ball, batsman=ball['batter'],
+                            runs=dict(ball['runs'], batsman=ball['runs']['batter']))
+                del ball['batter'], ball['runs']['batter']
+                if 'wickets' in ball:
+                    ball['wicket'] = ball.pop('wickets')[0]
+                deliveries.append({round(over['over'] + (i + 1) / 10, 1): ball})
+        name = f"{('1st', '2nd')[position]} innings"
+        innings.append({name: {'team': entry['team'], 'deliveries': deliveries}})
+    info = {key: value for key, value in match['info'].items() if key not in ('event', 'players')}
+    return {'meta': {'data_version': 0.9}, 'info': dict(info, competition='IPL'),
+            'innings': innings}
+
+
+def write_matches(directory, matches, seed=0, yaml_share=0.0):
+    """
+    Write simulated match files (roughly yaml_share of them as YAML)
+
+    Returns:
+        int: Bytes written
+    """
+    import yaml
+
+    pool = [f'Player {i:03}' for i in range(700)]
+    written = 0
+    for number in range(matches):
+        match = simulate_match(number, seed, pool)
+        if random.Random(f'{seed}-{number}-format').random() < yaml_share:
+            text = yaml.safe_dump(to_yaml_layout(match), sort_keys=False)
+            path = os.path.join(directory, f'{100000 + number}.yaml')
+        else:
+            text = json.dumps(match)
+            path = os.path.join(directory, f'{100000 + number}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            written += f.write(text)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time ball-by-ball ingestion")
+    parser.add_argument('--matches', type=int, default=1200)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument('--yaml', type=float, default=0.0,
+                        help="share of match files in the older YAML layout (much slower to parse)")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="result file (default: bench_results/ingest-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 70)
+    print(f"BALL-BY-BALL INGESTION ({args.matches:,} matches, {args.yaml:.0%} YAML)")
+    print("=" * 70)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        matches_dir = os.path.join(directory, 'matches')
+        os.makedirs(matches_dir)
+        started = time.perf_counter()
+        size = write_matches(matches_dir, args.matches, args.seed, args.yaml)
+        print(f"Wrote {size / 1e6:,.1f} MB of match files in {time.perf_counter() - started:.1f}s")
+
+        archive = os.path.join(directory, 'matches.zip')
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name in sorted(os.listdir(matches_dir)):
+                z.write(os.path.join(matches_dir, name), name)
+
+        reference = None
+        print(f"\n{'source':<10}{'workers':>8}{'p50 s':>10}{'matches/s':>12}{'players':>10}")
+        print("-" * 50)
+        for label, source in (('directory', matches_dir), ('zip', archive)):
+            for workers in args.workers:
+                samples = []
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    totals, summary = ingest(source, workers)
+                    samples.append(time.perf_counter() - started)
+                frame = to_frame(totals)
+                if reference is None:
+                    reference = frame
+                elif not frame.equals(reference):
+                    print(f"  {label} with {workers} workers produced different totals")
+                if summary['failed']:
+                    print(f"  {len(summary['failed'])} files failed: {summary['failed'][0]}")
+
+                result = results[f'{label}@{workers}'] = summarize(samples)
+                print(f"{label:<10}{workers:>8}{result['p50_ms'] / 1000:>10.2f}"
+                      f"{summary['matches'] / (result['p50_ms'] / 1000):>12,.0f}{len(frame):>10,}")
+
+    path = save_results('ingest', {'matches': args.matches, 'yaml': args.yaml,
+                                   'workers': args.workers, 'repeats': args.repeats},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+BENCHMARK: WEB TIER LOAD
+Closed-loop load generator for the Flask endpoints: each endpoint is hit
+by N concurrent clients for a fixed time, and p50/p99 latency and
+throughput are reported and saved as JSON
+
+By default the app is started in a subprocess (threaded werkzeug server)
+over a temp directory holding a published synthetic dataset; --url
+points the load at a server that is already running instead (e.g. a
+multi-worker gunicorn deployment).
+
+Usage:
+    python -m benchmarks.bench_load [--players 5000] [--duration 5]
+        [--concurrency 1 8 32] [--url http://host:port] [--out FILE]
+        [--compare BASELINE]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.harness import compare, save_results, summarize
+
+ENDPOINTS = {
+    'index': '/',
+    'index_top10': '/?top=10',
+    'players': '/api/players?limit=50',
+    'players_query': '/api/players?sort=Average&min_Runs=1000&limit=50',
+    'players_search': '/api/players?q=er%2012&limit=50',
+    'stats': '/api/stats',
+    'download_csv': '/download/csv',
+    'download_json': '/download/json',
+}
+
+
+def publish_dataset(directory, players):
+    """Publish a synthetic dataset where the app looks for it"""
+    import pandas as pd
+
+    from benchmarks.bench_memory import make_columns
+    from scraper import IPLScraper
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        scraper = IPLScraper()
+        scraper.df = pd.DataFrame(make_columns(players))
+        scraper._compact_dtypes()
+        scraper.save_incremental()
+    finally:
+        os.chdir(cwd)
+
+
+def serve(directory, port):
+    """Run the app over directory (entry point of the server subprocess)"""
+    from werkzeug.serving import make_server
+
+    os.chdir(directory)
+    from app import app
+
+    # The checkout keeps index.html next to app.py rather than in templates/
+    if not os.path.exists(os.path.join(app.root_path, app.template_folder, 'index.html')):
+        app.template_folder = app.root_path
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def start_server(directory, port):
+    """Start serve() in a subprocess and wait until it answers"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_load', '--serve', directory, str(port)],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f'{base}/api/stats', timeout=1)
+            return process, base
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("app server did not start")
+
+
+def load(url, clients, duration):
+    """
+    Hit one URL from `clients` threads for `duration` seconds
+
+    Returns:
+        dict: Summary with p50/p99 latency and throughput
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Flask endpoints")
+    parser.add_argument('--players', type=int, default=5000, help="synthetic dataset size")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per measurement")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--endpoints', nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument('--url', help="load an already running server instead")
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--out', help="result file (default: bench_results/load-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    parser.add_argument('--serve', nargs=2, metavar=('DIR', 'PORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    print("\n" + "=" * 70)
+    print(f"WEB TIER LOAD ({args.duration:g}s per run)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        base = args.url
+        if base is None:
+            publish_dataset(directory, args.players)
+            process, base = start_server(directory, args.port)
+        try:
+            results = {}
+            print(f"{'endpoint':<16}{'clients':>8}{'p50 ms':>10}{'p99 ms':>10}"
+                  f"{'req/s':>10}{'errors':>8}")
+            print("-" * 62)
+            for name in args.endpoints:
+                url = base + ENDPOINTS[name]
+                requests.get(url, timeout=30)  # build and cache the response first
+                for clients in args.concurrency:
+                    summary = results[f'{name}@{clients}'] = load(url, clients, args.duration)
+                    print(f"{name:<16}{clients:>8}{summary['p50_ms']:>10.2f}"
+                          f"{summary['p99_ms']:>10.2f}{summary['throughput']:>10.1f}"
+                          f"{summary['errors']:>8}")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    config = {'players': args.players if args.url is None else None, 'url': args.url,
+              'duration': args.duration, 'concurrency': args.concurrency}
+    path = save_results('load', config, results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+BENCHMARK: PLAYER TABLE MEMORY
+Compares the list-of-dicts the web tier used to hold with the
+array-backed PlayerTable and the compact DataFrame from clean_data
+
+Usage:
+    python -m benchmarks.bench_memory [--sizes 10000 100000 ...] [--out FILE]
+        [--compare BASELINE]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import compare, save_results
+from dataset import PlayerTable
+from scraper import IPLScraper
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def make_columns(players, seed=0):
+    """
+    Random but plausible cleaned columns
+
+    Returns:
+        dict: Column name -> numpy array, sorted by Runs
+    """
+    rng = np.random.default_rng(seed)
+    runs = np.sort(rng.integers(0, 8000, players))[::-1]
+    return {
+        'Player': np.array([f'Player {i}' for i in range(players)], dtype=object),
+        'Runs': runs,
+        'Matches': rng.integers(1, 250, players),
+        'Innings': rng.integers(1, 240, players),
+        'Average': np.round(rng.uniform(5, 55, players), 2),
+        'Strike_Rate': np.round(rng.uniform(90, 180, players), 2),
+        'Highest_Score': rng.integers(0, 176, players),
+        'Centuries': rng.integers(0, 8, players),
+        'Fifties': rng.integers(0, 60, players),
+        'Fours': rng.integers(0, 800, players),
+        'Sixes': rng.integers(0, 360, players),
+        'Highest_Score_Not_Out': rng.random(players) < 0.3,
+        'Insight': np.select([np.arange(players) < 5, np.arange(players) < 15],
+                             ['Legend', 'Elite'], default='Good').astype(object),
+    }
+
+
+def make_records(columns):
+    """The list of dicts json.load gives back for the 'players' block"""
+    names = list(columns)
+    values = [columns[name].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def traced(build):
+    """Bytes still allocated by the object build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def mb(size):
+    return f"{size / 1024 / 1024:>12,.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory of the player table")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--out', help="result file (default: bench_results/memory-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 70)
+    print("PLAYER TABLE MEMORY (MB)")
+    print("=" * 70)
+    print(f"{'players':>10}{'list[dict]':>14}{'PlayerTable':>14}{'DataFrame':>14}{'ratio':>10}")
+
+    results = {}
+    scraper = IPLScraper()
+    for players in args.sizes:
+        columns = make_columns(players)
+
+        records, dict_size = traced(lambda: make_records(columns))
+        del records
+
+        # The table is built from records, which are freed afterwards
+        def build_table():
+            return PlayerTable.from_records(make_records(columns))
+        table, table_size = traced(build_table)
+        del table
+
+        scraper.df = pd.DataFrame(columns)
+        scraper._compact_dtypes()
+        frame_size = int(scraper.df.memory_usage(deep=True).sum())
+        scraper.df = None
+
+        results[f'{players}/list_dict'] = {'bytes': dict_size}
+        results[f'{players}/player_table'] = {'bytes': table_size}
+        results[f'{players}/dataframe'] = {'bytes': frame_size}
+        print(f"{players:>10,}{mb(dict_size)}  {mb(table_size)}  {mb(frame_size)}"
+              f"{dict_size / table_size:>9.1f}x")
+
+    path = save_results('memory', {'sizes': args.sizes}, results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results, key='bytes')
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+BENCHMARK: FETCH -> CLEAN -> SAVE
+Times full scraper runs against the local stub server under a few
+upstream scenarios (fast, slow, flaky, ESPN down), sequential and
+concurrent fetching, and saves the per-stage latencies as JSON
+
+Usage:
+    python -m benchmarks.bench_pipeline [--repeats 3] [--pages DIR]
+        [--scenarios fast slow] [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.harness import compare, save_results, summarize
+from benchmarks.stub_server import StubServer, load_pages, stub_urls
+from http_client import HttpClient
+from scraper import IPLScraper
+
+# name -> StubServer options
+SCENARIOS = {
+    'fast': {'latency': 0.01},
+    'slow': {'latency': 0.3, 'jitter': 0.1},
+    'flaky': {'latency': 0.05, 'fail_rate': 0.3},
+    'espn_down': {'latency': 0.05, 'down': ('espncricinfo',)},
+}
+MODES = ('sequential', 'concurrent')
+STAGES = ('fetch', 'clean', 'save', 'total')
+
+
+def run_once(base_url, concurrent, directory):
+    """
+    One scraper run against the stub
+
+    Returns:
+        tuple: (seconds per stage, rows kept, data source)
+    """
+    scraper = IPLScraper(client=HttpClient(max_retries=2))
+    scraper.urls, scraper.alternative_urls = stub_urls(base_url)
+    join = lambda name: os.path.join(directory, name)
+
+    timings = {}
+    started = time.perf_counter()
+    scraper.fetch_data(concurrent=concurrent)
+    timings['fetch'] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    scraper.clean_data()
+    timings['clean'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    scraper.save_incremental(join('players.json'), join('players.csv'), join('players.cols'),
+                             join('changes.jsonl'), join('manifest.json'), join('players.idx'))
+    timings['save'] = time.perf_counter() - mark
+    timings['total'] = time.perf_counter() - started
+    return timings, len(scraper.df), scraper.data_source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time scraper runs against the stub server")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--pages', help="directory of recorded pages")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--out', help="result file (default: bench_results/pipeline-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 70)
+    print(f"FETCH -> CLEAN -> SAVE ({args.repeats} runs per scenario)")
+    print("=" * 70)
+
+    pages = load_pages(args.pages)
+    results = {}
+    sources = {}
+    for scenario in args.scenarios:
+        for mode in MODES:
+            samples = {stage: [] for stage in STAGES}
+            with StubServer(pages, **SCENARIOS[scenario]) as server:
+                for _ in range(args.repeats):
+                    with tempfile.TemporaryDirectory() as directory:
+                        # The scraper's progress output would drown the table
+                        with redirect_stdout(io.StringIO()):
+                            timings, rows, source = run_once(server.base_url,
+                                                             mode == 'concurrent', directory)
+                    for stage in STAGES:
+                        samples[stage].append(timings[stage])
+                    sources.setdefault(f'{scenario}/{mode}', set()).add(f'{source} ({rows} rows)')
+
+            for stage in STAGES:
+                results[f'{scenario}/{mode}/{stage}'] = summarize(samples[stage])
+            print(f"{scenario:<10} {mode:<11} " + "  ".join(
+                f"{stage} {results[f'{scenario}/{mode}/{stage}']['p50_ms']:>8.1f}ms"
+                for stage in STAGES) + f"   [{', '.join(sorted(sources[f'{scenario}/{mode}']))}]")
+
+    path = save_results('pipeline', {'repeats': args.repeats, 'pages': args.pages,
+                                     'scenarios': {s: SCENARIOS[s] for s in args.scenarios}},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
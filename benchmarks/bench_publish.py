@@ -0,0 +1,159 @@
+"""
+BENCHMARK: PUBLISH UNDER LOAD
+Hammers the published files and DatasetCache with reads while another
+process keeps publishing new versions, and counts any read that sees a
+partial or mixed-up dataset
+
+Usage:
+    python -m benchmarks.bench_publish [--seconds 10] [--threads 4] [--out FILE]
+        [--compare BASELINE]
+
+Exits with status 1 when any read saw a partial dataset.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from benchmarks.bench_memory import make_columns
+from benchmarks.harness import compare, save_results
+from columnar import ColumnarFile
+from dataset import DatasetCache
+from scraper import IPLScraper
+
+SIZES = [500, 2_000, 8_000]
+
+
+def paths(directory):
+    return {
+        'json': os.path.join(directory, 'players.json'),
+        'csv': os.path.join(directory, 'players.csv'),
+        'columnar': os.path.join(directory, 'players.cols'),
+        'log': os.path.join(directory, 'changes.jsonl'),
+        'manifest': os.path.join(directory, 'manifest.json'),
+        'index': os.path.join(directory, 'players.idx'),
+    }
+
+
+def make_scraper(players, round_no):
+    """Scraper holding a cleaned table of the given size"""
+    scraper = IPLScraper()
+    columns = make_columns(players, seed=round_no)
+    scraper.df = pd.DataFrame(columns)
+    scraper._compact_dtypes()
+    return scraper
+
+
+def writer(directory, stop_at, published):
+    """Publish versions of varying size until stop_at"""
+    files = paths(directory)
+    round_no = 1
+    while time.time() < stop_at:
+        scraper = make_scraper(SIZES[round_no % len(SIZES)], round_no)
+        scraper.last_updated = f"round {round_no}"
+        scraper.save_incremental(files['json'], files['csv'], files['columnar'],
+                                 files['log'], files['manifest'], files['index'])
+        round_no += 1
+    published.value = round_no - 1
+
+
+def reader(directory, stop_at, counts, lock):
+    """Read every published form in a loop and check it is complete"""
+    files = paths(directory)
+    cache = DatasetCache(sources=(files['columnar'], files['json']), manifest=files['manifest'])
+    local = {'reads': 0, 'failures': 0, 'versions': set()}
+
+    def check(ok, what):
+        local['reads'] += 1
+        if not ok:
+            local['failures'] += 1
+            print(f"  partial read: {what}")
+
+    while time.time() < stop_at:
+        dataset = cache.get()
+        check(len(dataset.table) == dataset.metadata.get('total_players', 0), 'DatasetCache')
+        local['versions'].add(dataset.version)
+
+        try:
+            with open(files['json'], 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            check(len(data['players']) == data['metadata']['total_players'], 'JSON')
+        except (OSError, ValueError, KeyError) as e:
+            check(isinstance(e, FileNotFoundError), f"JSON {e!r}")
+
+        try:
+            source = ColumnarFile(files['columnar'])
+            check(source.length == source.metadata['total_players'], 'columnar')
+        except (OSError, ValueError, KeyError) as e:
+            check(isinstance(e, FileNotFoundError), f"columnar {e!r}")
+
+    with lock:
+        counts['reads'] += local['reads']
+        counts['failures'] += local['failures']
+        counts['versions'] |= local['versions']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read published files while publishing")
+    parser.add_argument('--seconds', type=float, default=10.0, help="how long to publish")
+    parser.add_argument('--threads', type=int, default=4, help="reader threads")
+    parser.add_argument('--out', help="result file (default: bench_results/publish-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+    seconds, threads = args.seconds, args.threads
+
+    print("\n" + "=" * 70)
+    print(f"PUBLISH UNDER LOAD ({seconds}s, {threads} reader threads)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # One version up front so readers have something to load
+        files = paths(directory)
+        make_scraper(SIZES[0], 0).save_incremental(files['json'], files['csv'], files['columnar'],
+                                                    files['log'], files['manifest'],
+                                                    files['index'])
+
+        stop_at = time.time() + seconds
+        published = multiprocessing.Value('i', 0)
+        process = multiprocessing.Process(target=writer, args=(directory, stop_at, published))
+        process.start()
+
+        counts = {'reads': 0, 'failures': 0, 'versions': set()}
+        lock = threading.Lock()
+        workers = [threading.Thread(target=reader, args=(directory, stop_at, counts, lock))
+                   for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        process.join()
+
+    print(f"versions published: {published.value:>10,}")
+    print(f"versions seen:      {len(counts['versions']):>10,}")
+    print(f"reads:              {counts['reads']:>10,}")
+    print(f"partial reads:      {counts['failures']:>10,}")
+
+    results = {
+        'readers': {'reads': counts['reads'], 'partial_reads': counts['failures'],
+                    'reads_per_second': round(counts['reads'] / seconds, 1)},
+        'writer': {'versions_published': published.value,
+                   'versions_seen': len(counts['versions'])},
+    }
+    path = save_results('publish', {'seconds': seconds, 'threads': threads, 'sizes': SIZES},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results, key='reads_per_second')
+    print("=" * 70)
+    return counts['failures']
+
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
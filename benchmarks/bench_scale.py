@@ -0,0 +1,104 @@
+"""
+BENCHMARK: PIPELINE AT SCALE
+Times extract -> clean -> save on synthetic source-style data (see
+synthetic.py) from thousands to millions of players, and saves the
+per-stage timings as JSON
+
+Above --extract-limit rows the HTML parse is skipped and the raw table
+comes straight from the generator, since extraction dominates there.
+
+Usage:
+    python -m benchmarks.bench_scale [--sizes 10000 100000 1000000]
+        [--seed 0] [--extract-limit 200000] [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.harness import compare, save_results, summarize
+from scraper import IPLScraper
+from synthetic import raw_frame, write_html
+from table_extract import STATS_KEYWORDS, extract_table
+
+STAGES = ('generate', 'extract', 'clean', 'save')
+
+
+def run_once(players, seed, directory, parse_html):
+    """
+    Returns:
+        dict: Seconds per stage (stages that did not run are left out)
+    """
+    join = lambda name: os.path.join(directory, name)
+    timings = {}
+
+    started = time.perf_counter()
+    if parse_html:
+        write_html(join('page.html'), players, seed)
+        timings['generate'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(join('page.html'), 'r', encoding='utf-8') as f:
+            table = extract_table(f.read(), keywords=STATS_KEYWORDS, min_columns=4)
+        timings['extract'] = time.perf_counter() - started
+    else:
+        table = raw_frame(players, seed)
+        timings['generate'] = time.perf_counter() - started
+
+    scraper = IPLScraper()
+    scraper.df = table
+    started = time.perf_counter()
+    scraper.clean_data()
+    timings['clean'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scraper.save_incremental(join('players.json'), join('players.csv'), join('players.cols'),
+                             join('changes.jsonl'), join('manifest.json'), join('players.idx'))
+    timings['save'] = time.perf_counter() - started
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the pipeline on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--extract-limit', type=int, default=200_000,
+                        help="largest size that goes through the HTML parser")
+    parser.add_argument('--out', help="result file (default: bench_results/scale-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 70)
+    print("PIPELINE AT SCALE (synthetic source tables)")
+    print("=" * 70)
+    print(f"{'players':>12}" + "".join(f"{stage + ' s':>12}" for stage in STAGES)
+          + f"{'rows/s':>14}")
+    print("-" * 74)
+
+    results = {}
+    for players in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            # The scraper's progress output would drown the table
+            with redirect_stdout(io.StringIO()):
+                timings = run_once(players, args.seed, directory,
+                                   players <= args.extract_limit)
+        for stage, seconds in timings.items():
+            results[f'{players}/{stage}'] = summarize([seconds])
+        pipeline = sum(seconds for stage, seconds in timings.items() if stage != 'generate')
+        print(f"{players:>12,}" + "".join(
+            f"{timings[stage]:>12.2f}" if stage in timings else f"{'-':>12}" for stage in STAGES)
+            + f"{players / pipeline:>14,.0f}")
+
+    path = save_results('scale', {'sizes': args.sizes, 'seed': args.seed,
+                                  'extract_limit': args.extract_limit}, results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results)
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+BENCHMARK: WEB WORKER COLD START
+Starts fresh processes the way an autoscaled worker starts, and times
+importing app.py and the first response (from process spawn), over a
+published dataset or a single JSON/CSV data file. Also lists the heavy
+modules the serving path pulled in (pandas, requests and lxml should
+stay out of it).
+
+Usage:
+    python -m benchmarks.bench_startup [--players 5000] [--runs 10]
+        [--formats published json csv] [--endpoint /api/players?limit=50]
+        [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Only the standard library at module level: the probe runs in the
+# measured process, so anything imported here would count against app.py
+from benchmarks.harness import compare, save_results, summarize
+
+HEAVY_MODULES = ('pandas', 'requests', 'lxml', 'numpy', 'yaml')
+
+# Files kept for each format; everything else is deleted before the runs
+FORMAT_FILES = {
+    'published': None,
+    'json': ('ipl_most_runs_career.json',),
+    'csv': ('ipl_most_runs_career.csv',),
+}
+
+
+def probe(directory, endpoint):
+    """Import the app and answer one request (runs in the measured process)"""
+    started = time.perf_counter()
+    os.chdir(directory)
+    import app as web
+
+    imported = time.perf_counter()
+    # The checkout keeps index.html next to app.py rather than in templates/
+    if not os.path.exists(os.path.join(web.app.root_path, web.app.template_folder, 'index.html')):
+        web.app.template_folder = web.app.root_path
+    response = web.app.test_client().get(endpoint)
+    print(json.dumps({
+        'import': imported - started,
+        'first_request': time.perf_counter() - imported,
+        'finished_at': time.time(),
+        'status': response.status_code,
+        'modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def run_probe(directory, endpoint):
+    """
+    Returns:
+        dict: The probe's report plus 'first_response' (seconds from
+        spawning the process to the response) and 'process' (wall time)
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spawned = time.time()
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--probe', directory, endpoint],
+        cwd=root, capture_output=True, text=True, check=True).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    report['process'] = time.perf_counter() - started
+    report['first_response'] = report['finished_at'] - spawned
+    return report
+
+
+def interpreter_start(runs):
+    """Wall time of a bare `python -c pass`, the floor under every run"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def prepare(directory, players, fmt):
+    """Publish a synthetic dataset and keep only the files of one format"""
+    from benchmarks.bench_load import publish_dataset
+
+    publish_dataset(directory, players)
+    keep = FORMAT_FILES[fmt]
+    if keep is not None:
+        for name in os.listdir(directory):
+            if name not in keep:
+                os.remove(os.path.join(directory, name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time web worker cold starts")
+    parser.add_argument('--players', type=int, default=5000, help="synthetic dataset size")
+    parser.add_argument('--runs', type=int, default=10, help="fresh processes per format")
+    parser.add_argument('--formats', nargs='+', default=list(FORMAT_FILES),
+                        choices=list(FORMAT_FILES))
+    parser.add_argument('--endpoint', default='/api/players?limit=50')
+    parser.add_argument('--out', help="result file (default: bench_results/startup-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    parser.add_argument('--probe', nargs=2, metavar=('DIR', 'ENDPOINT'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        probe(*args.probe)
+        return
+
+    print("\n" + "=" * 70)
+    print(f"WEB WORKER COLD START ({args.runs} processes each, GET {args.endpoint})")
+    print("=" * 70)
+
+    results = {'interpreter': summarize(interpreter_start(args.runs))}
+    print(f"{'interpreter only':<26}{results['interpreter']['p50_ms']:>10.1f} ms")
+    print(f"\n{'format':<12}{'import ms':>12}{'request ms':>12}{'first resp ms':>15}  modules")
+    print("-" * 70)
+    for fmt in args.formats:
+        with tempfile.TemporaryDirectory() as directory:
+            prepare(directory, args.players, fmt)
+            reports = [run_probe(directory, args.endpoint) for _ in range(args.runs)]
+
+        failed = sum(report['status'] != 200 for report in reports)
+        for stage in ('import', 'first_request', 'first_response', 'process'):
+            results[f'{fmt}/{stage}'] = summarize([report[stage] for report in reports],
+                                                  errors=failed)
+        modules = sorted({name for report in reports for name in report['modules']})
+        results[f'{fmt}/modules'] = modules
+        print(f"{fmt:<12}{results[f'{fmt}/import']['p50_ms']:>12.1f}"
+              f"{results[f'{fmt}/first_request']['p50_ms']:>12.1f}"
+              f"{results[f'{fmt}/first_response']['p50_ms']:>15.1f}  {', '.join(modules) or '-'}"
+              + (f"  ({failed} failed)" if failed else ""))
+
+    path = save_results('startup', {'players': args.players, 'runs': args.runs,
+                                    'endpoint': args.endpoint, 'formats': args.formats},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, {name: value for name, value in results.items()
+                               if isinstance(value, dict)})
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
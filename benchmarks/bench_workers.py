@@ -0,0 +1,128 @@
+"""
+BENCHMARK: MULTI-WORKER MEMORY AND COLD START
+Starts N worker processes that each attach to the published dataset
+the way an app.py worker does, warm every query index and run a few
+queries. It compares workers that build their own indexes with workers
+that map the shared index file (shared_index.py).
+
+Reports, per worker, the time from start to the first answered query
+and its private (unshared) memory, read from /proc/self/smaps_rollup
+(Linux only).
+
+Usage:
+    python -m benchmarks.bench_workers [--players 200000] [--workers 1 2 4 8]
+        [--out FILE] [--compare BASELINE]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_memory import make_columns
+from benchmarks.harness import compare, save_results, summarize
+from scraper import IPLScraper
+
+QUERIES = [
+    {'sort': 'Average'},
+    {'ranges': {'Runs': (1000, 3000)}, 'sort': 'Strike_Rate'},
+    {'tiers': {'Insight': ['Elite']}},
+    {'prefix': 'player 12'},
+    {'contains': 'er 77'},
+]
+
+
+def private_kib():
+    """Private_Clean + Private_Dirty of this process, in KiB"""
+    total = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1])
+    return total
+
+
+def worker(directory, manifest, results):
+    """One serving process: attach, answer a query, warm, report"""
+    started = time.perf_counter()
+    os.chdir(directory)
+    from dataset import DatasetCache
+
+    baseline = private_kib()
+    dataset = DatasetCache(manifest=manifest).get()
+    dataset.index.select(**QUERIES[0])
+    first = time.perf_counter() - started
+
+    dataset.index.warm()
+    for query in QUERIES:
+        dataset.index.select(**query)
+    results.put((first, private_kib() - baseline, dataset.shared is not None))
+
+
+def run(directory, manifest, workers):
+    """Start workers at once; returns their (first query s, private KiB, shared)"""
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(directory, manifest, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measured
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Start serving workers with and without "
+                                                 "the shared index")
+    parser.add_argument('--players', type=int, default=200_000, help="synthetic dataset size")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="worker counts to start")
+    parser.add_argument('--out', help="result file (default: bench_results/workers-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result file")
+    args = parser.parse_args(argv)
+    players = args.players
+
+    print("\n" + "=" * 70)
+    print(f"MULTI-WORKER SERVING ({players:,} players)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as directory:
+        scraper = IPLScraper()
+        scraper.df = pd.DataFrame(make_columns(players))
+        scraper._compact_dtypes()
+        join = lambda name: os.path.join(directory, name)
+        scraper.save_incremental(join('players.json'), join('players.csv'), join('players.cols'),
+                                 join('changes.jsonl'), join('manifest.json'), join('players.idx'))
+        # Same data published without the index: every worker builds its own
+        scraper.publish({'columnar': join('players.cols')}, join('plain.json'))
+
+        print(f"{'mode':<10}{'workers':>8}{'first query (ms)':>20}"
+              f"{'private/worker (MiB)':>24}{'private total (MiB)':>22}")
+        print("-" * 84)
+        results = {}
+        for mode, manifest in (('own', 'plain.json'), ('shared', 'manifest.json')):
+            for workers in sorted(set(args.workers)):
+                measured = run(directory, manifest, workers)
+                assert all(shared == (mode == 'shared') for _, _, shared in measured)
+                first = max(m[0] for m in measured) * 1000
+                private = [m[1] / 1024 for m in measured]
+                summary = results[f'{mode}@{workers}'] = summarize([m[0] for m in measured])
+                summary['private_mib'] = round(sum(private) / len(private), 1)
+                print(f"{mode:<10}{workers:>8}{first:>20.1f}"
+                      f"{sum(private) / len(private):>24.1f}{sum(private):>22.1f}")
+
+    path = save_results('workers', {'players': players, 'workers': args.workers},
+                        results, args.out)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare(args.compare, results, key='max_ms')
+        compare(args.compare, results, key='private_mib')
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
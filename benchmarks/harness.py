@@ -0,0 +1,118 @@
+"""
+BENCHMARK HARNESS
+Latency summaries and JSON result files shared by the benchmarks, so
+runs can be compared against an earlier baseline
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+RESULTS_DIR = 'bench_results'
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile
+
+    Args:
+        values (list): Measurements (any order)
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The value at that rank (0.0 for no values)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies, elapsed=None, errors=0):
+    """
+    Args:
+        latencies (list): Seconds per successful operation
+        elapsed (float): Wall time of the run, for throughput
+        errors (int): Failed operations
+
+    Returns:
+        dict: count, errors, p50/p90/p99/max in ms and ops per second
+    """
+    summary = {
+        'count': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 3),
+    }
+    if elapsed:
+        summary['throughput'] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_results(name, config, results, path=None):
+    """
+    Write one benchmark run as JSON
+
+    Args:
+        name (str): Benchmark name
+        config (dict): Parameters of the run
+        results (dict): Measurements
+        path (str): Output file (default: bench_results/<name>-<time>.json)
+
+    Returns:
+        str: The file written
+    """
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    document = {
+        'benchmark': name,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'config': config,
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    return path
+
+
+def compare(baseline_path, results, key='p50_ms'):
+    """
+    Print the change of one metric against an earlier result file
+
+    Args:
+        baseline_path (str): JSON written by save_results
+        results (dict): Current results, same shape as the baseline's
+        key (str): Metric compared in each summary
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    print(f"\nCompared with {baseline_path} ({key}):")
+    compared = 0
+    for name, summary in results.items():
+        before = baseline.get(name, {}).get(key)
+        now = summary.get(key)
+        if not before or now is None:
+            continue
+        compared += 1
+        change = (now - before) / before * 100
+        print(f"  {name:<36} {before:>10.2f} -> {now:>10.2f}  ({change:+.1f}%)")
+    if not compared:
+        print("  no measurements in common")
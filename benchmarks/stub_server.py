@@ -0,0 +1,232 @@
+"""
+BENCHMARK: STUB UPSTREAM SERVER
+Local stand-in for ESPNcricinfo, Cricbuzz and HowSTAT that serves
+recorded pages with configurable latency and failures, so the scraper
+can be timed without touching the real sites
+
+Pages are served under /<site>/..., e.g. /espncricinfo/records/...;
+stub_urls() gives the scraper URLs to point at it. Recorded pages are
+read from a directory holding espncricinfo.html, cricbuzz.html and
+howstat.html (save them with --record); sites without a recording get a
+generated page of the same shape.
+
+Usage:
+    python -m benchmarks.stub_server [--port 8099] [--latency 0.2]
+        [--jitter 0.05] [--fail 0.1] [--down cricbuzz] [--pages DIR]
+    python -m benchmarks.stub_server --record DIR
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_extract import build_page
+
+SITES = ('espncricinfo', 'cricbuzz', 'howstat')
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Threaded server that ignores clients hanging up (cancelled fetches)"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def alternative_page(players=100):
+    """A Cricbuzz/HowSTAT-like page: one plain table of run scorers"""
+    rows = ''.join(
+        f'<tr><td>Player {i}</td><td>{200 - i}</td><td>{190 - i}</td>'
+        f'<td>{7000 - i * 60:,}</td><td>{32 - i * 0.1:.2f}</td><td>{130 + i % 20}.4</td></tr>'
+        for i in range(players))
+    return ('<html><body><table><tr><th>Player</th><th>Matches</th><th>Innings</th>'
+            f'<th>Runs</th><th>Average</th><th>SR</th></tr>{rows}</table></body></html>')
+
+
+def load_pages(directory=None):
+    """
+    Returns:
+        dict: Site -> page bytes (recorded where available, else generated)
+    """
+    pages = {
+        'espncricinfo': build_page(),
+        'cricbuzz': alternative_page(),
+        'howstat': alternative_page(),
+    }
+    pages = {site: html.encode('utf-8') for site, html in pages.items()}
+    for site in SITES:
+        path = os.path.join(directory or '', f'{site}.html')
+        if directory and os.path.exists(path):
+            with open(path, 'rb') as f:
+                pages[site] = f.read()
+    return pages
+
+
+def stub_urls(base):
+    """
+    Scraper URLs pointing at a stub server
+
+    Args:
+        base (str): e.g. http://127.0.0.1:8099
+
+    Returns:
+        tuple: (ESPN URLs, alternative URLs), same shape as IPLScraper's
+    """
+    return ([f'{base}/espncricinfo/records/most-runs-{i}' for i in range(3)],
+            [f'{base}/cricbuzz/cricket-stats/ipl/most-runs',
+             f'{base}/howstat/cricket/Statistics/IPL/PlayerProgressBat.asp'])
+
+
+class StubServer:
+    """
+    Threaded HTTP server running in the background
+
+    Every request sleeps latency +/- jitter seconds; a fraction fail_rate
+    of requests (and every request to a site in down) get a 503 with a
+    Retry-After header instead of the page. Request counts per site and
+    status are kept in self.counts.
+    """
+
+    def __init__(self, pages=None, port=0, latency=0.0, jitter=0.0, fail_rate=0.0,
+                 down=(), retry_after=1, seed=0):
+        """
+        Args:
+            pages (dict): Site -> page bytes (default: load_pages())
+            port (int): Port to listen on (0: any free port)
+            latency (float): Seconds added to every response
+            jitter (float): Uniform +/- variation of the latency
+            fail_rate (float): Fraction of requests answered with a 503
+            down (tuple): Sites that always answer 503
+            retry_after (int): Retry-After seconds sent with a 503
+            seed (int): Seed of the failure/jitter sequence
+        """
+        self.pages = pages or load_pages()
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.down = set(down)
+        self.retry_after = retry_after
+        self.counts = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = QuietServer(('127.0.0.1', port), self._handler())
+        self.port = self._server.server_address[1]
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        self._thread = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site = self.path.strip('/').split('/')[0]
+                delay, fail = stub._draw()
+                time.sleep(delay)
+                if site not in stub.pages:
+                    status, body = 404, b'not found'
+                elif fail or site in stub.down:
+                    status, body = 503, b'unavailable'
+                else:
+                    status, body = 200, stub.pages[site]
+                stub._count(site, status)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 503:
+                    self.send_header('Retry-After', str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def _draw(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            return max(0.0, delay), self._random.random() < self.fail_rate
+
+    def _count(self, site, status):
+        with self._lock:
+            key = f'{site} {status}'
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(directory):
+    """Save the live pages of each site for later replay"""
+    from scraper import IPLScraper
+
+    scraper = IPLScraper()
+    os.makedirs(directory, exist_ok=True)
+    for site in SITES:
+        for url in scraper.urls + scraper.alternative_urls:
+            if site not in url:
+                continue
+            try:
+                response = scraper.client.get(url, headers=scraper.headers, timeout=15)
+            except Exception as e:
+                print(f"{site}: {url} failed ({e})")
+                continue
+            if response.status_code == 200:
+                with open(os.path.join(directory, f'{site}.html'), 'wb') as f:
+                    f.write(response.content)
+                print(f"{site}: {len(response.content):,} bytes from {url}")
+                break
+        else:
+            print(f"{site}: no page could be recorded")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded stats pages locally")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of latency")
+    parser.add_argument('--fail', type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument('--down', nargs='*', default=[], choices=SITES, help="sites always failing")
+    parser.add_argument('--pages', help="directory of recorded pages")
+    parser.add_argument('--record', metavar='DIR', help="save the live pages to DIR and exit")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record)
+        return
+
+    server = StubServer(load_pages(args.pages), args.port, args.latency, args.jitter,
+                        args.fail, args.down)
+    espn, alternative = stub_urls(server.base_url)
+    print(f"Serving on {server.base_url}")
+    for url in espn + alternative:
+        print(f"  {url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
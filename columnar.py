@@ -0,0 +1,277 @@
+"""
+IPL COLUMNAR FORMAT
+Single-file binary column store (NumPy buffers + JSON header)
+
+Layout:
+    8 bytes   magic b'IPLCOL1\n'
+    8 bytes   header length (little-endian uint64)
+    header    UTF-8 JSON: metadata, row count, one entry per column and
+              data_sha256, a hash of all of these and the buffers
+    buffers   raw little-endian column data, each 64-byte aligned
+
+Strings are stored as an int64 offsets buffer plus one UTF-8 blob, and
+categoricals as int16 codes plus the category list in the header, so
+every column can be read straight out of a memory map.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from publish import atomic_open
+
+MAGIC = b'IPLCOL1\n'
+ALIGN = 64
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def _encode_column(series):
+    """
+    Turn one DataFrame column into (header entry, list of buffers)
+    """
+    import pandas as pd
+
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype('<i2')
+        return {'kind': 'category', 'dtype': '<i2',
+                'categories': [str(c) for c in dtype.categories]}, [codes]
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return {'kind': 'bool', 'dtype': '|b1'}, [series.to_numpy(dtype=bool)]
+
+    if pd.api.types.is_integer_dtype(dtype):
+        values = series.to_numpy()
+        return {'kind': 'int', 'dtype': values.dtype.newbyteorder('<').str}, [values.astype(values.dtype.newbyteorder('<'))]
+
+    if pd.api.types.is_float_dtype(dtype):
+        return {'kind': 'float', 'dtype': '<f8'}, [series.to_numpy(dtype='<f8')]
+
+    # Everything else is stored as text
+    return _encode_strings('' if pd.isna(v) else str(v) for v in series)
+
+
+def _encode_strings(values):
+    """Offsets + UTF-8 blob buffers of a sequence of strings"""
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype='u1')
+    return {'kind': 'string', 'dtype': '<i8'}, [offsets, blob]
+
+
+def _encode_array(values):
+    """Header entry and buffers of a NumPy array or a list of strings"""
+    if not isinstance(values, np.ndarray):
+        return _encode_strings(values)
+    values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+    kind = {'b': 'bool', 'f': 'float'}.get(values.dtype.kind, 'int')
+    return {'kind': kind, 'dtype': values.dtype.str}, [values]
+
+
+def write_columnar(df, path, metadata=None):
+    """
+    Write a DataFrame (plus metadata) to a columnar file
+
+    The file is written next to the target, fsynced and renamed over it,
+    so readers that have the old file mapped are never affected.
+
+    Args:
+        df (DataFrame): Table to store
+        path (str): Output filename
+        metadata (dict): Metadata block stored in the header
+    """
+    encoded = [(name, _encode_column(df[name])) for name in df.columns]
+    _write_file(encoded, path, metadata, len(df))
+
+
+def write_arrays(arrays, path, metadata=None):
+    """
+    Write named arrays of any length to a columnar file
+
+    Used for derived data (sort orders, postings) that does not share the
+    table's row count. Read them back with ColumnarFile.column().
+
+    Args:
+        arrays (dict): Name -> NumPy array or list of strings
+        path (str): Output filename
+        metadata (dict): Metadata block stored in the header
+    """
+    encoded = [(name, _encode_array(values)) for name, values in arrays.items()]
+    _write_file(encoded, path, metadata, 0)
+
+
+def _write_file(encoded, path, metadata, length):
+    """Lay out (name, (entry, buffers)) pairs and write them atomically"""
+    entries = []
+    buffers = []
+    for name, (entry, column_buffers) in encoded:
+        entry['name'] = str(name)
+        entry['buffers'] = []
+        for buf in column_buffers:
+            entry['buffers'].append({'nbytes': int(buf.nbytes)})
+            buffers.append(np.ascontiguousarray(buf))
+        entries.append(entry)
+
+    # Identifies the data itself: the same content hashes the same however
+    # the file is laid out, and readers can check what they mapped
+    header = {'metadata': metadata or {}, 'length': length, 'columns': entries}
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode('utf-8'))
+    for buf in buffers:
+        digest.update(buf)
+    header['data_sha256'] = digest.hexdigest()
+
+    # Offsets depend on the header size, which depends on the offsets;
+    # reserve room by sizing the header with placeholder offsets first
+    for entry in entries:
+        for buf in entry['buffers']:
+            buf['offset'] = 0
+    base = len(MAGIC) + 8 + len(json.dumps(header).encode('utf-8')) + 20 * len(buffers)
+    base += _pad(base)
+
+    position = base
+    for entry in entries:
+        for buf in entry['buffers']:
+            buf['offset'] = position
+            position += buf['nbytes'] + _pad(buf['nbytes'])
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (base - len(MAGIC) - 8 - len(header_bytes))
+
+    with atomic_open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for buf in buffers:
+            f.write(buf.tobytes())
+            f.write(b'\0' * _pad(buf.nbytes))
+
+
+class StringColumn:
+    """Read-only string column decoded lazily from offsets + UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return [self[i] for i in range(start, stop, step)]
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        return bytes(self.blob[start:stop]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ColumnarFile:
+    """
+    Memory-mapped reader for a columnar file
+
+    Opening only parses the header. Columns are mapped on request with
+    np.frombuffer over one shared mmap, so nothing is copied and only
+    the pages of the columns actually used are read from disk.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Columnar file to open
+
+        Raises:
+            ValueError: If the file is not a columnar file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an IPL columnar file")
+        (header_len,) = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(self._mmap[start:start + header_len]).decode('utf-8'))
+
+        self.size = len(self._mmap)
+        self._data_sha256 = header.get('data_sha256')
+        self.metadata = header['metadata']
+        self.length = header['length']
+        self.entries = {entry['name']: entry for entry in header['columns']}
+        self.names = [entry['name'] for entry in header['columns']]
+
+    def content_hash(self):
+        """SHA-256 of the whole file"""
+        return hashlib.sha256(self._mmap).hexdigest()
+
+    @property
+    def data_sha256(self):
+        """
+        Hash of the mapped data, read from the header (files written
+        before it was stored there fall back to content_hash())
+        """
+        if self._data_sha256 is None:
+            self._data_sha256 = self.content_hash()
+        return self._data_sha256
+
+    def _buffer(self, entry, index, dtype):
+        buf = entry['buffers'][index]
+        count = buf['nbytes'] // np.dtype(dtype).itemsize
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=buf['offset'])
+
+    def kind(self, name):
+        return self.entries[name]['kind']
+
+    def categories(self, name):
+        return self.entries[name].get('categories')
+
+    def column(self, name):
+        """
+        Map one column
+
+        Args:
+            name (str): Column name
+
+        Returns:
+            numpy.ndarray | StringColumn: Zero-copy view of the column
+        """
+        entry = self.entries[name]
+        if entry['kind'] == 'string':
+            return StringColumn(self._buffer(entry, 0, '<i8'), self._buffer(entry, 1, 'u1'))
+        return self._buffer(entry, 0, entry['dtype'])
+
+
+def read_columnar(path, columns=None):
+    """
+    Read selected columns of a columnar file into a DataFrame
+
+    Args:
+        path (str): Columnar file
+        columns (list): Columns to read (default: all)
+
+    Returns:
+        tuple: (DataFrame, metadata dict)
+    """
+    import pandas as pd
+
+    source = ColumnarFile(path)
+    data = {}
+    for name in columns or source.names:
+        values = source.column(name)
+        if source.kind(name) == 'category':
+            values = pd.Categorical.from_codes(np.asarray(values), source.categories(name))
+        elif source.kind(name) == 'string':
+            values = list(values)
+        else:
+            values = np.array(values)
+        data[name] = values
+    return pd.DataFrame(data), source.metadata
@@ -0,0 +1,350 @@
+"""
+IPL BALL-BY-BALL INGESTION
+Derives career batting records from local Cricsheet match files (JSON or
+the older YAML format, in a directory or a zip archive) instead of
+scraped summary tables
+
+Each worker process reads its share of the files once and returns
+per-player partial totals, which are merged into one table with the
+columns clean_data produces.
+
+Usage:
+    python cricsheet.py PATH [--workers N] [--event "Indian Premier League"] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON parsing
+    orjson = None
+
+try:
+    import yaml
+except ImportError:  # optional: JSON match files only
+    yaml = None
+
+MATCH_SUFFIXES = ('.json', '.yaml', '.yml')
+
+# Wicket kinds that end an innings without a dismissal
+NOT_DISMISSED = {'retired hurt', 'retired not out'}
+
+# Match types with at most one innings per side (later innings are super overs)
+LIMITED_OVERS = {'T20', 'IT20', 'ODI', 'ODM'}
+
+# Fields of a player's running totals (a list, so partials pickle cheaply)
+MATCHES, INNINGS, NOT_OUTS, RUNS, BALLS, HIGHEST, HIGHEST_NOT_OUT, FIFTIES, HUNDREDS, \
+    FOURS, SIXES = range(11)
+SUMMED = (MATCHES, INNINGS, NOT_OUTS, RUNS, BALLS, FIFTIES, HUNDREDS, FOURS, SIXES)
+
+# Files per worker task are capped so the pool stays balanced
+MAX_BATCH = 64
+
+
+def match_files(source):
+    """
+    List the match files of a directory, zip archive or single file
+
+    Args:
+        source (str): Path
+
+    Returns:
+        list: Names (paths, or archive members for a zip) in sorted order
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = archive.namelist()
+    elif os.path.isdir(source):
+        names = [os.path.join(root, name) for root, _, files in os.walk(source) for name in files]
+    else:
+        names = [source]
+    return sorted(name for name in names if name.lower().endswith(MATCH_SUFFIXES))
+
+
+def parse_match(data, name):
+    """
+    Args:
+        data (bytes): File contents
+        name (str): File name (its suffix picks the format)
+
+    Returns:
+        dict: The match document
+    """
+    if name.lower().endswith('.json'):
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    if yaml is None:
+        raise RuntimeError("PyYAML is required for YAML match files")
+    return yaml.load(data, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+def _innings(match):
+    """
+    Yield the deliveries of each innings (super overs left out) as
+    (batter, non_striker, batter_runs, faced, boundary, dismissed) tuples
+    """
+    info = match.get('info') or {}
+    limited = info.get('match_type') in LIMITED_OVERS
+    for position, innings in enumerate(match.get('innings') or []):
+        if 'overs' not in innings and 'deliveries' not in innings:
+            # Older format: {'1st innings': {...}}
+            innings = next(iter(innings.values()))
+        if innings.get('super_over') or (limited and position >= 2):
+            continue
+
+        if 'overs' in innings:
+            deliveries = (ball for over in innings['overs'] for ball in over.get('deliveries', ()))
+        else:
+            deliveries = (next(iter(ball.values())) for ball in innings.get('deliveries', ()))
+        yield (_delivery(ball) for ball in deliveries)
+
+
+def _delivery(ball):
+    runs = ball.get('runs') or {}
+    batter_runs = runs.get('batter', runs.get('batsman', 0))
+    wickets = ball.get('wickets') or ball.get('wicket') or ()
+    if isinstance(wickets, dict):
+        wickets = (wickets,)
+    return (ball.get('batter') or ball.get('batsman'), ball.get('non_striker'), batter_runs,
+            'wides' not in (ball.get('extras') or {}),
+            batter_runs in (4, 6) and not runs.get('non_boundary'),
+            [w['player_out'] for w in wickets
+             if w.get('player_out') and w.get('kind') not in NOT_DISMISSED])
+
+
+def _event_name(info):
+    event = info.get('event') or info.get('competition') or ''
+    return event.get('name', '') if isinstance(event, dict) else str(event)
+
+
+def aggregate_match(match, totals=None):
+    """
+    Add one match's batting to running totals
+
+    A player bats an innings once they face a ball, stand at the
+    non-striker's end or are dismissed. Matches count every player in the
+    team lists (older files without lists: everyone who batted).
+
+    Args:
+        match (dict): Cricsheet match document
+        totals (dict): Player -> totals list to add to (default: new dict)
+
+    Returns:
+        dict: totals
+    """
+    totals = {} if totals is None else totals
+    info = match.get('info') or {}
+    played = {name for team in (info.get('players') or {}).values() for name in team}
+
+    for deliveries in _innings(match):
+        # batter -> [runs, balls, fours, sixes, out]
+        scores = {}
+        for batter, non_striker, runs, faced, boundary, dismissed in deliveries:
+            score = scores.setdefault(batter, [0, 0, 0, 0, False])
+            score[0] += runs
+            score[1] += faced
+            if boundary:
+                score[2 if runs == 4 else 3] += 1
+            if non_striker is not None:
+                scores.setdefault(non_striker, [0, 0, 0, 0, False])
+            for name in dismissed:
+                scores.setdefault(name, [0, 0, 0, 0, False])[4] = True
+
+        for name, (runs, balls, fours, sixes, out) in scores.items():
+            record = totals.get(name)
+            if record is None:
+                record = totals[name] = [0] * 11
+            record[INNINGS] += 1
+            record[NOT_OUTS] += not out
+            record[RUNS] += runs
+            record[BALLS] += balls
+            record[FOURS] += fours
+            record[SIXES] += sixes
+            if runs >= 100:
+                record[HUNDREDS] += 1
+            elif runs >= 50:
+                record[FIFTIES] += 1
+            if (runs, not out) > (record[HIGHEST], record[HIGHEST_NOT_OUT]):
+                record[HIGHEST], record[HIGHEST_NOT_OUT] = runs, not out
+            played.add(name)
+
+    for name in played:
+        record = totals.get(name)
+        if record is None:
+            record = totals[name] = [0] * 11
+        record[MATCHES] += 1
+    return totals
+
+
+def merge_totals(into, partial):
+    """
+    Merge partial totals (e.g. from another worker) into `into`
+
+    Returns:
+        dict: into
+    """
+    for name, record in partial.items():
+        current = into.get(name)
+        if current is None:
+            into[name] = record
+            continue
+        for field in SUMMED:
+            current[field] += record[field]
+        if (record[HIGHEST], record[HIGHEST_NOT_OUT]) > (current[HIGHEST], current[HIGHEST_NOT_OUT]):
+            current[HIGHEST], current[HIGHEST_NOT_OUT] = record[HIGHEST], record[HIGHEST_NOT_OUT]
+    return into
+
+
+def aggregate_files(source, names, event=None):
+    """
+    Read and aggregate a batch of match files (one worker task)
+
+    Args:
+        source (str): Directory, zip archive or file the names come from
+        names (list): Match files of the batch
+        event (str): Only count matches whose event name contains this
+
+    Returns:
+        tuple: (totals, matches counted, list of (name, error) for
+        files that could not be read)
+    """
+    totals = {}
+    counted = 0
+    failed = []
+    archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+    try:
+        for name in names:
+            try:
+                if archive is not None:
+                    data = archive.read(name)
+                else:
+                    with open(name, 'rb') as f:
+                        data = f.read()
+                match = parse_match(data, name)
+                if event and event.lower() not in _event_name(match.get('info') or {}).lower():
+                    continue
+                aggregate_match(match, totals)
+                counted += 1
+            except Exception as e:
+                failed.append((name, f"{type(e).__name__}: {e}"))
+    finally:
+        if archive is not None:
+            archive.close()
+    return totals, counted, failed
+
+
+def ingest(source, workers=None, event=None):
+    """
+    Aggregate every match file under source into career totals
+
+    Args:
+        source (str): Directory, zip archive or single match file
+        workers (int): Processes (default: one per CPU; 1 runs inline)
+        event (str): Only count matches whose event name contains this
+
+    Returns:
+        tuple: (totals {player: list}, summary dict with files, matches,
+        failed and elapsed seconds)
+    """
+    started = time.perf_counter()
+    names = match_files(source)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(names)))
+    size = max(1, min(MAX_BATCH, -(-len(names) // (workers * 4))))
+    batches = [names[i:i + size] for i in range(0, len(names), size)]
+
+    totals = {}
+    counted = 0
+    failed = []
+    if workers == 1:
+        results = (aggregate_files(source, batch, event) for batch in batches)
+        for partial, matches, errors in results:
+            merge_totals(totals, partial)
+            counted += matches
+            failed.extend(errors)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(aggregate_files, [source] * len(batches), batches,
+                               [event] * len(batches))
+            for partial, matches, errors in results:
+                merge_totals(totals, partial)
+                counted += matches
+                failed.extend(errors)
+
+    return totals, {'files': len(names), 'matches': counted, 'failed': failed,
+                    'workers': workers, 'elapsed': round(time.perf_counter() - started, 3)}
+
+
+def to_frame(totals):
+    """
+    Career totals as a table with clean_data's columns, highest run
+    scorer first (players who never batted are left out)
+
+    Averages without a dismissal and strike rates without a ball faced
+    are 0, as for the '-' of scraped tables.
+
+    Returns:
+        DataFrame: Player, Runs, Matches, Innings, Average, Strike_Rate,
+        Highest_Score, Centuries, Fifties, Fours, Sixes, Highest_Score_Not_Out
+    """
+    import numpy as np
+    import pandas as pd
+
+    players = [name for name, record in totals.items() if record[INNINGS]]
+    values = np.array([totals[name] for name in players], dtype=np.int64).reshape(-1, 11)
+    runs = values[:, RUNS]
+    outs = values[:, INNINGS] - values[:, NOT_OUTS]
+    balls = values[:, BALLS]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average = np.where(outs > 0, np.round(runs / outs, 2), 0.0)
+        strike_rate = np.where(balls > 0, np.round(runs * 100 / balls, 2), 0.0)
+
+    df = pd.DataFrame({
+        'Player': pd.Series(players, dtype=object),
+        'Runs': runs,
+        'Matches': values[:, MATCHES],
+        'Innings': values[:, INNINGS],
+        'Average': average,
+        'Strike_Rate': strike_rate,
+        'Highest_Score': values[:, HIGHEST],
+        'Centuries': values[:, HUNDREDS],
+        'Fifties': values[:, FIFTIES],
+        'Fours': values[:, FOURS],
+        'Sixes': values[:, SIXES],
+        'Highest_Score_Not_Out': values[:, HIGHEST_NOT_OUT].astype(bool),
+    })
+    return df.sort_values(['Runs', 'Player'], ascending=[False, True], ignore_index=True)
+
+
+def load_matches(source, workers=None, event=None):
+    """
+    Returns:
+        tuple: (DataFrame from to_frame, summary from ingest)
+    """
+    totals, summary = ingest(source, workers, event)
+    return to_frame(totals), summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Career batting records from Cricsheet files")
+    parser.add_argument('source', help="directory, zip archive or match file")
+    parser.add_argument('--workers', type=int, help="processes (default: one per CPU)")
+    parser.add_argument('--event', help="only matches whose event name contains this")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    df, summary = load_matches(args.source, args.workers, args.event)
+    print(f"{summary['matches']:,} matches from {summary['files']:,} files "
+          f"in {summary['elapsed']:.2f}s ({summary['workers']} workers)")
+    for name, error in summary['failed'][:10]:
+        print(f"  skipped {name}: {error}")
+    print(df.head(args.top).to_string())
+    return 0 if summary['matches'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,640 @@
+"""
+IPL DATASET CACHE
+Keeps the parsed player data in memory and reloads it only
+when the scraper rewrites the data file
+"""
+
+import csv
+import os
+import sys
+import json
+import hashlib
+import math
+import threading
+from array import array
+from itertools import accumulate
+
+# columnar, shared_index and query need numpy; they are imported where
+# first used, so serving a JSON or CSV file does not load it at startup
+from publish import FORMATS, INDEX_ENTRY, MANIFEST_FILE, read_manifest
+
+COLUMNAR_FILE = 'ipl_most_runs_career.cols'
+JSON_FILE = 'ipl_most_runs_career.json'
+CSV_FILE = 'ipl_most_runs_career.csv'
+
+# Loads retried when the manifest changes while a version is being loaded
+MAX_RELOADS = 3
+
+
+class PlayerTable:
+    """
+    Array-backed, column-oriented player table
+
+    Integer columns live in array('i') (or 'q' if they do not fit),
+    floats in array('d') with NaN for missing values, booleans in
+    array('b'), repeated strings such as Insight as small integer codes
+    plus a category list, and player names as one list of interned
+    strings. Rows are only turned into dicts when a route asks for them.
+
+    A table can also sit on top of a memory-mapped columnar file, in which
+    case each column is only mapped the first time it is used.
+    """
+
+    def __init__(self, columns, kinds, length, categories=None, names=None, loader=None):
+        """
+        Args:
+            columns (dict): Column name -> storage sequence
+            kinds (dict): Column name -> 'int', 'float', 'bool', 'category' or 'object'
+            length (int): Number of rows
+            categories (dict): Category lists for 'category' columns
+            names (list): Column order (default: order of columns)
+            loader (callable): Returns the storage of a column not in columns
+        """
+        self.columns = columns
+        self.kinds = kinds
+        self.length = length
+        self.categories = categories or {}
+        self.names = list(names if names is not None else columns)
+        self._loader = loader
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self.kinds
+
+    @classmethod
+    def from_columnar(cls, source):
+        """
+        Build a lazily mapped table over a columnar file
+
+        Args:
+            source (ColumnarFile): Open columnar file
+
+        Returns:
+            PlayerTable: Table whose columns are mapped on first use
+        """
+        kinds = {}
+        categories = {}
+        for name in source.names:
+            kind = source.kind(name)
+            kinds[name] = 'object' if kind == 'string' else kind
+            if kind == 'category':
+                categories[name] = source.categories(name)
+        return cls({}, kinds, source.length, categories, names=source.names,
+                   loader=source.column)
+
+    def storage(self, name):
+        """Underlying storage of a column (array, list or mapped view)"""
+        storage = self.columns.get(name)
+        if storage is None:
+            storage = self.columns[name] = self._loader(name)
+        return storage
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a table from a list of player dicts
+
+        Args:
+            records (list): Player records (e.g. the 'players' list of the JSON)
+
+        Returns:
+            PlayerTable: Compact copy of the records
+        """
+        names = []
+        for record in records:
+            for name in record:
+                if name not in names:
+                    names.append(name)
+
+        columns = {}
+        kinds = {}
+        categories = {}
+        for name in names:
+            values = [record.get(name) for record in records]
+            kind, storage, cats = _pack_column(values)
+            columns[name] = storage
+            kinds[name] = kind
+            if cats is not None:
+                categories[name] = cats
+        return cls(columns, kinds, len(records), categories)
+
+    def value(self, name, i):
+        """Value of one cell as a plain Python object"""
+        kind = self.kinds[name]
+        value = self.storage(name)[i]
+        if kind == 'category':
+            return self.categories[name][value] if value >= 0 else None
+        if kind == 'bool':
+            return bool(value)
+        return value.item() if hasattr(value, 'item') else value
+
+    def column(self, name):
+        """
+        Args:
+            name (str): Column name
+
+        Returns:
+            list: Column values as plain Python objects
+        """
+        return self._decode(name, self.storage(name))
+
+    def _decode(self, name, part):
+        """Turn stored values (codes, arrays) into plain Python objects"""
+        kind = self.kinds[name]
+        if hasattr(part, 'tolist'):
+            part = part.tolist()
+        if kind == 'category':
+            cats = self.categories[name]
+            return [cats[code] if code >= 0 else None for code in part]
+        if kind == 'bool':
+            return [bool(v) for v in part]
+        return list(part)
+
+    def row(self, i, fields=None):
+        """
+        Args:
+            i (int): Row number
+            fields (list): Columns to include (default: all)
+
+        Returns:
+            dict: One player record
+        """
+        return {name: self.value(name, i) for name in (fields or self.names)}
+
+    def records(self, start=0, stop=None, fields=None):
+        """
+        Materialize a slice of rows as dicts
+
+        Args:
+            start (int): First row
+            stop (int): Row after the last (default: end of table)
+            fields (list): Columns to include (default: all)
+
+        Returns:
+            list: Player records
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        fields = [name for name in (fields or self.names) if name in self.kinds]
+        if start >= stop:
+            return []
+
+        # Decode column slices once, then zip them into rows
+        decoded = [self._decode(name, self.storage(name)[start:stop]) for name in fields]
+        return [dict(zip(fields, values)) for values in zip(*decoded)]
+
+    def take(self, rows, fields=None):
+        """
+        Materialize arbitrary rows as dicts
+
+        Args:
+            rows (sequence): Row numbers, in output order
+            fields (list): Columns to include (default: all)
+
+        Returns:
+            list: Player records
+        """
+        fields = [name for name in (fields or self.names) if name in self.kinds]
+        rows = [int(i) for i in rows]
+        decoded = []
+        for name in fields:
+            storage = self.storage(name)
+            part = storage[rows] if hasattr(storage, 'take') else [storage[i] for i in rows]
+            decoded.append(self._decode(name, part))
+        return [dict(zip(fields, values)) for values in zip(*decoded)]
+
+
+def _convert_cells(cells):
+    """
+    Type one CSV column: ints, floats or booleans when every non-empty
+    cell parses as one (as pandas would infer), else text; empty cells
+    become None
+    """
+    distinct = set(cells)
+    distinct.discard('')
+    for convert in (int, float):
+        try:
+            lookup = {cell: convert(cell) for cell in distinct}
+        except ValueError:
+            continue
+        return [lookup.get(cell) for cell in cells]
+    if distinct and distinct <= {'True', 'False'}:
+        return [None if cell == '' else cell == 'True' for cell in cells]
+    return [cell if cell != '' else None for cell in cells]
+
+
+def read_csv_records(raw):
+    """
+    Parse a CSV written by save_to_csv with the csv module
+
+    Args:
+        raw (bytes): File contents ('# ...' preamble lines are skipped)
+
+    Returns:
+        list: Player records
+    """
+    lines = [line for line in raw.decode('utf-8').splitlines() if not line.startswith('#')]
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return []
+    rows = list(reader)
+    columns = [_convert_cells([row[i] if i < len(row) else '' for row in rows])
+               for i in range(len(header))]
+    return [dict(zip(header, values)) for values in zip(*columns)]
+
+
+def _pack_column(values):
+    """
+    Pick the narrowest storage for one column
+
+    Returns:
+        tuple: (kind, storage, categories or None)
+    """
+    present = [v for v in values if v is not None]
+
+    if present and all(isinstance(v, bool) for v in present) and len(present) == len(values):
+        return 'bool', array('b', values), None
+
+    if present and len(present) == len(values) and \
+            all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        try:
+            return 'int', array('i', values), None
+        except OverflowError:
+            return 'int', array('q', values), None
+
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return 'float', array('d', [math.nan if v is None else v for v in values]), None
+
+    if present and all(isinstance(v, str) for v in present):
+        distinct = sorted(set(present))
+        if len(distinct) <= 255 and len(distinct) * 2 <= len(values):
+            lookup = {cat: code for code, cat in enumerate(distinct)}
+            codes = array('h', [lookup[v] if v is not None else -1 for v in values])
+            return 'category', codes, distinct
+        return 'object', [sys.intern(v) if v is not None else None for v in values], None
+
+    return 'object', list(values), None
+
+
+class Dataset:
+    """
+    One fully loaded copy of the player data
+
+    Instances are never modified after they are built, so a reader
+    holding a reference always sees a complete dataset.
+    """
+
+    def __init__(self, players, metadata, key=None, version='empty', shared=None, changes=None):
+        """
+        Args:
+            players (list | PlayerTable): Player records (one dict per player)
+            metadata (dict): Metadata block from the data file
+            key (tuple): (path, mtime, size) of the file it was loaded from
+            version (str): SHA-256 of the file contents; a columnar file
+                loaded without a manifest uses the data_sha256 of its header
+            shared (ColumnarFile): Published index of this version (see
+                shared_index.py); aggregates and indexes are mapped from it
+            changes (dict): Change summary against the previous version,
+                from the manifest (see snapshot.changed_columns)
+        """
+        if not isinstance(players, PlayerTable):
+            players = PlayerTable.from_records(players)
+        self.table = players
+        self.metadata = metadata
+        self.key = key
+        self.version = version
+        self.shared = shared
+        self.changes = changes
+        self._index = None
+        self._index_lock = threading.Lock()
+
+        if shared is not None:
+            self.has_runs = shared.metadata['has_runs']
+            self.prefix_runs = shared.column('prefix_runs')
+            self.stats = shared.metadata['stats']
+            return
+
+        # Aggregates are computed once here so routes only do lookups
+        self.has_runs = 'Runs' in self.table
+        raw = self.table.column('Runs') if self.has_runs else [None] * len(self.table)
+        self.prefix_runs = [0] + list(accumulate(_runs_of(r) for r in raw))
+        self.stats = compute_statistics(self.table, raw)
+
+    @property
+    def index(self):
+        """Query indexes of the table (see query.py), created on first use"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    from query import QueryIndex
+                    self._index = QueryIndex(self.table, self.shared)
+        return self._index
+
+    def stats_for_top(self, top_n=None):
+        """
+        Get statistics for the first top_n players in O(1)
+
+        Args:
+            top_n (int): Number of players (None or <= 0 means all)
+
+        Returns:
+            dict: total_players, total_runs, top_scorer and top_runs
+        """
+        count = len(self.table)
+        if top_n and top_n > 0:
+            count = min(top_n, count)
+
+        total_runs = self.prefix_runs[count]
+        return {
+            'total_players': count,
+            'total_runs': total_runs.item() if hasattr(total_runs, 'item') else total_runs,
+            'top_scorer': self.stats['top_scorer'],
+            'top_runs': self.stats['top_runs']
+        }
+
+
+def _is_missing(runs):
+    """True for a missing, blank or NaN Runs value"""
+    return runs is None or runs == '' or (isinstance(runs, float) and math.isnan(runs))
+
+
+def _runs_of(runs):
+    """Runs for one player, treating missing/blank/NaN as 0"""
+    return 0 if _is_missing(runs) else runs
+
+
+def compute_statistics(players, runs=None):
+    """
+    Calculate the same summary as IPLScraper.get_statistics from records
+
+    Args:
+        players (list | PlayerTable): Player records, highest run scorer first
+        runs (list): Runs per player as stored, None or NaN where missing
+            (read from players if omitted)
+
+    Returns:
+        dict: Dictionary of statistics
+    """
+    if isinstance(players, PlayerTable):
+        top_scorer = players.value('Player', 0) if len(players) and 'Player' in players else 'N/A'
+    else:
+        top_scorer = players[0].get('Player', 'N/A') if players else 'N/A'
+
+    if runs is None:
+        runs = [p.get('Runs') for p in players]
+
+    if not len(players):
+        return {
+            'total_players': 0,
+            'total_runs': 0,
+            'avg_runs': 0,
+            'median_runs': 0,
+            'top_scorer': 'N/A',
+            'top_runs': 0
+        }
+
+    # Like pandas' mean and median, missing runs count for neither sum nor size
+    ordered = sorted(r for r in runs if not _is_missing(r))
+    middle = len(ordered) // 2
+    if not ordered:
+        median = 0
+    elif len(ordered) % 2:
+        median = float(ordered[middle])
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+
+    total = sum(ordered)
+    return {
+        'total_players': len(players),
+        'total_runs': int(total),
+        'avg_runs': float(total) / len(ordered) if ordered else 0,
+        'median_runs': float(median),
+        'top_scorer': top_scorer,
+        'top_runs': int(_runs_of(runs[0]))
+    }
+
+
+class DatasetCache:
+    """
+    Shared in-process cache of the player dataset
+
+    Every lookup does a cheap os.stat() of the data file and compares
+    (path, mtime, size) with the cached copy. The file is only parsed
+    again when that key changes, and the new copy is swapped in with a
+    single assignment once it is completely loaded.
+
+    When the scraper has published a manifest (see publish.py), the
+    manifest is what gets stat'ed: a new version becomes visible when
+    the manifest is replaced, after every data file it names is in place.
+
+    A key whose file could not be loaded (corrupt, truncated) is
+    remembered, and lookups keep serving the previous copy without
+    parsing it again until the key changes.
+    """
+
+    def __init__(self, sources=(COLUMNAR_FILE, JSON_FILE, CSV_FILE), manifest=MANIFEST_FILE):
+        """
+        Args:
+            sources (tuple): Data files in order of preference
+            manifest (str): Version manifest, used first when it exists
+        """
+        self.sources = sources
+        self.manifest = manifest
+        self._current = None
+        self._failed_key = None
+        self._empty = Dataset([], {})
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.failures = 0
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """
+        Call callback(dataset, previous) each time a new dataset is swapped in
+
+        Args:
+            callback (callable): Receives the new Dataset and the one it
+                replaced (None on the first load)
+        """
+        self._listeners.append(callback)
+
+    def _file_key(self):
+        """Return (path, mtime, size) of the manifest or first data file that exists"""
+        for path in ((self.manifest,) if self.manifest else ()) + tuple(self.sources):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return (path, st.st_mtime_ns, st.st_size)
+        return None
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self):
+        """
+        Get the current dataset, reloading it if the file changed
+
+        Returns:
+            Dataset: The cached (or freshly loaded) dataset
+        """
+        key = self._file_key()
+        current = self._current
+        if current is not None and current.key == key:
+            self._count('hits')
+            return current
+        if key is not None and key == self._failed_key:
+            # Already failed to load; wait for the file to change
+            return current if current is not None else self._empty
+
+        with self._load_lock:
+            # Another thread may have reloaded (or failed to) while we waited
+            current = self._current
+            if current is not None and current.key == key:
+                self._count('hits')
+                return current
+            if key is not None and key == self._failed_key:
+                return current if current is not None else self._empty
+
+            dataset = self._load(key)
+            for _ in range(MAX_RELOADS):
+                # A newer version may have been published (and the files
+                # this key named deleted) while loading: load that one
+                newer = self._file_key() if dataset is None else key
+                if newer == key:
+                    break
+                key = newer
+                dataset = self._load(key)
+            if dataset is None:
+                # Keep serving the previous copy (e.g. file is mid-write)
+                self._failed_key = key
+                self._count('failures')
+                return current if current is not None else self._empty
+
+            self._count('misses' if current is None else 'reloads')
+            self._failed_key = None
+            self._current = dataset
+            for callback in self._listeners:
+                callback(dataset, current)
+            return dataset
+
+    def _load(self, key):
+        """
+        Parse the data file identified by key
+
+        Returns:
+            Dataset: Loaded dataset, or None if the file could not be read
+        """
+        if key is None:
+            return Dataset([], {}, key)
+        if key[0] == self.manifest:
+            return self._load_published(key)
+        return self._load_file(key[0], key)
+
+    def _load_published(self, key):
+        """
+        Load the preferred data file named in the manifest
+
+        A file is only accepted if it is the one the manifest describes:
+        the columnar file's header hash (nothing else of it is read), or
+        the hash of the JSON/CSV bytes. If a file no longer matches its
+        manifest entry (a newer version was written in between), the
+        next format is tried, and if none matches None is returned and
+        the cache waits for the newer manifest.
+        """
+        manifest = read_manifest(self.manifest)
+        if manifest is None:
+            return None
+        files = manifest.get('files', {})
+        for name in FORMATS:
+            entry = files.get(name)
+            if entry:
+                dataset = self._load_file(entry['path'], key, entry, files.get(INDEX_ENTRY),
+                                          manifest.get('changes'))
+                if dataset is not None:
+                    return dataset
+        return None
+
+    def _load_file(self, path, key, entry=None, index_entry=None, changes=None):
+        """
+        Parse one data file
+
+        Args:
+            path (str): Columnar, JSON or CSV file
+            key (tuple): Cache key stored on the dataset
+            entry (dict): Manifest entry (sha256, size) of the file, if any
+            index_entry (dict): Manifest entry of the shared index, if any
+            changes (dict): Manifest change summary of this version, if any
+        """
+        try:
+            # Columnar file: only the header is read, columns are mapped lazily
+            if path.endswith('.cols'):
+                from columnar import ColumnarFile
+                from shared_index import open_index
+
+                source = ColumnarFile(path)
+                if entry is not None:
+                    if source.data_sha256 != entry.get('data_sha256'):
+                        return None
+                    version = entry['sha256']
+                else:
+                    version = source.data_sha256
+                # The index has to match the data actually mapped
+                return Dataset(PlayerTable.from_columnar(source), source.metadata, key, version,
+                               open_index(index_entry, source.data_sha256), changes)
+
+            with open(path, 'rb') as f:
+                raw = f.read()
+            version = hashlib.sha256(raw).hexdigest()
+            if entry is not None and version != entry['sha256']:
+                return None
+
+            # JSON has the metadata block built in
+            if path.endswith('.json'):
+                data = json.loads(raw.decode('utf-8'))
+                return Dataset(data.get('players', []), data.get('metadata', {}), key, version,
+                               changes=changes)
+
+            # Parsed with the csv module, so serving never imports pandas
+            players = read_csv_records(raw)
+            metadata = {
+                'last_updated': 'Today',
+                'season': 'IPL Career Runs',
+                'total_players': len(players)
+            }
+            return Dataset(players, metadata, key, version, changes=changes)
+
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return None
+
+    def clear(self):
+        """Drop the cached dataset so the next lookup reloads it"""
+        with self._load_lock:
+            self._current = None
+            self._failed_key = None
+
+    def stats(self):
+        """
+        Get cache counters
+
+        Returns:
+            dict: Hits, misses, reloads, failed loads and the key of the
+            cached file
+        """
+        current = self._current
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'source': current.key[0] if current is not None and current.key else None,
+            'version': current.version if current is not None else None,
+            'shared_index': current is not None and current.shared is not None
+        }
@@ -0,0 +1,240 @@
+"""
+IPL SCRAPER HTTP CLIENT
+Shared pooled session used by the scraper and the API fallback
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import HostRateLimiter, retry_after_seconds
+
+# Status codes worth retrying (rate limited / temporary server errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchCancelled(Exception):
+    """Raised when a download is abandoned because another source won"""
+
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a URL is not in the page cache"""
+
+
+class HttpClient:
+    """
+    Keep-alive HTTP client with retries and conditional GET
+
+    One requests.Session is shared by every caller so connections are
+    reused instead of paying a new TCP+TLS handshake per attempt. ETag
+    and Last-Modified validators are remembered per URL, so an unchanged
+    page comes back as a cheap 304 and is served from the stored body.
+
+    With a PageCache attached, validators and bodies are kept on disk
+    instead: pages within the cache TTL are served without touching the
+    network, and offline mode serves from the cache only.
+
+    With a HostRateLimiter attached, every network attempt first waits
+    for its host's token bucket and reports the outcome back, so the
+    per-host rate adapts and Retry-After pauses apply to all callers.
+    """
+
+    def __init__(self, headers=None, pool_connections=10, pool_maxsize=10,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 cache=None, offline=False, rate_limiter=None):
+        """
+        Args:
+            headers (dict): Default headers sent with every request
+            pool_connections (int): Number of hosts to keep pools for
+            pool_maxsize (int): Connections kept alive per host
+            max_retries (int): Extra attempts after a transient failure
+            backoff_base (float): First backoff window in seconds
+            backoff_max (float): Upper bound of the backoff window
+            cache (PageCache): Persistent page cache (optional)
+            offline (bool): Never hit the network, serve from cache only
+            rate_limiter (HostRateLimiter): Per-host politeness limits (optional)
+        """
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.offline = offline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        # Retries are handled here so they can use jittered backoff
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def backoff_delay(self, attempt):
+        """
+        Exponential backoff with full jitter
+
+        Args:
+            attempt (int): 0 for the first retry, 1 for the second...
+
+        Returns:
+            float: Seconds to wait
+        """
+        window = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, window)
+
+    def get(self, url, headers=None, timeout=15, cancel=None, conditional=True):
+        """
+        GET a URL with retries and conditional revalidation
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra headers for this request
+            timeout (int): Timeout per attempt in seconds
+            cancel (threading.Event): Abort the download when set
+            conditional (bool): Send stored ETag/Last-Modified validators
+
+        Returns:
+            requests.Response: The response. A 304 or a cache hit is turned
+            into a 200 carrying the stored body, with response.not_modified
+            (or response.from_cache) set to True.
+
+        Raises:
+            FetchCancelled: If cancel was set during the download
+            OfflineCacheMiss: If offline and the URL is not cached
+            requests.exceptions.RequestException: If every attempt failed
+        """
+        request_headers = dict(headers or {})
+        stored = self._lookup(url) if conditional or self.offline else None
+
+        # Serve straight from disk while within TTL (or always when offline)
+        if stored and self.cache and (self.offline or self.cache.is_fresh(stored)):
+            cached = self._from_stored(url, stored)
+            cached.from_cache = True
+            return cached
+        if self.offline:
+            raise OfflineCacheMiss(f"Not in page cache: {url}")
+
+        if stored:
+            if stored.get('etag'):
+                request_headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                request_headers['If-Modified-Since'] = stored['last_modified']
+
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            retry_after = None
+            if limiter is not None:
+                limiter.acquire(url, cancel)
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled(url)
+            try:
+                response = self._download(url, request_headers, timeout, cancel)
+                retryable = response.status_code in RETRY_STATUSES
+                retry_after = response.headers.get('Retry-After') if retryable else None
+                if limiter is not None:
+                    limiter.feedback(url, not retryable, response.status_code, retry_after)
+                if not retryable or attempt >= self.max_retries:
+                    break
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if limiter is not None:
+                    limiter.feedback(url, False)
+                if attempt >= self.max_retries:
+                    raise
+
+            if limiter is None:
+                # Honour Retry-After ourselves; with a limiter the host's
+                # bucket is paused and acquire() does the waiting
+                delay = retry_after_seconds(retry_after)
+                time.sleep(delay if delay is not None else self.backoff_delay(attempt))
+            elif not limiter.paused(url):
+                time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+        if response.status_code == 304 and stored:
+            if self.cache:
+                self.cache.refresh(url)
+            return self._from_stored(response.url, stored)
+
+        response.not_modified = False
+        response.from_cache = False
+        if response.status_code == 200:
+            self._remember(url, response)
+        return response
+
+    def _download(self, url, headers, timeout, cancel):
+        """Fetch the body in chunks so a cancelled download stops early"""
+        response = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        with response:
+            chunks = []
+            for chunk in response.iter_content(chunk_size=65536):
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled(url)
+                chunks.append(chunk)
+            response._content = b''.join(chunks)
+        return response
+
+    def _lookup(self, url):
+        """Find stored validators/body in the page cache or in memory"""
+        if self.cache:
+            return self.cache.get(url)
+        with self._lock:
+            return self._validators.get(url)
+
+    def _remember(self, url, response):
+        """Store validators and body of a 200 response"""
+        if self.cache:
+            self.cache.put(url, response.content, response.encoding, dict(response.headers))
+            return
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        with self._lock:
+            self._validators[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'content': response.content,
+                'encoding': response.encoding,
+                'headers': dict(response.headers)
+            }
+
+    def _from_stored(self, url, stored):
+        """Build a 200 response from a stored body"""
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.url = url
+        cached.headers.update(stored['headers'])
+        cached.encoding = stored['encoding']
+        cached._content = stored['content']
+        cached.not_modified = True
+        cached.from_cache = False
+        return cached
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get the process-wide shared client
+
+    Returns:
+        HttpClient: Shared instance (created on first use)
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(rate_limiter=HostRateLimiter())
+        return _default_client
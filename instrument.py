@@ -0,0 +1,314 @@
+"""
+IPL INSTRUMENTATION
+Timed spans, latency histograms and opt-in profiling for the scraper and app
+"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger('ipl')
+
+# Histogram bucket upper bounds in seconds (+Inf is implied)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Where profile reports are written
+PROFILE_DIR = os.environ.get('IPL_PROFILE_DIR', 'profiles')
+PROFILE_MODES = ('cpu', 'memory')
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative.append([bound, seen])
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'max': round(self.max, 6),
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': cumulative
+        }
+
+
+class Metrics:
+    """
+    Registry of span latency histograms, keyed by span name and labels
+
+    Labels should have few distinct values (a host, a route, a status),
+    never a full URL.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Returns:
+            list: One dict per (span, labels) with its histogram
+        """
+        with self._lock:
+            return [dict(name=name, labels=dict(labels), **histogram.to_dict())
+                    for (name, labels), histogram in sorted(self._histograms.items())]
+
+    def prometheus(self):
+        """
+        Returns:
+            str: Histograms in the Prometheus text exposition format
+        """
+        lines = ['# HELP ipl_span_seconds Duration of instrumented spans',
+                 '# TYPE ipl_span_seconds histogram']
+        for entry in self.snapshot():
+            labels = [('span', entry['name'])] + sorted(entry['labels'].items())
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+            for bound, count in entry['buckets']:
+                lines.append(f'ipl_span_seconds_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'ipl_span_seconds_bucket{{{base},le="+Inf"}} {entry["count"]}')
+            lines.append(f'ipl_span_seconds_sum{{{base}}} {entry["sum"]}')
+            lines.append(f'ipl_span_seconds_count{{{base}}} {entry["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per log line; span fields become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'span', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(fmt=None):
+    """
+    Give the 'ipl' logger a handler: JSON lines with IPL_LOG_FORMAT=json
+
+    With the default text format and logging already configured (e.g.
+    the scraper's basicConfig) the logger just propagates to the root
+    handlers.
+    """
+    fmt = fmt or os.environ.get('IPL_LOG_FORMAT', 'text')
+    if logger.handlers or (fmt != 'json' and logging.getLogger().handlers):
+        return
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
+                                               datefmt='%H:%M:%S'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def record(name, seconds, labels=None, **fields):
+    """
+    Add one timing to the histograms and log it as a structured line
+
+    Args:
+        name (str): Span name (histogram name)
+        seconds (float): Duration
+        labels (dict): Low-cardinality labels for the histogram
+        **fields: Extra fields for the log line only
+    """
+    labels = labels or {}
+    metrics.observe(name, seconds, **labels)
+    fields = {'span': name, 'ms': round(seconds * 1000, 2), **labels, **fields}
+    logger.info(' '.join(f'{k}={v}' for k, v in fields.items()), extra={'span': fields})
+
+
+@contextmanager
+def span(name, labels=None, **fields):
+    """
+    Time a block, record it in the histograms and log one structured line
+
+    Args:
+        name (str): Span name (histogram name)
+        labels (dict): Low-cardinality labels for the histogram
+        **fields: Extra fields for the log line only
+
+    Yields:
+        dict: Fields the block may add to (e.g. rows, status)
+    """
+    labels = dict(labels or {})
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield fields
+    except BaseException as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        labels.setdefault('outcome', fields.pop('outcome', outcome))
+        record(name, time.perf_counter() - started, labels, **fields)
+
+
+def timed(name, **labels):
+    """Decorator form of span()"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Profiler:
+    """
+    Opt-in CPU (cProfile) or memory (tracemalloc) profile of one unit of work
+
+    Both profilers are process-wide, so only one profile runs at a time;
+    start() returns False when another one is already running.
+    Reports go to PROFILE_DIR: a .prof file (open with pstats or
+    snakeviz) for cpu, a text summary of the top allocations for memory.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, mode, label, directory=None, top=25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile mode must be one of {PROFILE_MODES}")
+        self.mode = mode
+        self.label = ''.join(c if c.isalnum() or c in '-_' else '_' for c in label)
+        self.directory = directory or PROFILE_DIR
+        self.top = top
+        self.path = None
+        self._profile = None
+        self._started = False
+
+    def start(self):
+        if not Profiler._active.acquire(blocking=False):
+            logger.warning(f"profile skipped, another one is running: {self.label}")
+            return False
+        self._started = True
+        if self.mode == 'cpu':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            tracemalloc.start()
+        return True
+
+    def stop(self):
+        """
+        Returns:
+            str: Path of the report, or None if the profile never started
+        """
+        if not self._started:
+            return None
+        self._started = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            if self.mode == 'cpu':
+                self._profile.disable()
+                self.path = os.path.join(self.directory, f"{self.label}-{stamp}.prof")
+                self._profile.dump_stats(self.path)
+                summary = io.StringIO()
+                pstats.Stats(self._profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+                logger.debug(summary.getvalue())
+            else:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.path = os.path.join(self.directory, f"{self.label}-{stamp}.txt")
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.write(f"current: {current / 1024:,.1f} KiB, peak: {peak / 1024:,.1f} KiB\n\n")
+                    for stat in snapshot.statistics('lineno')[:self.top]:
+                        f.write(f"{stat}\n")
+            logger.info(f"profile={self.mode} label={self.label} report={self.path}",
+                        extra={'span': {'profile': self.mode, 'report': self.path}})
+            return self.path
+        finally:
+            Profiler._active.release()
+
+
+@contextmanager
+def profiled(mode, label, directory=None):
+    """
+    Profile a block when mode is 'cpu' or 'memory'; do nothing when None
+
+    Yields:
+        Profiler: The profiler (its path is set after the block), or None
+    """
+    if not mode:
+        yield None
+        return
+    profiler = Profiler(mode, label, directory)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
@@ -0,0 +1,165 @@
+"""
+IPL SCRAPER PAGE CACHE
+Persistent on-disk cache of downloaded pages, keyed by URL
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class PageCache:
+    """
+    On-disk HTTP response cache with TTL and size-bounded LRU eviction
+
+    Each URL is stored as two files named after the SHA-256 of the URL:
+    a gzip-compressed body (<key>.gz) and a small JSON sidecar with the
+    validators (<key>.json). The body file's mtime doubles as the last
+    access time, so eviction removes the least recently used pages
+    until the total compressed size fits in max_bytes.
+    """
+
+    def __init__(self, directory='.page_cache', ttl=3600, max_bytes=50 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Where cached pages are stored
+            ttl (int): Seconds a page is served without revalidating
+            max_bytes (int): Upper bound on total compressed body size
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.gz', base + '.json'
+
+    def get(self, url):
+        """
+        Look up a cached page
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            dict: Entry with content, encoding, headers, etag,
+            last_modified and fetched_at, or None if not cached
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['content'] = gzip.decompress(f.read())
+        except (OSError, ValueError):
+            return None
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry):
+        """
+        Check whether an entry is still within its TTL
+
+        Args:
+            entry (dict): Entry returned by get()
+
+        Returns:
+            bool: True if it can be served without revalidating
+        """
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def put(self, url, content, encoding=None, headers=None):
+        """
+        Store a page
+
+        Args:
+            url (str): Page URL
+            content (bytes): Raw response body
+            encoding (str): Text encoding of the body
+            headers (dict): Response headers (only validators are kept)
+        """
+        headers = headers or {}
+        body_path, meta_path = self._paths(url)
+        entry = {
+            'url': url,
+            'encoding': encoding,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'headers': {k: v for k, v in headers.items()
+                        if k in ('Content-Type', 'ETag', 'Last-Modified')},
+            'fetched_at': time.time()
+        }
+
+        with self._lock:
+            self._write(body_path, gzip.compress(content))
+            self._write(meta_path, json.dumps(entry).encode('utf-8'))
+            self.evict()
+
+    def refresh(self, url):
+        """Reset the TTL of an entry after a 304 revalidation"""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        entry['fetched_at'] = time.time()
+        with self._lock:
+            self._write(meta_path, json.dumps(entry).encode('utf-8'))
+
+    def _write(self, path, data):
+        """Write via a temp file so readers never see a partial entry"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Remove least recently used pages until under max_bytes"""
+        bodies = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.gz'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            bodies.append((st.st_mtime, st.st_size, name[:-3]))
+            total += st.st_size
+
+        bodies.sort()
+        for _, size, key in bodies:
+            if total <= self.max_bytes:
+                break
+            for ext in ('.gz', '.json'):
+                try:
+                    os.remove(os.path.join(self.directory, key + ext))
+                except OSError:
+                    pass
+            total -= size
+
+    def size(self):
+        """
+        Returns:
+            tuple: (number of cached pages, total compressed bytes)
+        """
+        count = 0
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.endswith('.gz'):
+                count += 1
+                total += os.path.getsize(os.path.join(self.directory, name))
+        return count, total
@@ -0,0 +1,383 @@
+"""
+IPL MULTI-STAT PIPELINE
+Scrapes several stat tables (batting, bowling, strike rates) for the
+career and every season in parallel and merges them into one
+per-player, per-season dataset
+
+Usage:
+    python pipeline.py [--stats batting bowling] [--from 2008] [--to 2025]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from columnar import write_columnar
+from http_client import get_client
+from instrument import span
+from publish import atomic_open, write_manifest
+from schema import SCHEMAS
+from table_extract import extract_table
+
+FIRST_SEASON = 2008
+
+# Season value of career (all seasons) rows
+CAREER = 0
+
+OUTPUT_BASENAME = 'ipl_player_seasons'
+
+# Stat type -> schema, header keywords and URL templates. Season pages
+# use {season}; career pages are used for CAREER. Later URLs are tried
+# only when earlier ones fail.
+STAT_TYPES = {
+    'batting': {
+        'schema': 'batting',
+        'keywords': ('player', 'runs'),
+        'career': [
+            "https://stats.espncricinfo.com/ci/engine/records/batting/most_runs_career.html?id=117;type=trophy",
+            "https://www.cricbuzz.com/cricket-stats/ipl/most-runs",
+        ],
+        'season': [
+            "https://stats.espncricinfo.com/ci/engine/records/batting/most_runs_career.html?id=117;season={season};type=trophy",
+        ],
+    },
+    'strike_rate': {
+        'schema': 'batting',
+        'keywords': ('player', 'sr', 'strike'),
+        'career': [
+            "https://stats.espncricinfo.com/ci/engine/records/batting/highest_career_strike_rate.html?id=117;type=trophy",
+        ],
+        'season': [
+            "https://stats.espncricinfo.com/ci/engine/records/batting/highest_career_strike_rate.html?id=117;season={season};type=trophy",
+        ],
+    },
+    'bowling': {
+        'schema': 'bowling',
+        'keywords': ('player', 'wkts', 'wickets'),
+        'career': [
+            "https://stats.espncricinfo.com/ci/engine/records/bowling/most_wickets_career.html?id=117;type=trophy",
+            "https://www.cricbuzz.com/cricket-stats/ipl/most-wickets",
+        ],
+        'season': [
+            "https://stats.espncricinfo.com/ci/engine/records/bowling/most_wickets_career.html?id=117;season={season};type=trophy",
+        ],
+    },
+}
+
+
+class StatJob:
+    """One table to scrape: a stat type for one season (or the career)"""
+
+    def __init__(self, stat, season, urls, schema, keywords):
+        """
+        Args:
+            stat (str): Key of STAT_TYPES
+            season (int): Season year, or CAREER
+            urls (list): Candidate URLs, best first
+            schema (str): Name of the ColumnSchema for the table
+            keywords (tuple): Header keywords identifying the table
+        """
+        self.stat = stat
+        self.season = season
+        self.urls = urls
+        self.schema = schema
+        self.keywords = keywords
+
+    def __repr__(self):
+        return f"StatJob({self.stat!r}, {self.season!r})"
+
+
+def build_jobs(stats=tuple(STAT_TYPES), seasons=None, career=True, stat_types=None):
+    """
+    Expand stat types and seasons into jobs
+
+    Args:
+        stats (iterable): Stat types to scrape
+        seasons (iterable): Season years (default: FIRST_SEASON to this year)
+        career (bool): Also scrape the career tables
+        stat_types (dict): URL/schema registry (default: STAT_TYPES)
+
+    Returns:
+        list: StatJob objects
+    """
+    stat_types = stat_types or STAT_TYPES
+    if seasons is None:
+        seasons = range(FIRST_SEASON, datetime.now().year + 1)
+
+    jobs = []
+    for stat in stats:
+        spec = stat_types[stat]
+        if career and spec.get('career'):
+            jobs.append(StatJob(stat, CAREER, list(spec['career']), spec['schema'], spec['keywords']))
+        for season in seasons:
+            urls = [template.format(season=season) for template in spec.get('season', ())]
+            if urls:
+                jobs.append(StatJob(stat, season, urls, spec['schema'], spec['keywords']))
+    return jobs
+
+
+class HostLimiter:
+    """Caps the number of requests in flight to each host"""
+
+    def __init__(self, per_host=2):
+        self.per_host = per_host
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url):
+        """Semaphore to hold while requesting url"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._slots.get(host)
+            if semaphore is None:
+                semaphore = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+        return semaphore
+
+
+def clean_table(df, schema):
+    """
+    Rename a scraped table to the schema and convert its numeric columns
+
+    Args:
+        df (DataFrame): Raw table from extract_table
+        schema (ColumnSchema): Schema of the table
+
+    Returns:
+        DataFrame: Canonical columns only, one row per named player
+    """
+    mapping, _ = schema.resolve(df.columns)
+    df = df.rename(columns=mapping)
+    df = df.loc[:, ~df.columns.duplicated()]
+    df = df[[name for name in schema.canonical_names if name in df.columns]].copy()
+    if 'Player' not in df.columns:
+        return df.iloc[0:0]
+
+    for name in df.columns:
+        if name in schema.text:
+            continue
+        column = df[name]
+        if not pd.api.types.is_numeric_dtype(column):
+            # '113*' (not out), '1,234', '-' placeholders
+            column = column.astype(str).str.replace(r'[,*+]', '', regex=True).str.strip()
+        df[name] = pd.to_numeric(column, errors='coerce')
+
+    # 'V Kohli (RCB)' -> 'V Kohli'
+    df['Player'] = df['Player'].astype(str).str.replace(r'\s*\(.*\)\s*$', '', regex=True).str.strip()
+    return df[df['Player'] != ''].reset_index(drop=True)
+
+
+def parse_page(html, schema_name, keywords):
+    """
+    Extract and clean the stats table of one page
+
+    Runs in a worker process, so it only takes and returns picklable
+    values and looks the schema up by name.
+
+    Returns:
+        DataFrame: Cleaned table, or None if the page has no matching table
+    """
+    table = extract_table(html, keywords=keywords, min_columns=4)
+    if table is None:
+        return None
+    return clean_table(table, SCHEMAS[schema_name])
+
+
+def merge_results(frames):
+    """
+    Merge per-job tables into one row per (Player, Season)
+
+    Tables of the same stat type are stacked; different stat types are
+    outer-joined, and columns they share (e.g. Matches, or batting
+    columns from both the runs and strike rate tables) take the first
+    non-missing value.
+
+    Args:
+        frames (list): (StatJob, DataFrame) pairs
+
+    Returns:
+        DataFrame: Merged dataset sorted by Season then Player
+    """
+    by_stat = {}
+    for job, df in frames:
+        by_stat.setdefault(job.stat, []).append(df.assign(Season=job.season))
+
+    merged = None
+    for parts in by_stat.values():
+        stat_df = pd.concat(parts, ignore_index=True).drop_duplicates(['Player', 'Season'])
+        if merged is None:
+            merged = stat_df
+            continue
+        shared = [c for c in stat_df.columns if c in merged.columns and c not in ('Player', 'Season')]
+        merged = merged.merge(stat_df, on=['Player', 'Season'], how='outer', suffixes=('', '_dup'))
+        for name in shared:
+            merged[name] = merged[name].combine_first(merged.pop(f'{name}_dup'))
+
+    if merged is None:
+        return pd.DataFrame(columns=['Player', 'Season'])
+    merged['Season'] = merged['Season'].astype('int16')
+    return merged.sort_values(['Season', 'Player'], kind='stable').reset_index(drop=True)
+
+
+class StatsPipeline:
+    """
+    Fetches many stat pages concurrently and parses them on a process pool
+
+    Downloads run on a bounded thread pool, with at most per_host
+    requests in flight to any one site. Each page is handed to a process
+    pool as soon as it arrives, since table extraction is CPU-bound and
+    would otherwise serialize on the GIL.
+    """
+
+    def __init__(self, client=None, max_workers=8, per_host=2, parse_workers=None,
+                 headers=None):
+        """
+        Args:
+            client (HttpClient): HTTP client (default: shared client)
+            max_workers (int): Download threads
+            per_host (int): Concurrent requests allowed per host
+            parse_workers (int): Parser processes (None: CPU count, 0: parse
+                in the download threads)
+            headers (dict): Extra request headers
+        """
+        self.client = client or get_client()
+        self.max_workers = max_workers
+        self.limiter = HostLimiter(per_host)
+        self.parse_workers = parse_workers
+        self.headers = headers or {}
+        self.timings = []
+        self._timings_lock = threading.Lock()
+
+    def _record(self, job, url, status, started, rows=0):
+        with self._timings_lock:
+            self.timings.append({
+                'stat': job.stat,
+                'season': job.season,
+                'url': url,
+                'status': status,
+                'elapsed': round(time.perf_counter() - started, 3),
+                'rows': rows
+            })
+
+    def _run_job(self, job, parser):
+        """Try each URL of a job until one yields a table"""
+        for url in job.urls:
+            started = time.perf_counter()
+            try:
+                with self.limiter.slot(url), \
+                        span('fetch', {'host': urlsplit(url).hostname}, url=url) as s:
+                    response = self.client.get(url, headers=self.headers, timeout=15)
+                    s['status'] = response.status_code
+                if response.status_code != 200:
+                    self._record(job, url, f"HTTP {response.status_code}", started)
+                    continue
+
+                if parser is None:
+                    table = parse_page(response.text, job.schema, job.keywords)
+                else:
+                    table = parser.submit(parse_page, response.text, job.schema,
+                                          job.keywords).result()
+            except Exception as e:
+                self._record(job, url, f"error: {type(e).__name__}", started)
+                continue
+
+            if table is None or table.empty:
+                self._record(job, url, 'no table', started)
+                continue
+            self._record(job, url, 'ok', started, len(table))
+            return table
+        return None
+
+    def run(self, jobs):
+        """
+        Run every job and merge the results
+
+        Args:
+            jobs (list): StatJob objects
+
+        Returns:
+            DataFrame: Merged per-player, per-season dataset
+        """
+        self.timings = []
+        parser = None
+        if self.parse_workers != 0:
+            parser = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                tables = list(executor.map(lambda job: self._run_job(job, parser), jobs))
+        finally:
+            if parser is not None:
+                parser.shutdown()
+
+        frames = [(job, table) for job, table in zip(jobs, tables) if table is not None]
+        return merge_results(frames)
+
+
+def save_seasons(df, basename=OUTPUT_BASENAME):
+    """
+    Save the merged dataset as CSV and columnar files and publish them
+
+    Args:
+        df (DataFrame): Output of StatsPipeline.run
+        basename (str): Output path without extension
+
+    Returns:
+        int: Published version number
+    """
+    metadata = {
+        'description': 'IPL per-player, per-season statistics',
+        'last_updated': datetime.now().strftime("%d %b %Y"),
+        'total_rows': len(df),
+        'seasons': sorted(int(s) for s in df['Season'].unique()) if len(df) else []
+    }
+    with atomic_open(f'{basename}.csv', 'w', encoding='utf-8') as f:
+        df.to_csv(f, index=False)
+    write_columnar(df, f'{basename}.cols', metadata)
+    manifest = write_manifest({'columnar': f'{basename}.cols', 'csv': f'{basename}.csv'},
+                              f'{basename}.manifest.json')
+    return manifest['version']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape IPL stat tables for every season")
+    parser.add_argument('--stats', nargs='+', default=list(STAT_TYPES), choices=list(STAT_TYPES))
+    parser.add_argument('--from', dest='first', type=int, default=FIRST_SEASON)
+    parser.add_argument('--to', dest='last', type=int, default=datetime.now().year)
+    parser.add_argument('--no-career', action='store_true', help="skip the career tables")
+    parser.add_argument('--workers', type=int, default=8, help="download threads")
+    parser.add_argument('--per-host', type=int, default=2, help="requests in flight per site")
+    parser.add_argument('--parse-workers', type=int, default=None, help="parser processes")
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(args.stats, range(args.first, args.last + 1), career=not args.no_career)
+    print(f"Scraping {len(jobs)} tables...")
+
+    started = time.perf_counter()
+    pipeline = StatsPipeline(max_workers=args.workers, per_host=args.per_host,
+                             parse_workers=args.parse_workers)
+    df = pipeline.run(jobs)
+
+    ok = sum(1 for t in pipeline.timings if t['status'] == 'ok')
+    print(f"{ok}/{len(jobs)} tables, {len(df):,} player-seasons "
+          f"in {time.perf_counter() - started:.1f}s")
+    if pipeline.client.rate_limiter is not None:
+        for host, stats in pipeline.client.rate_limiter.stats().items():
+            print(f"  {host}: {stats['requests']} requests, rate {stats['rate']}/s, "
+                  f"max queue {stats['max_queued']}, avg wait {stats['avg_wait']}s, "
+                  f"throttled {stats['throttled']}")
+    if df.empty:
+        print("Nothing scraped; existing files left as they are")
+        return 1
+
+    version = save_seasons(df)
+    print(f"Saved {OUTPUT_BASENAME}.csv / .cols (version {version})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+IPL DATA PUBLISHING
+Crash-safe file replacement and the version manifest read by the web tier
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+MANIFEST_FILE = 'ipl_manifest.json'
+
+# Order in which the web tier prefers the published formats
+FORMATS = ('columnar', 'json', 'csv')
+
+# Manifest entry of the shared query index of the columnar file
+INDEX_ENTRY = 'index'
+
+
+def fsync_dir(directory):
+    """Flush a directory entry so a rename survives a crash"""
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return  # not supported (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode='w', encoding=None, newline=None):
+    """
+    Open a temp file that replaces path only once it is complete
+
+    The temp file sits next to path, is flushed and fsynced on success,
+    then renamed over path (an atomic replace on POSIX and Windows), and
+    the directory is fsynced. Readers see either the old file or the new
+    one, never a partial write. On error the temp file is removed.
+
+    Args:
+        path (str): Final file name
+        mode (str): 'w' or 'wb'
+        encoding (str): Text encoding for 'w'
+        newline (str): Passed to open() for 'w'
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_dir(os.path.dirname(path))
+
+
+def versioned_path(path, tag):
+    """
+    Name of one version of a data file, e.g. players.json -> players.<tag>.json
+
+    Every published version gets files of its own, so writing a new
+    version never touches the files the current manifest names.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{tag}{ext}"
+
+
+def link_file(path, alias):
+    """
+    Make alias a second name of a published file, replacing it atomically
+
+    A hard link where the file system has them, a copy otherwise.
+    Published files are never written again, so both stay identical.
+    """
+    tmp_path = f"{alias}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, alias)
+    fsync_dir(os.path.dirname(alias))
+
+
+def remove_superseded(previous, manifest, keep=()):
+    """
+    Delete the files of a previous manifest that the new one no longer names
+
+    Call this after the new manifest is in place. Workers that still map
+    a removed file keep reading it; a worker that read the old manifest
+    just before it was replaced fails to open the file and loads the new
+    version instead (see DatasetCache.get).
+
+    Args:
+        previous (dict): Manifest that was replaced (or None)
+        manifest (dict): Manifest now published
+        keep (iterable): Paths never to delete (e.g. the plain file names)
+
+    Returns:
+        list: Paths removed
+    """
+    if not previous:
+        return []
+    current = {entry['path'] for entry in manifest.get('files', {}).values()}
+    keep = set(keep)
+    removed = []
+    for entry in previous.get('files', {}).values():
+        path = entry['path']
+        if path in current or path in keep:
+            continue
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass  # already gone, or still open on Windows
+    return removed
+
+
+def file_digest(path):
+    """
+    Returns:
+        tuple: (SHA-256 hex digest, size in bytes) of a file
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def read_manifest(path=MANIFEST_FILE):
+    """
+    Returns:
+        dict: The manifest, or None if there is none (or it is unreadable)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(files, path=MANIFEST_FILE, snapshot=None, changes=None):
+    """
+    Publish a new version: record the hash and size of each data file
+
+    Call this after the data files themselves have been replaced. The
+    manifest is written with atomic_open, so the web tier switches to the
+    new version the moment it sees the new manifest. The columnar entry
+    also records the data hash from the file's header, which readers
+    compare with the file they actually mapped.
+
+    Args:
+        files (dict): Format ('columnar', 'json', 'csv', 'index') -> file path
+        path (str): Manifest file
+        snapshot (str): Row snapshot hash of the data, if known
+        changes (dict): ChangeSet.summary() against the previous version
+
+    Returns:
+        dict: The manifest written
+    """
+    previous = read_manifest(path) or {}
+    entries = {}
+    for name, file_path in files.items():
+        sha256, size = file_digest(file_path)
+        entries[name] = {'path': file_path, 'sha256': sha256, 'size': size}
+        if name == 'columnar':
+            # Imported here: columnar.py itself imports this module
+            from columnar import ColumnarFile
+
+            entries[name]['data_sha256'] = ColumnarFile(file_path).data_sha256
+
+    manifest = {
+        'version': previous.get('version', 0) + 1,
+        'published_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'snapshot': snapshot,
+        'changes': changes,
+        'files': entries
+    }
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,363 @@
+"""
+IPL PLAYER QUERIES
+Sort, range, tier and name-search lookups over prebuilt indexes
+"""
+
+import threading
+from bisect import bisect_left
+from itertools import accumulate
+
+import numpy as np
+
+from schema import TIER_COLUMNS
+
+NAME_COLUMN = 'Player'
+
+
+class QueryError(ValueError):
+    """Raised for a query on a column that does not exist or is not numeric"""
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SharedPostings:
+    """Read-only trigram -> rows map over the arrays of a shared index file"""
+
+    def __init__(self, keys, offsets, rows):
+        self.keys = keys
+        self.offsets = offsets
+        self.rows = rows
+
+    def get(self, gram):
+        i = bisect_left(self.keys, gram)
+        if i == len(self.keys) or self.keys[i] != gram:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+
+class QueryIndex:
+    """
+    Indexes over one PlayerTable, built on first use and then reused
+
+    - per numeric column: a stable argsort (missing values last) and the
+      sorted values, so a range is two binary searches and a sort is a
+      slice of the order array
+    - per tier column: the row numbers of each value
+    - player names: lowercased names in sorted order for prefix search,
+      and a trigram -> rows map for substring search
+
+    A query starts from its most selective filter and checks the other
+    filters only on those rows, so it costs O(log n + k) rather than a
+    scan of the table. The table is immutable, so every index is safe to
+    share between threads once built.
+
+    With a shared index file (see shared_index.py) every index is a view
+    of that memory map instead, so worker processes share one copy and
+    start without building anything.
+    """
+
+    def __init__(self, table, shared=None):
+        """
+        Args:
+            table (PlayerTable): Table to index
+            shared (ColumnarFile): Index file written from export(), if any
+        """
+        self.table = table
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._values = {}
+        self._orders = {}
+        self._tiers = {}
+        self._names = None
+        self._prefix = None
+        self._grams = None
+
+    @property
+    def numeric_columns(self):
+        return [name for name in self.table.names if self.table.kinds[name] in ('int', 'float')]
+
+    def _attached(self, name):
+        """True if the shared index file has the named array"""
+        return self.shared is not None and name in self.shared.entries
+
+    def _memo(self, cache, key, build, shared=None):
+        value = cache.get(key)
+        if value is None:
+            with self._lock:
+                value = cache.get(key)
+                if value is None:
+                    if shared is not None and self._attached(shared):
+                        value = cache[key] = self.shared.column(shared)
+                    else:
+                        value = cache[key] = build()
+        return value
+
+    def values(self, column):
+        """Column as float64 (NaN for missing values)"""
+        if column not in self.table or self.table.kinds[column] not in ('int', 'float'):
+            raise QueryError(f"{column} is not a numeric column")
+        return self._memo(self._values, column,
+                          lambda: np.asarray(self.table.storage(column), dtype=np.float64),
+                          f'values:{column}')
+
+    def order(self, column, descending=False):
+        """
+        Row numbers sorted by a numeric column (missing values last)
+
+        Ties keep table order in both directions.
+        """
+        values = self.values(column)
+        return self._memo(self._orders, (column, descending),
+                          lambda: np.argsort(-values if descending else values, kind='stable'),
+                          f"order:{column}:{'desc' if descending else 'asc'}")
+
+    def _sorted_values(self, column):
+        return self._memo(self._values, ('sorted', column),
+                          lambda: self.values(column)[self.order(column)],
+                          f'sorted:{column}')
+
+    def _tier_rows(self, column):
+        """(code per row, {lowercased value: code}, [rows of each code])"""
+        def build():
+            if self._attached(f'tier_codes:{column}'):
+                tier = self.shared.metadata['tiers'][column]
+                order = self.shared.column(f'tier_order:{column}')
+                bounds = tier['bounds']
+                rows = [order[bounds[c]:bounds[c + 1]] for c in range(len(bounds) - 1)]
+                return self.shared.column(f'tier_codes:{column}'), tier['lookup'], rows
+            lookup = {}
+            codes = np.array([lookup.setdefault(str(value).lower(), len(lookup))
+                              for value in self.table.column(column)], dtype=np.int64)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(lookup) + 1))
+            rows = [order[bounds[c]:bounds[c + 1]] for c in range(len(lookup))]
+            return codes, lookup, rows
+        return self._memo(self._tiers, column, build)
+
+    def names(self):
+        """Lowercased player names"""
+        if self._names is None:
+            with self._lock:
+                if self._names is None:
+                    if self._attached('names'):
+                        self._names = self.shared.column('names')
+                    else:
+                        self._names = [str(name).lower()
+                                       for name in self.table.column(NAME_COLUMN)]
+        return self._names
+
+    def _prefix_index(self):
+        if self._prefix is None and self._attached('prefix_order'):
+            with self._lock:
+                self._prefix = (self.shared.column('prefix_names'),
+                                self.shared.column('prefix_order'))
+        if self._prefix is None:
+            names = self.names()
+            order = sorted(range(len(names)), key=names.__getitem__)
+            with self._lock:
+                self._prefix = ([names[i] for i in order], np.array(order, dtype=np.int64))
+        return self._prefix
+
+    def _gram_index(self):
+        if self._grams is None and self._attached('gram_rows'):
+            with self._lock:
+                self._grams = SharedPostings(self.shared.column('gram_keys'),
+                                             self.shared.column('gram_offsets'),
+                                             self.shared.column('gram_rows'))
+        if self._grams is None:
+            grams = {}
+            for i, name in enumerate(self.names()):
+                for gram in _trigrams(name):
+                    grams.setdefault(gram, []).append(i)
+            grams = {gram: np.array(ids, dtype=np.int64) for gram, ids in grams.items()}
+            with self._lock:
+                self._grams = grams
+        return self._grams
+
+    def reuse(self, previous, changed):
+        """
+        Take over indexes from the previous dataset where still valid
+
+        Only call this when both tables hold the same players in the same
+        order (see snapshot.changed_columns).
+
+        Args:
+            previous (QueryIndex): Index of the dataset being replaced
+            changed (set): Columns whose values changed
+        """
+        if self.shared is not None or len(previous.table) != len(self.table):
+            return
+        with self._lock:
+            for key, value in previous._values.items():
+                column = key[1] if isinstance(key, tuple) else key
+                if column not in changed:
+                    self._values.setdefault(key, value)
+            for key, value in previous._orders.items():
+                if key[0] not in changed:
+                    self._orders.setdefault(key, value)
+            for column, value in previous._tiers.items():
+                if column not in changed:
+                    self._tiers.setdefault(column, value)
+            if NAME_COLUMN not in changed:
+                self._names = self._names or previous._names
+                self._prefix = self._prefix or previous._prefix
+                self._grams = self._grams or previous._grams
+
+    def warm(self):
+        """Build every index up front (e.g. in a background thread)"""
+        for column in self.numeric_columns:
+            self.order(column)
+            self.order(column, descending=True)
+            self._sorted_values(column)
+        for column in TIER_COLUMNS:
+            if column in self.table:
+                self._tier_rows(column)
+        if NAME_COLUMN in self.table:
+            self._prefix_index()
+            self._gram_index()
+
+    def export(self):
+        """
+        Every index as plain arrays, for a shared index file
+
+        Returns:
+            tuple: (name -> NumPy array or list of strings, metadata dict)
+        """
+        self.warm()
+        arrays = {}
+        tiers = {}
+        for column in self.numeric_columns:
+            arrays[f'values:{column}'] = self.values(column)
+            arrays[f'order:{column}:asc'] = self.order(column)
+            arrays[f'order:{column}:desc'] = self.order(column, descending=True)
+            arrays[f'sorted:{column}'] = self._sorted_values(column)
+        for column in TIER_COLUMNS:
+            if column in self.table:
+                codes, lookup, rows = self._tier_rows(column)
+                arrays[f'tier_codes:{column}'] = codes
+                arrays[f'tier_order:{column}'] = np.concatenate(rows).astype(np.int64) \
+                    if rows else np.empty(0, dtype=np.int64)
+                tiers[column] = {'lookup': lookup,
+                                 'bounds': [0] + list(accumulate(len(r) for r in rows))}
+        if NAME_COLUMN in self.table:
+            sorted_names, order = self._prefix_index()
+            arrays['names'] = list(self.names())
+            arrays['prefix_names'] = list(sorted_names)
+            arrays['prefix_order'] = np.asarray(order, dtype=np.int64)
+            grams = self._gram_index()
+            keys = sorted(grams)
+            arrays['gram_keys'] = keys
+            arrays['gram_offsets'] = np.array([0] + list(accumulate(len(grams[k]) for k in keys)),
+                                              dtype=np.int64)
+            arrays['gram_rows'] = np.concatenate([grams[k] for k in keys]) \
+                if keys else np.empty(0, dtype=np.int64)
+        return arrays, {'tiers': tiers}
+
+    # Each filter is (row count, rows(), keep(rows) -> mask)
+
+    def _range_filter(self, column, low, high):
+        values = self.values(column)
+        ordered = self._sorted_values(column)
+        lo = 0 if low is None else int(np.searchsorted(ordered, low, side='left'))
+        hi = int(np.searchsorted(ordered, np.inf, side='right')) if high is None \
+            else int(np.searchsorted(ordered, high, side='right'))
+        hi = max(hi, lo)
+
+        def keep(rows):
+            selected = values[rows]
+            mask = ~np.isnan(selected)
+            if low is not None:
+                mask &= selected >= low
+            if high is not None:
+                mask &= selected <= high
+            return mask
+
+        return hi - lo, lambda: self.order(column)[lo:hi], keep
+
+    def _tier_filter(self, column, wanted):
+        if column not in self.table:
+            raise QueryError(f"Unknown column {column}")
+        codes, lookup, rows = self._tier_rows(column)
+        wanted = [lookup[w.lower()] for w in wanted if w.lower() in lookup]
+        parts = [rows[code] for code in wanted]
+        return (sum(len(p) for p in parts),
+                lambda: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64),
+                lambda selected: np.isin(codes[selected], wanted))
+
+    def _prefix_filter(self, text):
+        text = text.lower()
+        sorted_names, order = self._prefix_index()
+        lo = bisect_left(sorted_names, text)
+        hi = bisect_left(sorted_names, text + '\uffff')
+        names = self.names()
+        return (hi - lo, lambda: order[lo:hi],
+                lambda rows: np.array([names[i].startswith(text) for i in rows], dtype=bool))
+
+    def _contains_filter(self, text):
+        text = text.lower()
+        names = self.names()
+
+        def keep(rows):
+            return np.array([text in names[i] for i in rows], dtype=bool)
+
+        if len(text) < 3:
+            everything = np.arange(len(names), dtype=np.int64)
+            return len(names), lambda: everything[keep(everything)], keep
+
+        # Rows holding the rarest trigram of the text; the rest is verified
+        grams = self._gram_index()
+        postings = [grams.get(gram) for gram in _trigrams(text)]
+        if any(p is None for p in postings):
+            return 0, lambda: np.empty(0, dtype=np.int64), keep
+        rarest = min(postings, key=len)
+        return len(rarest), lambda: rarest[keep(rarest)], keep
+
+    def select(self, sort=None, descending=True, ranges=None, tiers=None,
+               prefix=None, contains=None):
+        """
+        Row numbers matching a query, in result order
+
+        Args:
+            sort (str): Numeric column to sort by (default: table order)
+            descending (bool): Sort direction
+            ranges (dict): Column -> (low, high), either bound may be None
+            tiers (dict): Column -> list of accepted values (case-insensitive)
+            prefix (str): Player name prefix (case-insensitive)
+            contains (str): Player name substring (case-insensitive)
+
+        Returns:
+            numpy.ndarray: Row numbers
+
+        Raises:
+            QueryError: If a column is unknown or not numeric
+        """
+        filters = []
+        for column, (low, high) in (ranges or {}).items():
+            filters.append(self._range_filter(column, low, high))
+        for column, wanted in (tiers or {}).items():
+            filters.append(self._tier_filter(column, wanted))
+        if prefix:
+            filters.append(self._prefix_filter(prefix))
+        if contains:
+            filters.append(self._contains_filter(contains))
+
+        if not filters:
+            if sort:
+                return self.order(sort, descending)
+            return np.arange(len(self.table), dtype=np.int64)
+
+        # Start from the smallest candidate set, check the others on it
+        filters.sort(key=lambda f: f[0])
+        rows = np.asarray(filters[0][1](), dtype=np.int64)
+        for _, _, keep in filters[1:]:
+            if not len(rows):
+                break
+            rows = rows[keep(rows)]
+
+        rows = np.sort(rows)
+        if sort:
+            values = self.values(sort)[rows]
+            rows = rows[np.argsort(-values if descending else values, kind='stable')]
+        return rows
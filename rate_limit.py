@@ -0,0 +1,259 @@
+"""
+IPL SCRAPER RATE LIMITING
+Per-host token buckets that slow down on throttling and speed back up
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Requests per second per site. Subdomains share their site's bucket.
+HOST_RATES = {
+    'espncricinfo.com': 1.0,
+    'cricbuzz.com': 1.0,
+    'howstat.com': 0.5,
+}
+DEFAULT_RATE = 2.0
+
+# Longest Retry-After we are willing to honour, in seconds
+MAX_RETRY_AFTER = 300
+
+# Statuses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def retry_after_seconds(value):
+    """
+    Parse a Retry-After header (delta seconds or HTTP date)
+
+    Returns:
+        float: Seconds to wait (capped at MAX_RETRY_AFTER), or None
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking
+
+    reserve() takes a token (the count may go negative, which queues
+    later callers behind earlier ones) and returns how long the caller
+    must wait before using it. The caller sleeps outside the lock.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Bucket size
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        # Total time outstanding reservations have been pushed back
+        self.shift = 0.0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """
+        Returns:
+            float: Seconds to wait before the request may be sent
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        return max(0.0, self.updated - now) + max(0.0, -self.tokens) / self.rate
+
+    def set_rate(self, rate):
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next seconds (e.g. Retry-After)"""
+        now = time.monotonic()
+        self._refill(now)
+        start = max(self.updated, now)
+        self.updated = max(self.updated, now + seconds)
+        self.tokens = min(self.tokens, 1.0)
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.shift += self.updated - start
+
+
+class HostState:
+    """Bucket, AIMD bounds and counters of one host"""
+
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        self.base_rate = rate
+        self.queued = 0
+        self.max_queued = 0
+        self.requests = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.errors = 0
+
+
+class HostRateLimiter:
+    """
+    Politeness scheduler: one adaptive token bucket per host
+
+    Each host starts at its configured rate. Every successful response
+    raises the rate by a small step (additive increase, up to
+    max_factor times the configured rate); a 429/503, another retryable
+    status or a connection error multiplies it by decrease (down to
+    min_factor times the configured rate). A Retry-After header pauses
+    the host's bucket for that long, so every caller waits, not just
+    the one that got the response.
+    """
+
+    def __init__(self, host_rates=None, default_rate=DEFAULT_RATE, burst=1,
+                 increase=0.05, decrease=0.5, min_factor=1 / 16, max_factor=4.0):
+        """
+        Args:
+            host_rates (dict): Site -> requests per second (default: HOST_RATES)
+            default_rate (float): Rate of hosts not in host_rates
+            burst (int): Requests a host may send back to back
+            increase (float): Rate added per successful response
+            decrease (float): Factor applied on throttling or errors
+            min_factor (float): Lowest rate, relative to the configured one
+            max_factor (float): Highest rate, relative to the configured one
+        """
+        self.host_rates = HOST_RATES if host_rates is None else host_rates
+        self.default_rate = default_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host_key(self, url):
+        """Bucket name for a URL: the configured site it belongs to, or its host"""
+        host = urlsplit(url).hostname or ''
+        for site in self.host_rates:
+            if host == site or host.endswith('.' + site):
+                return site
+        return host
+
+    def _state(self, key):
+        state = self._hosts.get(key)
+        if state is None:
+            state = self._hosts[key] = HostState(self.host_rates.get(key, self.default_rate),
+                                                 self.burst)
+        return state
+
+    def acquire(self, url, cancel=None):
+        """
+        Wait until a request to url may be sent
+
+        Args:
+            url (str): URL about to be requested
+            cancel (threading.Event): Stop waiting early when set
+
+        Returns:
+            float: Seconds waited
+        """
+        key = self.host_key(url)
+        with self._lock:
+            state = self._state(key)
+            delay = state.bucket.reserve()
+            shift = state.bucket.shift
+            state.queued += 1
+            state.max_queued = max(state.max_queued, state.queued)
+
+        waited = 0.0
+        while delay > 0:
+            if cancel is not None:
+                if cancel.wait(delay):
+                    break
+            else:
+                time.sleep(delay)
+            waited += delay
+            # A Retry-After that arrived while we slept pushes back
+            # reservations made before it too, keeping their spacing
+            with self._lock:
+                delay = state.bucket.shift - shift
+                shift = state.bucket.shift
+
+        with self._lock:
+            state.queued -= 1
+            state.requests += 1
+            state.waited += waited
+            state.max_wait = max(state.max_wait, waited)
+        return waited
+
+    def feedback(self, url, ok, status=None, retry_after=None):
+        """
+        Adapt the host's rate to the outcome of a request
+
+        Args:
+            url (str): URL that was requested
+            ok (bool): False for a retryable status or a connection error
+            status (int): HTTP status (None for a connection error/timeout)
+            retry_after (str): Retry-After header of the response
+        """
+        key = self.host_key(url)
+        with self._lock:
+            state = self._state(key)
+            bucket = state.bucket
+            if ok:
+                bucket.set_rate(min(state.base_rate * self.max_factor,
+                                    bucket.rate + self.increase))
+                return
+
+            if status in THROTTLE_STATUSES:
+                state.throttled += 1
+            else:
+                state.errors += 1
+            bucket.set_rate(max(state.base_rate * self.min_factor, bucket.rate * self.decrease))
+
+            pause = retry_after_seconds(retry_after)
+            if pause:
+                bucket.pause(pause)
+
+    def paused(self, url):
+        """Seconds until the host's bucket hands out tokens again"""
+        with self._lock:
+            state = self._hosts.get(self.host_key(url))
+            if state is None:
+                return 0.0
+            return max(0.0, state.bucket.paused_until - time.monotonic())
+
+    def stats(self):
+        """
+        Returns:
+            dict: Host -> rate, queue depth and wait time counters
+        """
+        with self._lock:
+            return {
+                key: {
+                    'rate': round(state.bucket.rate, 3),
+                    'queued': state.queued,
+                    'max_queued': state.max_queued,
+                    'requests': state.requests,
+                    'avg_wait': round(state.waited / state.requests, 3) if state.requests else 0.0,
+                    'max_wait': round(state.max_wait, 3),
+                    'throttled': state.throttled,
+                    'errors': state.errors,
+                    'paused_for': round(max(0.0, state.bucket.paused_until - time.monotonic()), 3)
+                }
+                for key, state in self._hosts.items()
+            }
@@ -0,0 +1,137 @@
+"""
+IPL BACKGROUND REFRESH
+Runs the scraper on an interval, never more than one refresh at a time
+"""
+
+import os
+import threading
+import time
+import traceback
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight within this process only
+    fcntl = None
+
+LOCK_FILE = 'ipl_refresh.lock'
+
+
+class RefreshWorker:
+    """
+    Background thread that calls a refresh function every interval
+
+    Refreshes are single-flight: a refresh that would overlap a running
+    one (from the timer, a manual trigger, or another worker process
+    holding the lock file) is skipped rather than queued. The web tier
+    keeps serving the last published dataset until the refresh publishes
+    a new manifest.
+    """
+
+    def __init__(self, refresh, interval, lock_path=LOCK_FILE):
+        """
+        Args:
+            refresh (callable): Does one fetch -> clean -> publish and
+                returns a result dict
+            interval (float): Seconds between refreshes (0 disables the timer)
+            lock_path (str): Lock file shared by all worker processes
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self.lock_path = lock_path
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_started = None
+        self.last_finished = None
+        self.last_result = None
+        self.last_error = None
+
+    def start(self):
+        """Start the timer thread (no-op if disabled or already started)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='ipl-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def _lock_file(self):
+        """Take the cross-process lock, or return None if another process has it"""
+        if fcntl is None:
+            return open(os.devnull, 'w')
+        handle = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    def run_once(self):
+        """
+        Refresh now unless a refresh is already running
+
+        Returns:
+            dict: Result of the refresh, or None if it was skipped
+        """
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        try:
+            handle = self._lock_file()
+            if handle is None:
+                self.skipped += 1
+                return None
+            try:
+                self.last_started = time.time()
+                try:
+                    self.last_result = self.refresh()
+                    self.last_error = None
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    traceback.print_exc()
+                self.runs += 1
+                self.last_finished = time.time()
+                return self.last_result
+            finally:
+                handle.close()
+        finally:
+            self._running.release()
+
+    def trigger(self):
+        """
+        Start a refresh in the background
+
+        Returns:
+            bool: False if a refresh is already running
+        """
+        if self.running:
+            return False
+        threading.Thread(target=self.run_once, name='ipl-refresh-now', daemon=True).start()
+        return True
+
+    @property
+    def running(self):
+        return self._running.locked()
+
+    def status(self):
+        return {
+            'interval': self.interval,
+            'running': self.running,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'last_started': self.last_started,
+            'last_finished': self.last_finished,
+            'last_result': self.last_result,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,219 @@
+"""
+IPL STATS PREPARED RESPONSES
+Encoded response bodies built once per dataset version
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 256
+
+# Identity bytes a ResponseStore keeps (e.g. unpaged listings of a huge table)
+MAX_STORE_BYTES = 64 * 1024 * 1024
+
+
+def make_etag(version, key):
+    """
+    Strong ETag for one response of one dataset version
+
+    Args:
+        version (str): Content hash of the data file
+        key (tuple): Identifies the response (route + normalized arguments)
+
+    Returns:
+        str: ETag value without quotes
+    """
+    key_hash = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]
+    return f"{version[:24]}-{key_hash}"
+
+
+class PreparedResponse:
+    """
+    One response body with its compressed variants and validators
+
+    The identity body is encoded once; gzip (and brotli when the module
+    is installed) variants are compressed once, on first request.
+    """
+
+    def __init__(self, body, mimetype, etag, headers=None):
+        """
+        Args:
+            body (bytes): Uncompressed body
+            mimetype (str): Content type
+            etag (str): Strong ETag (without quotes) of the identity body
+            headers (dict): Extra headers (e.g. Content-Disposition)
+        """
+        self.mimetype = mimetype
+        self.etag = etag
+        self.headers = headers or {}
+        self._bodies = {'identity': body}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """Bytes of the identity body (compressed variants are smaller)"""
+        return len(self._bodies['identity'])
+
+    def _body(self, encoding):
+        body = self._bodies.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._bodies.get(encoding)
+                if body is None:
+                    identity = self._bodies['identity']
+                    if encoding == 'br':
+                        body = brotli.compress(identity, quality=5)
+                    else:
+                        body = gzip.compress(identity, compresslevel=6, mtime=0)
+                    self._bodies[encoding] = body
+        return body
+
+    def to_response(self, request):
+        """
+        Build the Flask response for a request
+
+        Args:
+            request: The current Flask request
+
+        Returns:
+            Response: 304 if the client copy is current, else the body in
+            the best encoding the client accepts
+        """
+        if client_has(request, self.etag):
+            return not_modified(self.etag)
+
+        encoding = 'identity'
+        if len(self._bodies['identity']) >= MIN_COMPRESS_BYTES:
+            accepted = request.accept_encodings
+            if brotli is not None and accepted.quality('br') > 0:
+                encoding = 'br'
+            elif accepted.quality('gzip') > 0:
+                encoding = 'gzip'
+
+        response = Response(self._body(encoding), mimetype=self.mimetype)
+        response.headers.update(self.headers)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        if encoding == 'identity':
+            response.set_etag(self.etag)
+        else:
+            response.headers['Content-Encoding'] = encoding
+            response.set_etag(f"{self.etag}-{encoding}")
+        return response
+
+
+def client_has(request, etag):
+    """
+    Check If-None-Match against an ETag and its compressed variants
+
+    Args:
+        request: The current Flask request
+        etag (str): ETag of the identity body
+
+    Returns:
+        bool: True if the client already has this response
+    """
+    tags = request.if_none_match
+    return any(tag in tags for tag in (etag, f"{etag}-gzip", f"{etag}-br"))
+
+
+def not_modified(etag):
+    """Empty 304 response carrying the ETag"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+class ResponseStore:
+    """
+    Bounded LRU of prepared responses for the current dataset version
+
+    The version only changes through set_version, called when the dataset
+    cache swaps in a new copy; entries of the old version are dropped
+    then. Gets and puts for any other version (a request still holding
+    an older copy) miss and are not stored. The entry bound keeps
+    arbitrary query strings from growing it, the byte bound keeps a few
+    full-table bodies from pinning memory.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=MAX_STORE_BYTES):
+        """
+        Args:
+            max_entries (int): Prepared responses kept per version
+            max_bytes (int): Identity body bytes kept in total; a larger
+                body is served but never stored
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key):
+        """
+        Returns:
+            PreparedResponse: Cached response, or None
+        """
+        with self._lock:
+            prepared = self._entries.get(key) if version == self.version else None
+            if prepared is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return prepared
+
+    def set_version(self, version):
+        """Switch to a new dataset version, dropping the old entries"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self._bytes = 0
+                self.version = version
+
+    def put(self, version, key, prepared):
+        """
+        Store a prepared response, evicting the least recently used
+
+        Responses built for a version other than the current one, or
+        larger than max_bytes, are returned without being stored.
+        """
+        with self._lock:
+            if version != self.version or prepared.size > self.max_bytes:
+                return prepared
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._bytes -= replaced.size
+            self._entries[key] = prepared
+            self._bytes += prepared.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return prepared
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'version': self.version
+        }
@@ -1,17 +1,19 @@
 """
 ALTERNATIVE: Use cricket API instead of web scraping
 """
-import requests
 import pandas as pd
 import json
 
+from http_client import get_client
+
 def fetch_from_cricket_api():
     """
     Try to fetch IPL data from cricket API
     """
     try:
         # This is a public cricket API endpoint
-        response = requests.get(
+        # Shared pooled session (keep-alive, retries, conditional GET)
+        response = get_client().get(
             "https://cricket-api.vercel.app/api/ipl/stats/batsmen",
             timeout=10
         )
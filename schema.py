@@ -0,0 +1,151 @@
+"""
+IPL COLUMN SCHEMAS
+Declarative mapping from source table headers to our column names
+"""
+
+import re
+import threading
+
+# Columns that can be filtered by exact value (e.g. insight=Elite)
+TIER_COLUMNS = ('Insight',)
+
+
+def normalize_header(header):
+    """Lowercase a header and collapse underscores/whitespace"""
+    return ' '.join(str(header).replace('_', ' ').lower().split())
+
+
+class ColumnSchema:
+    """
+    Registry of canonical columns and the header patterns that map to them
+
+    Patterns are compiled once and matched against the normalized header
+    (full match unless the pattern is listed as a search). A resolved
+    mapping is memoized per header signature, so scraping the same
+    source again skips resolution entirely.
+    """
+
+    def __init__(self, name, columns, known=(), search=(), text=('Player',)):
+        """
+        Args:
+            name (str): Schema name (e.g. 'batting')
+            columns (list): (canonical name, regex) pairs in priority order
+            known (list): Regexes for headers we recognise but keep as-is
+            search (tuple): Canonical names whose regex may match anywhere
+            text (tuple): Canonical columns that stay text (all others are numeric)
+        """
+        self.name = name
+        self.text = set(text)
+        self.columns = [(canonical, re.compile(pattern)) for canonical, pattern in columns]
+        self.known = [re.compile(pattern) for pattern in known]
+        self.search = set(search)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def canonical_names(self):
+        return [canonical for canonical, _ in self.columns]
+
+    def _match(self, header):
+        text = normalize_header(header)
+        for canonical, pattern in self.columns:
+            found = pattern.search(text) if canonical in self.search else pattern.fullmatch(text)
+            if found:
+                return canonical
+        return None
+
+    def _is_known(self, header):
+        text = normalize_header(header)
+        return any(pattern.fullmatch(text) for pattern in self.known)
+
+    def resolve(self, headers):
+        """
+        Map source headers to canonical column names
+
+        Args:
+            headers (iterable): Column labels of the scraped table
+
+        Returns:
+            tuple: (mapping {header: canonical}, list of unknown headers).
+            Both are shared with the memo and must not be modified.
+        """
+        headers = list(headers)
+        signature = tuple(str(h) for h in headers)
+        cached = self._cache.get(signature)
+        if cached is not None:
+            return cached
+
+        mapping = {}
+        unknown = []
+        seen = set()
+        for header in headers:
+            canonical = self._match(header)
+            if canonical is None:
+                if not self._is_known(header):
+                    unknown.append(header)
+            elif canonical in seen:
+                # Second header for the same column (e.g. two 'Runs')
+                unknown.append(header)
+            else:
+                seen.add(canonical)
+                if header != canonical:
+                    mapping[header] = canonical
+
+        result = (mapping, unknown)
+        with self._lock:
+            self._cache[signature] = result
+        return result
+
+    def cache_size(self):
+        """Number of memoized header signatures"""
+        return len(self._cache)
+
+
+BATTING_SCHEMA = ColumnSchema(
+    'batting',
+    columns=[
+        ('Player', r'\b(player|batsman|batter|name)\b'),
+        ('Runs', r'runs?'),
+        ('Matches', r'mat|matches|match|m'),
+        ('Innings', r'inns?|innings|i'),
+        ('Average', r'ave?|avg|average|bat av'),
+        ('Strike_Rate', r'sr|s/r|strike ?rate|bat sr'),
+        ('Highest_Score', r'hs|highest( score)?|best'),
+        ('Centuries', r'100s?|hundreds?|centur(y|ies)'),
+        ('Fifties', r'50s?|fift(y|ies)'),
+        ('Fours', r'4s|fours'),
+        ('Sixes', r'6s|sixes'),
+    ],
+    # Columns on ESPN/Cricbuzz/HowSTAT tables we do not rename
+    known=[r'span', r'no', r'not outs?', r'bf', r'balls( faced)?', r'0s?', r'ducks',
+           r'pos|rank|#', r'teams?', r'insight', r'highest score not out'],
+    search=('Player',)
+)
+
+
+BOWLING_SCHEMA = ColumnSchema(
+    'bowling',
+    columns=[
+        ('Player', r'\b(player|bowler|name)\b'),
+        ('Matches', r'mat|matches|match|m'),
+        ('Bowl_Innings', r'inns?|innings|i'),
+        ('Balls', r'balls|b'),
+        ('Overs', r'overs?|o'),
+        ('Maidens', r'mdns?|maidens?'),
+        ('Runs_Conceded', r'runs?( conceded)?|r'),
+        ('Wickets', r'wkts?|wickets?|w'),
+        ('Best_Bowling', r'bbi|best( figures)?'),
+        ('Bowl_Average', r'ave?|avg|average'),
+        ('Economy', r'econ(omy)?( rate)?|er'),
+        ('Bowl_Strike_Rate', r'sr|s/r|strike ?rate'),
+        ('Four_Wickets', r'4w?|4 ?wkts?|4-?fers?'),
+        ('Five_Wickets', r'5w?|5 ?wkts?|5-?fers?'),
+    ],
+    known=[r'span', r'bbm', r'10w?', r'pos|rank|#', r'teams?'],
+    search=('Player',),
+    text=('Player', 'Best_Bowling')
+)
+
+# Schemas by name, for code that only passes the name around (e.g. to
+# worker processes)
+SCHEMAS = {schema.name: schema for schema in (BATTING_SCHEMA, BOWLING_SCHEMA)}
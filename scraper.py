@@ -5,21 +5,53 @@ Author: Your Name
 Date: 2024
 """
 
+import numpy as np
 import pandas as pd
-import requests
 import logging
 import json
+import argparse
 import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import os
 import sys
 
+from instrument import PROFILE_MODES, configure_logging, profiled, span, timed
+from columnar import write_columnar
+from schema import BATTING_SCHEMA
+from publish import (INDEX_ENTRY, MANIFEST_FILE, atomic_open, link_file, read_manifest,
+                     remove_superseded, versioned_path, write_manifest)
+from shared_index import INDEX_FILE, write_index
+from snapshot import CHANGE_LOG_FILE, append_change_log, diff_records, load_snapshot
+
+# requests/lxml (http_client, table_extract) and cricsheet are imported
+# where they are first used, so runs that never fetch a page skip them
+
+# data_source -> label stored in the published metadata
+SOURCE_LABELS = {
+    'cricsheet': 'Cricsheet ball-by-ball',
+    'synthetic': 'Synthetic (synthetic.py)',
+}
+
+# Columns converted to numbers by clean_data
+NUMERIC_COLUMNS = ['Runs', 'Matches', 'Innings', 'Average', 'Strike_Rate', 'Highest_Score',
+                   'Centuries', 'Fifties', 'Fours', 'Sixes']
+INTEGER_COLUMNS = {'Runs', 'Matches', 'Innings', 'Highest_Score', 'Centuries', 'Fifties',
+                   'Fours', 'Sixes'}
+
+# Insight tiers, best first
+INSIGHT_LEVELS = ['Legend', 'Elite', 'Good']
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%H:%M:%S'
 )
+# Spans log through the 'ipl' logger; IPL_LOG_FORMAT=json gives JSON lines
+configure_logging()
 
 class IPLScraper:
     """
@@ -27,8 +59,18 @@ class IPLScraper:
     and processes the data for analysis
     """
     
-    def __init__(self):
-        """Initialize scraper with ESPNcricinfo URL"""
+    def __init__(self, client=None, cache_dir=None, cache_ttl=3600,
+                 cache_max_bytes=50 * 1024 * 1024, offline=False):
+        """
+        Initialize scraper with ESPNcricinfo URL
+        
+        Args:
+            client (HttpClient): HTTP client to use (default: shared client)
+            cache_dir (str): Keep downloaded pages in this directory
+            cache_ttl (int): Seconds a cached page is used without revalidating
+            cache_max_bytes (int): Size limit of the page cache
+            offline (bool): Only use cached pages, never the network
+        """
         # Try multiple ESPN endpoints
         self.urls = [
             "https://www.espncricinfo.com/records/trophy/batting-most-runs-career/indian-premier-league-117",
@@ -36,9 +78,29 @@ class IPLScraper:
             "https://www.espncricinfo.com/records/most-runs-in-career-117"
         ]
         
+        # Fallback sites, tried after ESPN
+        self.alternative_urls = [
+            # Cricbuzz IPL stats
+            "https://www.cricbuzz.com/cricket-stats/ipl/most-runs",
+            # HowSTAT IPL records
+            "https://www.howstat.com/cricket/Statistics/IPL/PlayerProgressBat.asp",
+        ]
+        
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._cache_options = (cache_dir, cache_ttl, cache_max_bytes, offline)
         self.df = None
+        # 'live' once a source table was parsed, 'sample' for the built-in data,
+        # 'cricsheet' for totals derived from ball-by-ball match files
+        self.data_source = None
+        self.published_version = None
+        self.fetch_timings = []
+        self.unknown_columns = []
         self.season = "IPL - Career Runs (Till Latest Season)"
         self.last_updated = datetime.now().strftime("%d %b %Y")
+        # Set by save_incremental: hash of the saved table and its diff summary
+        self.snapshot = None
+        self.changes = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -46,13 +108,42 @@ class IPLScraper:
             'Connection': 'keep-alive',
         }
     
-    def fetch_data(self):
+    @property
+    def client(self):
+        """HTTP client, created on first use (once, even from several fetch threads)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._make_client()
+        return self._client
+    
+    def _make_client(self):
+        """Shared client, or a private one over the page cache"""
+        from http_client import HttpClient, get_client
+        from page_cache import PageCache
+        
+        cache_dir, cache_ttl, cache_max_bytes, offline = self._cache_options
+        if cache_dir or offline:
+            cache = PageCache(cache_dir or '.page_cache', ttl=cache_ttl,
+                              max_bytes=cache_max_bytes)
+            return HttpClient(cache=cache, offline=offline)
+        return get_client()
+    
+    def fetch_data(self, concurrent=False):
         """
         Fetch IPL data from ESPNcricinfo
         
+        Args:
+            concurrent (bool): Race all sources at once instead of one by one
+        
         Returns:
             bool: True if successful, False otherwise
         """
+        if concurrent:
+            return self.fetch_data_concurrent()
+        
+        import requests
+        
         print("\nTrying to fetch IPL data from ESPNcricinfo...")
         
         # Try different ESPN URLs
@@ -60,40 +151,26 @@ class IPLScraper:
             try:
                 print(f"\nAttempt {i+1}: Trying {url.split('/')[-1]}...")
                 
-                # Add delay between attempts
-                if i > 0:
-                    time.sleep(2)
+                # Back off (with jitter) between attempts, unless the
+                # client's per-host rate limiter already spaces requests
+                if i > 0 and self.client.rate_limiter is None:
+                    time.sleep(self.client.backoff_delay(i - 1))
                 
                 # Fetch webpage
-                response = requests.get(url, headers=self.headers, timeout=15)
+                with span('fetch', {'host': url.split('/')[2]}, url=url) as s:
+                    response = self.client.get(url, headers=self.headers, timeout=15)
+                    s['status'] = response.status_code
                 
                 if response.status_code == 200:
                     print("Successfully connected to ESPNcricinfo")
                     
                     # Try to extract tables
                     try:
-                        # Use pandas to read HTML tables
-                        tables = pd.read_html(response.text)
-                        
-                        if len(tables) > 0:
-                            print(f"Found {len(tables)} table(s)")
-                            
-                            # Try each table to find the right one
-                            for table_idx, table in enumerate(tables):
-                                # Check if this looks like the player stats table
-                                if len(table.columns) >= 4:  # Should have several columns
-                                    # Check for common column names
-                                    col_names = str(table.columns).lower()
-                                    if any(keyword in col_names for keyword in ['player', 'runs', 'matches']):
-                                        self.df = table.copy()
-                                        print(f"Using table {table_idx+1} with {len(self.df)} records")
-                                        return True
-                            
-                            # If no table matched but we have tables, use the first decent one
-                            if len(tables[0]) > 10:  # More than 10 rows
-                                self.df = tables[0].copy()
-                                print(f"Using first table with {len(self.df)} records")
-                                return True
+                        table = self._find_stats_table(response.text)
+                        if table is not None:
+                            self.df = table
+                            self.data_source = 'live'
+                            return True
                     
                     except Exception as e:
                         print(f"Note: Could not parse tables: {e}")
@@ -120,27 +197,22 @@ class IPLScraper:
         Returns:
             bool: True if successful, False otherwise
         """
-        alternative_sources = [
-            # Cricbuzz IPL stats
-            "https://www.cricbuzz.com/cricket-stats/ipl/most-runs",
-            # HowSTAT IPL records
-            "https://www.howstat.com/cricket/Statistics/IPL/PlayerProgressBat.asp",
-        ]
-        
-        for url in alternative_sources:
+        for url in self.alternative_urls:
             try:
                 print(f"\nTrying {url.split('/')[2]}...")
-                response = requests.get(url, headers=self.headers, timeout=10)
+                with span('fetch', {'host': url.split('/')[2]}, url=url) as s:
+                    response = self.client.get(url, headers=self.headers, timeout=10)
+                    s['status'] = response.status_code
                 
                 if response.status_code == 200:
                     print("Connected to alternative source")
                     
                     # Try to parse with pandas
                     try:
-                        tables = pd.read_html(response.text)
-                        if tables and len(tables[0]) > 5:
-                            self.df = tables[0].copy()
-                            print(f"Got {len(self.df)} records from alternative source")
+                        table = self._find_alternative_table(response.text)
+                        if table is not None:
+                            self.df = table
+                            self.data_source = 'live'
                             return True
                     except:
                         continue
@@ -152,6 +224,213 @@ class IPLScraper:
         print("\nCould not fetch live data. Creating realistic sample data...")
         return self.create_realistic_data()
     
+    def _find_stats_table(self, html):
+        """
+        Pick the player stats table out of an ESPNcricinfo page
+        
+        Args:
+            html (str): Page HTML
+            
+        Returns:
+            DataFrame: The matching table, or None
+        """
+        from table_extract import STATS_KEYWORDS, extract_table
+        
+        # Only the first table whose header matches is materialized
+        with span('extract', {'source': 'espncricinfo'}, bytes=len(html)) as s:
+            table = extract_table(html, keywords=STATS_KEYWORDS, min_columns=4, fallback_rows=10)
+            s['rows'] = 0 if table is None else len(table)
+        if table is not None:
+            print(f"Using stats table with {len(table)} records")
+        return table
+    
+    def _find_alternative_table(self, html):
+        """
+        Pick the stats table out of a Cricbuzz/HowSTAT page
+        
+        Args:
+            html (str): Page HTML
+            
+        Returns:
+            DataFrame: The first table if it looks usable, or None
+        """
+        from table_extract import extract_table
+        
+        with span('extract', {'source': 'alternative'}, bytes=len(html)) as s:
+            table = extract_table(html, keywords=None)
+            s['rows'] = 0 if table is None else len(table)
+        if table is not None and len(table) > 5:
+            print(f"Got {len(table)} records from alternative source")
+            return table
+        return None
+    
+    def fetch_data_concurrent(self, max_workers=None):
+        """
+        Race every source at once and keep the best-priority table
+        
+        ESPN URLs have the highest priority (in order), then the
+        alternative sources. As soon as a source succeeds and every
+        higher-priority source has finished, the remaining downloads
+        are cancelled. Per-source timings end up in self.fetch_timings,
+        one row per source, taken from the downloads that finished before
+        the winner was picked (the rest are recorded as cancelled).
+        
+        Args:
+            max_workers (int): Thread pool size (default: one per source)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        sources = [(priority, url, 15, self._find_stats_table)
+                   for priority, url in enumerate(self.urls)]
+        sources += [(len(self.urls) + i, url, 10, self._find_alternative_table)
+                    for i, url in enumerate(self.alternative_urls)]
+        
+        print(f"\nFetching from {len(sources)} sources concurrently...")
+        
+        self.fetch_timings = []
+        cancel = threading.Event()
+        results = {}
+        started = time.perf_counter()
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(sources))
+        futures = {
+            executor.submit(self._fetch_source, url, priority, timeout, find_table, cancel): priority
+            for priority, url, timeout, find_table in sources
+        }
+        
+        winner = None
+        try:
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                
+                # Best successful source so far
+                ok = [p for p, (table, _) in results.items() if table is not None]
+                if not ok:
+                    continue
+                best = min(ok)
+                
+                # Only stop once no better source is still running
+                if all(p in results for p in range(best)):
+                    winner = best
+                    break
+        finally:
+            cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Threads still running after the cancel are left out: their
+        # sources are recorded as cancelled
+        timings = [results[priority][1] for priority in results]
+        timings += [{
+            'url': url,
+            'priority': priority,
+            'status': 'cancelled',
+            'elapsed': round(time.perf_counter() - started, 3),
+            'rows': 0
+        } for priority, url, _, _ in sources if priority not in results]
+        self.fetch_timings = sorted(timings, key=lambda t: t['priority'])
+        for timing in self.fetch_timings:
+            print(f"  [{timing['priority']}] {timing['url'].split('/')[2]:<28} "
+                  f"{timing['status']:<12} {timing['elapsed']:.2f}s")
+        
+        if winner is not None:
+            self.df = results[winner][0]
+            self.data_source = 'live'
+            print(f"Using source {winner+1} with {len(self.df)} records "
+                  f"({time.perf_counter() - started:.2f}s total)")
+            return True
+        
+        # Last resort: Create realistic sample data
+        print("\nCould not fetch live data. Creating realistic sample data...")
+        return self.create_realistic_data()
+    
+    def _fetch_source(self, url, priority, timeout, find_table, cancel):
+        """
+        Download and parse one source, giving up early if cancelled
+        
+        Args:
+            url (str): Page URL
+            priority (int): Lower is better
+            timeout (int): Request timeout in seconds
+            find_table (callable): Picks the stats table from the HTML
+            cancel (threading.Event): Set when another source has won
+            
+        Returns:
+            tuple: (DataFrame or None, timing dict)
+        """
+        import requests
+        from http_client import FetchCancelled
+        
+        start = time.perf_counter()
+        table = None
+        status = 'ok'
+        
+        try:
+            # The client reads in chunks so a losing download is dropped early
+            with span('fetch', {'host': url.split('/')[2]}, url=url) as s:
+                response = self.client.get(url, headers=self.headers, timeout=timeout,
+                                           cancel=cancel)
+                s['status'] = response.status_code
+            
+            if response.status_code != 200:
+                status = f"HTTP {response.status_code}"
+            else:
+                table = find_table(response.text)
+                if table is None:
+                    status = 'no table'
+                elif response.from_cache:
+                    status = 'ok (cache)'
+                elif response.not_modified:
+                    status = 'ok (304)'
+        
+        except FetchCancelled:
+            status = 'cancelled'
+        except requests.exceptions.RequestException as e:
+            status = 'error'
+            print(f"Connection error for {url.split('/')[2]}: {e}")
+        except Exception as e:
+            status = 'error'
+            print(f"Could not parse {url.split('/')[2]}: {e}")
+        
+        timing = {
+            'url': url,
+            'priority': priority,
+            'status': status,
+            'elapsed': round(time.perf_counter() - start, 3),
+            'rows': len(table) if table is not None else 0
+        }
+        return table, timing
+    
+    def load_match_files(self, source, workers=None, event=None):
+        """
+        Derive the table from local ball-by-ball match files instead of
+        scraping (see cricsheet.py)
+        
+        Args:
+            source (str): Directory, zip archive or single match file
+            workers (int): Processes to aggregate with (default: one per CPU)
+            event (str): Only count matches whose event name contains this
+            
+        Returns:
+            bool: True if any match could be read
+        """
+        from cricsheet import load_matches
+        
+        print(f"\nReading ball-by-ball match files from {source}...")
+        with span('ingest') as s:
+            df, summary = load_matches(source, workers, event)
+            s.update(files=summary['files'], matches=summary['matches'],
+                     failed=len(summary['failed']))
+        for name, error in summary['failed'][:5]:
+            print(f"Skipped {name}: {error}")
+        print(f"Aggregated {summary['matches']:,} matches into {len(df):,} players "
+              f"in {summary['elapsed']:.2f}s ({summary['workers']} workers)")
+        if not summary['matches']:
+            return False
+        self.df = df
+        self.data_source = 'cricsheet'
+        return True
+    
     def create_realistic_data(self):
         """
         Create realistic IPL data based on actual statistics
@@ -184,10 +463,12 @@ class IPLScraper:
         ]
         
         self.df = pd.DataFrame(real_ipl_data)
+        self.data_source = 'sample'
         print(f"Created realistic IPL data with {len(self.df)} players")
         print("Note: This is realistic sample data based on actual IPL statistics")
         return True
     
+    @timed('clean_data')
     def clean_data(self):
         """Clean and process the scraped data"""
         if self.df is None or self.df.empty:
@@ -196,61 +477,28 @@ class IPLScraper:
         
         print("\nCleaning and processing data...")
         
-        # Rename columns to standard names
-        column_mapping = {}
-        for col in self.df.columns:
-            col_str = str(col)
-            col_lower = col_str.lower()
-            
-            # Map common column names
-            if 'player' in col_lower or 'batsman' in col_lower or 'name' in col_lower:
-                column_mapping[col] = 'Player'
-            elif 'run' in col_lower and 'sr' not in col_lower:
-                column_mapping[col] = 'Runs'
-            elif 'mat' in col_lower or 'match' in col_lower:
-                column_mapping[col] = 'Matches'
-            elif 'inn' in col_lower and 'innings' not in col_lower:
-                column_mapping[col] = 'Innings'
-            elif 'ave' in col_lower or 'avg' in col_lower:
-                column_mapping[col] = 'Average'
-            elif 'sr' in col_lower or 'strike' in col_lower or 'rate' in col_lower:
-                column_mapping[col] = 'Strike_Rate'
-            elif 'hs' in col_lower or 'high' in col_lower or 'best' in col_lower:
-                column_mapping[col] = 'Highest_Score'
-            elif '100' in col_lower or 'hundred' in col_lower:
-                column_mapping[col] = 'Centuries'
-            elif '50' in col_lower or 'fifty' in col_lower:
-                column_mapping[col] = 'Fifties'
-            elif '4' in col_lower and '6' not in col_lower:
-                column_mapping[col] = 'Fours'
-            elif '6' in col_lower:
-                column_mapping[col] = 'Sixes'
+        # Rename columns to standard names (memoized per header signature)
+        column_mapping, self.unknown_columns = BATTING_SCHEMA.resolve(self.df.columns)
         
         # Apply column mapping
         if column_mapping:
             self.df = self.df.rename(columns=column_mapping)
             print(f"Renamed columns: {list(column_mapping.values())}")
         
+        if self.unknown_columns:
+            print(f"Unrecognized columns (kept as-is): {[str(c) for c in self.unknown_columns]}")
+        
         # Ensure essential columns
         if 'Player' not in self.df.columns and len(self.df.columns) > 0:
-            self.df = self.df.rename(columns={self.df.columns[0]: 'Player'})
-            print("Set first column as 'Player'")
+            first = self.df.columns[0]
+            if first in self.unknown_columns:
+                self.df = self.df.rename(columns={first: 'Player'})
+                print(f"No player column found, using first column '{first}' as 'Player'")
+            else:
+                print(f"Warning: no player column found and first column '{first}' is a stat column")
         
-        # Clean and convert numeric columns
-        if 'Runs' in self.df.columns:
-            self.df['Runs'] = pd.to_numeric(
-                self.df['Runs'].astype(str).str.replace(',', '').str.replace('*', ''), 
-                errors='coerce'
-            ).fillna(0).astype(int)
-        
-        # Clean other numeric columns
-        numeric_cols = ['Matches', 'Innings', 'Average', 'Strike_Rate', 'Centuries', 'Fifties', 'Fours', 'Sixes']
-        for col in numeric_cols:
-            if col in self.df.columns:
-                self.df[col] = pd.to_numeric(
-                    self.df[col].astype(str).str.replace(',', '').str.replace('*', '').str.replace('-', '0'), 
-                    errors='coerce'
-                )
+        # Clean and convert numeric columns in one vectorized pass
+        self._clean_numeric_columns()
         
         # Sort by runs (highest first) if we have runs column
         if 'Runs' in self.df.columns:
@@ -259,22 +507,108 @@ class IPLScraper:
             print("Sorted data by runs (descending)")
         
         # Add insight column based on ranking
-        self.df['Insight'] = self.df.apply(self._get_player_insight, axis=1)
+        self.df['Insight'] = self._get_player_insights(self.df.index)
         print("Added insight column (Legend/Elite/Good)")
         
+        self._compact_dtypes()
+        
         print(f"Data cleaning complete. Final shape: {self.df.shape}")
     
-    def _get_player_insight(self, row):
-        """Categorize players based on their rank"""
-        idx = row.name
+    def _clean_numeric_columns(self):
+        """
+        Convert scraped numeric columns (e.g. '7,263', '113*', '-') to numbers
+        
+        Columns that are already numeric are left alone. Text columns that
+        hold plain numbers are converted directly by numpy. The remaining
+        columns are stacked into one array and parsed in a single
+        to_numeric call, and only the cells that fail (thousands
+        separators, '*', '-') go through one regex pass. A '*' (not out)
+        on a text Highest_Score is kept as the boolean Highest_Score_Not_Out
+        column; an existing flag column next to a numeric score is kept.
+        """
+        columns = [col for col in NUMERIC_COLUMNS if col in self.df.columns]
+        text_cols = [col for col in columns
+                     if not pd.api.types.is_numeric_dtype(self.df[col])]
+        rows = len(self.df)
         
-        if idx < 5:
-            return "Legend"
-        elif idx < 15:
-            return "Elite"
-        else:
-            return "Good"
+        # Not-out flags come from '*' markers, so only text scores reset them;
+        # tables that already carry the flag (e.g. from match files) keep it
+        if 'Highest_Score' in text_cols or (
+                'Highest_Score' in self.df.columns and 'Highest_Score_Not_Out' not in self.df.columns):
+            self.df['Highest_Score_Not_Out'] = False
+        
+        # Fast path: columns that are plain numbers stored as text
+        messy_cols = []
+        for col in text_cols:
+            try:
+                self.df[col] = np.asarray(self.df[col].to_numpy(dtype=object), dtype=float)
+            except (ValueError, TypeError):
+                messy_cols.append(col)
+        
+        if messy_cols:
+            # Column-major ravel keeps each column contiguous
+            raw = self.df[messy_cols].to_numpy(dtype=object).ravel(order='F')
+            values = pd.to_numeric(pd.Series(raw), errors='coerce').to_numpy(dtype=float, copy=True)
+            
+            # Slow path only for the cells that did not parse
+            bad = np.flatnonzero(np.isnan(values) & pd.notna(raw))
+            if len(bad):
+                cells = pd.Series(raw[bad]).astype(str).str.strip()
+                cleaned = cells.str.replace(r'[,*]', '', regex=True).mask(cells == '-', '0')
+                values[bad] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float)
+                
+                if 'Highest_Score' in messy_cols:
+                    start = messy_cols.index('Highest_Score') * rows
+                    in_hs = (bad >= start) & (bad < start + rows)
+                    not_out = np.zeros(rows, dtype=bool)
+                    not_out[bad[in_hs] - start] = cells[in_hs].str.endswith('*').to_numpy()
+                    self.df['Highest_Score_Not_Out'] = not_out
+            
+            values = values.reshape(len(messy_cols), rows)
+            for i, col in enumerate(messy_cols):
+                self.df[col] = values[i]
+        
+        # Counters become integers when nothing is missing
+        for col in columns:
+            if col == 'Runs':
+                self.df[col] = self.df[col].fillna(0).astype(int)
+            elif col in INTEGER_COLUMNS and not self.df[col].isna().any():
+                self.df[col] = self.df[col].astype(int)
+    
+    def _compact_dtypes(self):
+        """
+        Store the table in narrow types
+        
+        Counters become int16 (int32 for Runs or anything that does not
+        fit), Insight becomes a category and player names are interned.
+        """
+        for col in INTEGER_COLUMNS:
+            if col not in self.df.columns or not pd.api.types.is_integer_dtype(self.df[col]):
+                continue
+            target = 'int32' if col == 'Runs' else 'int16'
+            limits = np.iinfo(target)
+            values = self.df[col]
+            if len(values) and (values.min() < limits.min or values.max() > limits.max):
+                target = 'int32'
+            self.df[col] = values.astype(target)
+        
+        if 'Insight' in self.df.columns:
+            self.df['Insight'] = self.df['Insight'].astype(
+                pd.CategoricalDtype(INSIGHT_LEVELS)
+            )
+        
+        if 'Player' in self.df.columns:
+            self.df['Player'] = pd.Series(
+                [sys.intern(str(name)) for name in self.df['Player']],
+                index=self.df.index, dtype=object
+            )
+    
+    def _get_player_insights(self, index):
+        """Categorize players based on their rank"""
+        idx = np.asarray(index)
+        return np.select([idx < 5, idx < 15], INSIGHT_LEVELS[:2], default=INSIGHT_LEVELS[2])
     
+    @timed('save', format='csv')
     def save_to_csv(self, filename="ipl_most_runs_career.csv"):
         """
         Save data to CSV file
@@ -287,23 +621,25 @@ class IPLScraper:
         """
         try:
             if self.df is not None and not self.df.empty:
-                # Add metadata comment at top
-                with open(filename, 'w', encoding='utf-8') as f:
+                # Written to a temp file and renamed, so readers never see half a file
+                with atomic_open(filename, 'w', encoding='utf-8') as f:
+                    # Add metadata comment at top
                     f.write(f"# IPL Most Runs - Career Statistics\n")
                     f.write(f"# Season: {self.season}\n")
                     f.write(f"# Last Updated: {self.last_updated}\n")
                     f.write(f"# Total Players: {len(self.df)}\n")
                     f.write(f"# Data Source: ESPNcricinfo/Alternative Sources\n")
                     f.write(f"# Note: Contains realistic IPL statistics\n")
-                
-                # Append the dataframe
-                self.df.to_csv(filename, mode='a', index=False, encoding='utf-8')
+                    
+                    # Append the dataframe
+                    self.df.to_csv(f, index=False)
                 return True
             return False
         except Exception as e:
             print(f"Error saving CSV: {e}")
             return False
     
+    @timed('save', format='json')
     def save_to_json(self, filename="ipl_most_runs_career.json"):
         """
         Save data to JSON file
@@ -318,18 +654,11 @@ class IPLScraper:
             if self.df is not None and not self.df.empty:
                 # Prepare data with metadata
                 output_data = {
-                    'metadata': {
-                        'season': self.season,
-                        'last_updated': self.last_updated,
-                        'total_players': len(self.df),
-                        'data_source': 'ESPNcricinfo/Alternative Sources',
-                        'description': 'IPL Career Runs Statistics',
-                        'data_quality': 'Realistic IPL data'
-                    },
+                    'metadata': self._metadata(),
                     'players': self.df.to_dict('records')
                 }
                 
-                with open(filename, 'w', encoding='utf-8') as f:
+                with atomic_open(filename, 'w', encoding='utf-8') as f:
                     json.dump(output_data, f, indent=2, ensure_ascii=False)
                 
                 return True
@@ -338,6 +667,214 @@ class IPLScraper:
             print(f"Error saving JSON: {e}")
             return False
     
+    @timed('save', format='columnar')
+    def save_to_columnar(self, filename="ipl_most_runs_career.cols"):
+        """
+        Save data to a memory-mappable columnar file (see columnar.py)
+        
+        Args:
+            filename (str): Output filename
+            
+        Returns:
+            bool: True if successful
+        """
+        try:
+            if self.df is not None and not self.df.empty:
+                write_columnar(self.df, filename, self._metadata())
+                return True
+            return False
+        except Exception as e:
+            print(f"Error saving columnar file: {e}")
+            return False
+    
+    @timed('save_incremental')
+    def save_incremental(self, filename="ipl_most_runs_career.json",
+                         csv_filename="ipl_most_runs_career.csv",
+                         columnar_filename="ipl_most_runs_career.cols",
+                         log_filename=CHANGE_LOG_FILE,
+                         manifest_filename=MANIFEST_FILE,
+                         index_filename=INDEX_FILE):
+        """
+        Save only if the data differs from the last saved JSON
+        
+        Each row is hashed and compared with the previous snapshot. When
+        nothing changed the files are left untouched; otherwise the new
+        version is written to files of its own (see save_version), the
+        diff summary goes into their metadata (so the web tier can tell
+        which rows and columns changed), the manifest is switched to them
+        and the per-player deltas are appended to the change log.
+        
+        Args:
+            filename (str): JSON output, also the snapshot diffed against
+            csv_filename (str): CSV output
+            columnar_filename (str): Columnar output
+            log_filename (str): Change log (JSON lines)
+            manifest_filename (str): Version manifest read by the web tier
+            index_filename (str): Shared query index (see shared_index.py)
+            
+        Returns:
+            ChangeSet: The changes (falsy if nothing changed), or None if
+            there is no data or saving failed
+        """
+        if self.df is None or self.df.empty:
+            return None
+        
+        previous, _ = load_snapshot(filename)
+        changes = diff_records(previous, self.df.to_dict('records'))
+        outputs = (filename, csv_filename, columnar_filename)
+        if not changes and all(os.path.exists(path) for path in outputs):
+            return changes
+        
+        self.snapshot = changes.snapshot
+        self.changes = changes.summary()
+        plain = {'columnar': columnar_filename, 'json': filename, 'csv': csv_filename}
+        files = self.save_version(plain, index_filename, manifest_filename)
+        if files is None:
+            return None
+        
+        self.publish(files, manifest_filename, aliases=plain)
+        append_change_log(changes, self.last_updated, log_filename)
+        return changes
+    
+    def save_version(self, plain, index_filename=INDEX_FILE, manifest_filename=MANIFEST_FILE):
+        """
+        Write the outputs and the shared index under names of this version
+        
+        The names carry the next manifest version and the row snapshot
+        (e.g. ipl_most_runs_career.v8-3fa2c1d0.cols), so the files the
+        current manifest names are never overwritten and the web tier
+        keeps loading them until the new manifest is written.
+        
+        Args:
+            plain (dict): Format ('columnar', 'json', 'csv') -> plain file name
+            index_filename (str): Plain name of the shared index
+            manifest_filename (str): Version manifest the files are for
+            
+        Returns:
+            dict: Format (and 'index' if it was built) -> saved file, or
+            None if saving failed
+        """
+        version = (read_manifest(manifest_filename) or {}).get('version', 0) + 1
+        tag = f"v{version}-{(self.snapshot or '')[:8]}"
+        files = {name: versioned_path(path, tag) for name, path in plain.items()}
+        saved = (self.save_to_json(files['json']) and self.save_to_csv(files['csv'])
+                 and self.save_to_columnar(files['columnar']))
+        if not saved:
+            return None
+        
+        index_path = versioned_path(index_filename, tag)
+        if self.save_index(files['columnar'], index_path):
+            files[INDEX_ENTRY] = index_path
+        return files
+    
+    @timed('save', format='index')
+    def save_index(self, columnar_filename, filename=INDEX_FILE):
+        """
+        Precompute the web tier's query indexes for a saved columnar file
+        
+        Args:
+            columnar_filename (str): Columnar file just saved
+            filename (str): Output filename
+            
+        Returns:
+            bool: True if successful (workers build their own indexes otherwise)
+        """
+        try:
+            write_index(columnar_filename, filename)
+            return True
+        except Exception as e:
+            print(f"Error saving shared index: {e}")
+            return False
+    
+    @timed('publish')
+    def publish(self, files, manifest_filename=MANIFEST_FILE, aliases=None):
+        """
+        Make saved files visible to the web tier as one new version
+        
+        The manifest is written last with the hashes of these files, and
+        the app only accepts a file that matches them, so it never mixes
+        two versions. Once it is in place the plain names (downloads,
+        readers without a manifest) are pointed at the new files and the
+        files of the replaced version are deleted.
+        
+        Args:
+            files (dict): Format ('columnar', 'json', 'csv', 'index') -> saved file
+            manifest_filename (str): Version manifest
+            aliases (dict): Format -> plain name to link to its new file
+            
+        Returns:
+            int: The published version number
+        """
+        previous = read_manifest(manifest_filename)
+        manifest = write_manifest(files, manifest_filename, snapshot=self.snapshot,
+                                  changes=self.changes)
+        self.published_version = manifest['version']
+        
+        aliases = {name: alias for name, alias in (aliases or {}).items()
+                   if alias != files.get(name)}
+        for name, alias in aliases.items():
+            link_file(files[name], alias)
+        remove_superseded(previous, manifest, keep=aliases.values())
+        return manifest['version']
+    
+    def refresh(self, concurrent=True, publish_sample=False, profile=None, matches=None):
+        """
+        Fetch, clean and publish without any prompts (cron, web app worker)
+        
+        Args:
+            concurrent (bool): Query all sources at once
+            publish_sample (bool): Publish the built-in sample data when no
+                source could be scraped (otherwise only if nothing has been
+                published yet)
+            profile (str): 'cpu' or 'memory' to profile this run (see instrument.py)
+            matches (str): Build the table from these ball-by-ball match
+                files instead of scraping
+            
+        Returns:
+            dict: status ('published', 'unchanged', 'skipped' or 'failed'),
+            source, players, version, change counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        result = {'status': 'failed', 'source': None, 'players': 0, 'version': None,
+                  'changes': None}
+        
+        with profiled(profile, 'refresh') as profiler, span('refresh') as s:
+            if matches is None or not self.load_match_files(matches):
+                self.fetch_data(concurrent=concurrent)
+            result['source'] = self.data_source
+            if self.data_source == 'sample' and not publish_sample and os.path.exists(MANIFEST_FILE):
+                # Keep the published data rather than replacing it with samples
+                result['status'] = 'skipped'
+            else:
+                self.clean_data()
+                changes = self.save_incremental()
+                if changes is not None:
+                    result['status'] = 'published' if changes else 'unchanged'
+                    result['players'] = len(self.df)
+                    result['version'] = self.published_version
+                    result['changes'] = changes.summary()['counts']
+            s['status'] = result['status']
+        
+        if profiler is not None:
+            result['profile'] = profiler.path
+        result['elapsed'] = round(time.perf_counter() - started, 3)
+        return result
+    
+    def _metadata(self):
+        """Metadata block stored with the JSON and columnar outputs"""
+        return {
+            'season': self.season,
+            'last_updated': self.last_updated,
+            'total_players': len(self.df),
+            'data_source': SOURCE_LABELS.get(self.data_source, 'ESPNcricinfo/Alternative Sources'),
+            'description': 'IPL Career Runs Statistics',
+            'data_quality': 'Realistic IPL data',
+            'snapshot': self.snapshot,
+            # Only the counts: the full summary goes to the manifest, so it
+            # is not repeated in every API response
+            'changes': self.changes['counts'] if self.changes else None
+        }
+    
     def get_statistics(self):
         """
         Calculate statistics from the data
@@ -433,43 +970,69 @@ class IPLScraper:
                 print(f"Columns: {len(self.df.columns)} columns including Player, Runs, Matches, etc.")
 
 
-def main():
+def parse_args(argv=None):
+    """Command line options (no prompts, so the scraper can run under cron)"""
+    parser = argparse.ArgumentParser(
+        description="Scrape IPL career run scorers and publish the data files")
+    parser.add_argument('--top', type=int, default=10,
+                        help="players shown in the summary (default: 10)")
+    parser.add_argument('--concurrent', action='store_true',
+                        help="query all sources at once instead of one by one")
+    parser.add_argument('--cache-dir',
+                        help="keep downloaded pages in this directory")
+    parser.add_argument('--offline', action='store_true',
+                        help="only use pages from the cache directory")
+    parser.add_argument('--matches', metavar='PATH',
+                        help="build the table from Cricsheet match files (directory or zip) "
+                             "instead of scraping")
+    parser.add_argument('--workers', type=int,
+                        help="processes used to aggregate --matches (default: one per CPU)")
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help="profile the run (cProfile or tracemalloc report in profiles/)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     Main execution function
+    
+    Returns:
+        int: Exit status (0 on success)
+    """
+    args = parse_args(argv)
+    with profiled(args.profile, 'scrape') as profiler:
+        status = run(args)
+    if profiler is not None:
+        print(f"\nProfile written to {profiler.path}")
+    return status
+
+
+def run(args):
+    """
+    Fetch, clean, display and save (the steps of one scraper run)
+    
+    Args:
+        args (Namespace): Parsed command line options
+        
+    Returns:
+        int: Exit status (0 on success)
     """
+    top_n = args.top
+    
     print("\n" + "="*60)
     print("IPL TOP RUN SCORERS SCRAPER")
     print("="*60)
     
-    # Get user preference
-    print("\nHow many top players would you like to see?")
-    print("1. Top 5")
-    print("2. Top 10 (default)")
-    print("3. Top 20")
-    print("4. All players")
-    
-    try:
-        choice = input("\nEnter choice (1-4): ").strip()
-        if choice == '1':
-            top_n = 5
-        elif choice == '3':
-            top_n = 20
-        elif choice == '4':
-            top_n = 50  # Show more if available
-        else:
-            top_n = 10
-    except:
-        top_n = 10
-    
     # Initialize scraper
-    scraper = IPLScraper()
+    scraper = IPLScraper(cache_dir=args.cache_dir, offline=args.offline)
     
     # Step 1: Fetch data
     print(f"\n" + "="*50)
     print("STEP 1: FETCHING DATA")
     print("="*50)
     
-    if not scraper.fetch_data():
+    loaded = bool(args.matches) and scraper.load_match_files(args.matches, args.workers)
+    if not loaded and not scraper.fetch_data(concurrent=args.concurrent):
         print("\nCould not fetch live data. Using realistic IPL data instead.")
         print("The application will still work with accurate statistics")
     
@@ -491,18 +1054,18 @@ def main():
     print("STEP 4: SAVING DATA")
     print("="*50)
     
-    csv_saved = scraper.save_to_csv()
-    json_saved = scraper.save_to_json()
-    
-    if csv_saved:
-        print("Data saved to 'ipl_most_runs_career.csv'")
-    else:
-        print("Failed to save CSV")
+    changes = scraper.save_incremental()
     
-    if json_saved:
-        print("Data saved to 'ipl_most_runs_career.json'")
+    if changes is None:
+        print("Failed to save data files")
+        return 1
+    elif not changes:
+        print("No changes since the last run; data files left as they are")
     else:
-        print("Failed to save JSON")
+        counts = changes.summary()['counts']
+        print(f"Data saved ({counts['added']} added, {counts['updated']} updated, "
+              f"{counts['removed']} removed)")
+        print(f"Changes appended to '{CHANGE_LOG_FILE}'")
     
     # Final output
     print(f"\n" + "="*60)
@@ -519,6 +1082,7 @@ def main():
     print("\nOutput Files Created:")
     print("  ipl_most_runs_career.csv  - CSV format (Excel compatible)")
     print("  ipl_most_runs_career.json - JSON format (API/web ready)")
+    print("  ipl_most_runs_career.cols - Columnar binary (fast web loading)")
     
     print("\nNext Steps:")
     print("  1. Run: python app.py")
@@ -533,7 +1097,8 @@ def main():
     print("  Responsive design")
     
     print("\n" + "="*60)
+    return 0
 
 
 if __name__ == "__main__":
-    main ()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+IPL SHARED INDEX
+Query indexes and aggregates precomputed once per published version, so
+every web worker maps the same read-only file instead of building its own
+
+The loader (the scraper's publish step, or this module run as a script)
+writes the index next to the columnar data file and lists it in the
+manifest. Workers attach to both files with mmap: the OS page cache holds
+one copy however many workers there are, and a worker that starts cold
+serves its first query without building anything. A refresh publishes a
+new data file, a new index and then a new manifest, so workers swap to
+the new version together; readers of the old one keep their mappings
+until they drop them.
+
+Usage:
+    python shared_index.py    (index the currently published columnar file)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from columnar import ColumnarFile, write_arrays
+from publish import INDEX_ENTRY, MANIFEST_FILE, read_manifest, remove_superseded, write_manifest
+
+INDEX_FILE = 'ipl_most_runs_career.idx'
+INDEX_KIND = 'ipl-index'
+
+
+def write_index(columnar_path, path=INDEX_FILE):
+    """
+    Build every query index of a columnar file and write them to path
+
+    The index is keyed on the data hash in the columnar file's header,
+    the same hash readers get from the file they have mapped.
+
+    Args:
+        columnar_path (str): Columnar data file to index
+        path (str): Index file to write
+
+    Returns:
+        str: path
+    """
+    # The dataset module is only needed by the loader, not by readers
+    from dataset import Dataset, PlayerTable
+
+    source = ColumnarFile(columnar_path)
+    dataset = Dataset(PlayerTable.from_columnar(source), source.metadata)
+    arrays, metadata = dataset.index.export()
+    arrays['prefix_runs'] = np.asarray(dataset.prefix_runs)
+    metadata.update({
+        'kind': INDEX_KIND,
+        'data_sha256': source.data_sha256,
+        'rows': len(dataset.table),
+        'has_runs': dataset.has_runs,
+        'stats': dataset.stats
+    })
+    write_arrays(arrays, path, metadata)
+    return path
+
+
+def open_index(entry, data_sha256):
+    """
+    Map a published index file if it belongs to the given data file
+
+    Args:
+        entry (dict): Manifest entry (path, size) of the index
+        data_sha256 (str): Data hash from the header of the mapped
+            columnar file (ColumnarFile.data_sha256)
+
+    Returns:
+        ColumnarFile: The mapped index, or None if it is missing, from
+        another version or unreadable (the worker then builds its own)
+    """
+    if not entry:
+        return None
+    try:
+        index = ColumnarFile(entry['path'])
+    except (OSError, ValueError):
+        return None
+    if index.size != entry['size'] or index.metadata.get('kind') != INDEX_KIND \
+            or index.metadata.get('data_sha256') != data_sha256:
+        return None
+    return index
+
+
+def main(manifest_path=MANIFEST_FILE, path=None):
+    """
+    Index the published columnar file and publish the index with it
+
+    Args:
+        manifest_path (str): Version manifest
+        path (str): Index file (default: named after the columnar file,
+            e.g. players.v3-1a2b3c4d.cols -> players.v3-1a2b3c4d.idx)
+
+    Returns:
+        int: Exit status (0 on success)
+    """
+    manifest = read_manifest(manifest_path)
+    columnar = (manifest or {}).get('files', {}).get('columnar')
+    if not columnar:
+        print(f"No published columnar file in '{manifest_path}'")
+        return 1
+
+    path = path or f"{os.path.splitext(columnar['path'])[0]}.idx"
+    write_index(columnar['path'], path)
+    files = {name: entry['path'] for name, entry in manifest['files'].items()}
+    files[INDEX_ENTRY] = path
+    published = write_manifest(files, manifest_path, snapshot=manifest.get('snapshot'),
+                               changes=manifest.get('changes'))
+    remove_superseded(manifest, published)
+    version = published['version']
+    print(f"Published '{path}' for '{columnar['path']}' (version {version})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
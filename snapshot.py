@@ -0,0 +1,187 @@
+"""
+IPL DATA SNAPSHOTS
+Row hashing and diffing between the published dataset and a new scrape
+"""
+
+import hashlib
+import json
+import os
+
+CHANGE_LOG_FILE = 'ipl_changes.jsonl'
+
+# Name lists stored in the metadata are capped; the change log has them all
+MAX_LISTED = 500
+
+
+def row_hash(record):
+    """Stable hash of one player record (key order does not matter)"""
+    text = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def snapshot_hash(hashes):
+    """Hash of a whole table from its row hashes, in row order"""
+    digest = hashlib.sha256()
+    for value in hashes:
+        digest.update(value.encode('ascii'))
+    return digest.hexdigest()
+
+
+def load_snapshot(path):
+    """
+    Read the records and metadata of a published JSON file
+
+    Returns:
+        tuple: (records, metadata), or ([], {}) if there is no usable file
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return [], {}
+    return data.get('players', []), data.get('metadata', {})
+
+
+class ChangeSet:
+    """
+    Difference between two versions of the player table
+
+    Attributes:
+        added (list): Records of new players
+        removed (list): Names of players no longer present
+        updated (dict): Player -> {field: [old, new]}
+        rows (list): Positions in the new table of added/updated players
+        columns (set): Fields whose values changed
+        same_order (bool): Players appear in the same order as before
+        snapshot (str): Hash of the new table
+        previous_snapshot (str): Hash of the table it was diffed against
+    """
+
+    def __init__(self, added, removed, updated, rows, columns, same_order,
+                 snapshot, previous_snapshot):
+        self.added = added
+        self.removed = removed
+        self.updated = updated
+        self.rows = rows
+        self.columns = columns
+        self.same_order = same_order
+        self.snapshot = snapshot
+        self.previous_snapshot = previous_snapshot
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated) or not self.same_order
+
+    def summary(self):
+        """Compact form stored in the metadata of the published files"""
+        def listed(names):
+            return names if len(names) <= MAX_LISTED else None
+
+        return {
+            'previous_snapshot': self.previous_snapshot,
+            'added': listed([record.get('Player') for record in self.added]),
+            'removed': listed(self.removed),
+            'updated': listed(list(self.updated)),
+            'rows': listed(self.rows),
+            'counts': {'added': len(self.added), 'removed': len(self.removed),
+                       'updated': len(self.updated)},
+            'columns': sorted(self.columns),
+            'same_order': self.same_order
+        }
+
+    def log_entries(self, timestamp):
+        """One change log line per player"""
+        for record in self.added:
+            yield {'at': timestamp, 'player': record.get('Player'), 'change': 'added',
+                   'fields': record}
+        for player, fields in self.updated.items():
+            yield {'at': timestamp, 'player': player, 'change': 'updated', 'fields': fields}
+        for player in self.removed:
+            yield {'at': timestamp, 'player': player, 'change': 'removed'}
+
+
+def _same(a, b):
+    """Equality that treats two missing float values as equal"""
+    return a == b or (isinstance(a, float) and isinstance(b, float) and a != a and b != b)
+
+
+def diff_records(previous, current, key='Player'):
+    """
+    Compare two lists of player records by player name
+
+    Only rows whose hash differs are compared field by field.
+
+    Args:
+        previous (list): Records of the last published table
+        current (list): Records of the new table
+        key (str): Field identifying a player
+
+    Returns:
+        ChangeSet: What changed
+    """
+    old_hashes = [row_hash(record) for record in previous]
+    new_hashes = [row_hash(record) for record in current]
+    old_by_key = {record.get(key): (h, record) for h, record in zip(old_hashes, previous)}
+
+    added, updated, rows, columns = [], {}, [], set()
+    seen = set()
+    for position, (h, record) in enumerate(zip(new_hashes, current)):
+        name = record.get(key)
+        seen.add(name)
+        old = old_by_key.get(name)
+        if old is None:
+            added.append(record)
+            rows.append(position)
+        elif old[0] != h:
+            old_record = old[1]
+            fields = {field: [old_record.get(field), record.get(field)]
+                      for field in set(old_record) | set(record)
+                      if not _same(old_record.get(field), record.get(field))}
+            updated[name] = fields
+            columns.update(fields)
+            rows.append(position)
+
+    removed = [name for name in old_by_key if name not in seen]
+    same_order = [r.get(key) for r in previous] == [r.get(key) for r in current]
+    return ChangeSet(added, removed, updated, rows, columns, same_order,
+                     snapshot_hash(new_hashes), snapshot_hash(old_hashes) if previous else None)
+
+
+def append_change_log(changes, timestamp, path=CHANGE_LOG_FILE):
+    """
+    Append the per-player deltas of a change set to a JSON-lines log
+
+    Args:
+        changes (ChangeSet): Changes to record
+        timestamp (str): When the new data was scraped
+        path (str): Log file
+    """
+    lines = [json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+             for entry in changes.log_entries(timestamp)]
+    if not lines:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def changed_columns(changes, previous_metadata):
+    """
+    Columns that changed between two published datasets
+
+    Args:
+        changes (dict): ChangeSet.summary() published with the new
+            dataset (the manifest's 'changes'), or None
+        previous_metadata (dict): Metadata of the dataset it replaces
+
+    Returns:
+        set: Changed columns, or None when the new dataset was not diffed
+        against the previous one with rows in the same order (callers
+        should then rebuild everything)
+    """
+    if not changes or not changes.get('same_order'):
+        return None
+    if not previous_metadata.get('snapshot') or \
+            changes.get('previous_snapshot') != previous_metadata['snapshot']:
+        return None
+    return set(changes.get('columns', ()))
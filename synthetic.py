@@ -0,0 +1,386 @@
+"""
+IPL SYNTHETIC DATA
+Deterministic, vectorized generator of plausible career batting records,
+as clean tables or as messy source-style tables/HTML for stress tests
+
+Rows are generated in fixed blocks, each from its own seed derived from
+(seed, block number), so the same seed gives the same players however
+the output is chunked, and any slice can be generated on its own.
+
+Usage:
+    python synthetic.py PLAYERS [--seed 0] [--html page.html] [--output DIR]
+        (without --html the raw table goes through clean_data and is
+        saved and published like a scrape, into DIR (default
+        synthetic_data/) so real published data is never replaced)
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Directory synthetic datasets are published to by default
+OUTPUT_DIR = 'synthetic_data'
+
+# Rows per generator block (the unit of determinism)
+BLOCK = 65_536
+
+FIRST_NAMES = np.array([
+    'Aarav', 'Abhishek', 'Ajay', 'Akash', 'Amit', 'Anil', 'Arjun', 'Ashwin', 'Axar', 'Deepak',
+    'Devdutt', 'Dhruv', 'Faf', 'Glenn', 'Hardik', 'Harshal', 'Ishan', 'Jasprit', 'Jos', 'Karun',
+    'Kedar', 'Krunal', 'Kuldeep', 'Manish', 'Mayank', 'Mohit', 'Murali', 'Nitish', 'Parthiv',
+    'Prithvi', 'Rahul', 'Rajat', 'Ravi', 'Riyan', 'Rohit', 'Ruturaj', 'Sai', 'Sanju', 'Sarfaraz',
+    'Shikhar', 'Shivam', 'Shreyas', 'Shubman', 'Suresh', 'Surya', 'Tilak', 'Umesh', 'Varun',
+    'Venkatesh', 'Virat', 'Washington', 'Yashasvi', 'Yusuf', 'Ambati', 'Andre', 'David', 'Jonny',
+    'Kane', 'Marcus', 'Quinton', 'Rashid', 'Shane', 'Trent'
+])
+LAST_NAMES = np.array([
+    'Agarwal', 'Bairstow', 'Buttler', 'Chahar', 'de Kock', 'Dhawan', 'Dube', 'Gaikwad', 'Gill',
+    'Iyer', 'Jaiswal', 'Jadeja', 'Karthik', 'Kishan', 'Kohli', 'Livingstone', 'Maxwell', 'Miller',
+    'Nair', 'Padikkal', 'Pandey', 'Pandya', 'Patel', 'Pathan', 'Patidar', 'Pollard', 'Rahane',
+    'Raina', 'Rana', 'Rayudu', 'Russell', 'Samson', 'Sharma', 'Shaw', 'Stoinis', 'Sudharsan',
+    'Sundar', 'Thakur', 'Tripathi', 'Uthappa', 'Varma', 'Vijay', 'Warner', 'Watson',
+    'Williamson', 'Yadav', 'Bravo', 'Gayle', 'Hussey', 'Jayawardene', 'Kallis', 'Pietersen',
+    'Pant', 'Rahul', 'Smith', 'Narine', 'Head', 'Klaasen', 'Marsh', 'Green', 'Conway', 'Short'
+])
+
+# Headers of the source-style table (ESPNcricinfo career records)
+RAW_HEADERS = ['Player', 'Span', 'Mat', 'Inns', 'NO', 'Runs', 'HS', 'Ave', 'BF', 'SR',
+               '100', '50', '0', '4s', '6s']
+
+ROW_TEMPLATE = '<tr><td>' + '</td><td>'.join(['{}'] * len(RAW_HEADERS)) + '</td></tr>'
+
+# Columns where a '-' placeholder may stand in for a value
+PLACEHOLDER_COLUMNS = ('100', '50', '0', '4s', '6s')
+
+# Text of small non-negative integers, for fast lookups instead of formatting
+_NUMBERS = np.arange(10_000).astype('U4')
+_PADDED = np.char.zfill(np.arange(1000).astype('U3'), 3)
+_PAIRS = np.char.zfill(np.arange(100).astype('U2'), 2)
+
+
+def _player_names(index):
+    """Unique names for global row numbers (a fixed bijection over the name pools)"""
+    combos = len(FIRST_NAMES) * len(LAST_NAMES)
+    # 7919 is prime and does not divide combos, so this permutes 0..combos-1
+    slot = (index % combos) * 7919 % combos
+    names = np.char.add(np.char.add(FIRST_NAMES[slot % len(FIRST_NAMES)], ' '),
+                        LAST_NAMES[slot // len(FIRST_NAMES)]).astype('U40')
+    repeat = index // combos
+    extra = repeat > 0
+    names[extra] = np.char.add(np.char.add(names[extra], ' '), (repeat[extra] + 1).astype(str))
+    return names
+
+
+def _block(seed, number):
+    """All columns of one generator block, as numbers"""
+    rng = np.random.default_rng([seed, number])
+    n = BLOCK
+    skill = rng.standard_normal(n)
+
+    matches = np.clip(np.rint(rng.lognormal(2.6, 1.0, n)), 1, 260).astype(np.int32)
+    innings = np.clip(np.rint(matches * rng.beta(6, 1.5, n)), 1, matches).astype(np.int32)
+    not_outs = rng.binomial(innings, np.clip(0.12 - 0.03 * skill, 0.02, 0.5)).astype(np.int32)
+    outs = innings - not_outs
+
+    # Underlying batting average: most players in the teens, a few above 40
+    true_average = np.clip(np.exp(2.85 + 0.4 * skill), 2, 55)
+    runs = np.rint(true_average * np.maximum(outs, 0.5) * rng.uniform(0.85, 1.15, n)).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average = np.where(outs > 0, runs / outs, np.nan)
+
+    target_sr = np.clip(rng.normal(122 + 9 * skill, 14), 40, 260)
+    balls = np.where(runs > 0, np.maximum(np.rint(runs * 100 / target_sr), 1), 0).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strike_rate = np.where(balls > 0, runs * 100 / balls, np.nan)
+
+    hundreds = rng.poisson(innings * np.clip((true_average - 18) / 1500, 0, 0.08))
+    hundreds = np.minimum(hundreds, runs // 100)
+    fifties = rng.poisson(innings * np.clip((true_average - 8) / 250, 0, 0.35))
+    fifties = np.minimum(fifties, (runs - 100 * hundreds) // 50)
+
+    base = true_average * rng.uniform(1.2, 3.5, n)
+    highest = np.where(hundreds > 0, 100 + rng.integers(0, 76, n),
+                       np.where(fifties > 0, np.clip(base, 50, 99), np.clip(base, 0, 49)))
+    highest = np.minimum(np.rint(highest), runs).astype(np.int32)
+    highest_not_out = (not_outs > 0) & (rng.random(n) < 0.25)
+    ducks = rng.binomial(outs, np.clip(0.08 - 0.02 * skill, 0.01, 0.3)).astype(np.int32)
+
+    six_share = np.clip(0.1 + (strike_rate - 120) / 300 + rng.normal(0, 0.05, n), 0.02, 0.5)
+    fours = np.rint(runs * rng.uniform(0.35, 0.55, n) / 4).astype(np.int32)
+    sixes = np.rint(runs * np.nan_to_num(six_share, nan=0.02) / 6).astype(np.int32)
+
+    first = rng.integers(2008, 2025, n)
+    seasons = np.clip(np.ceil(matches / rng.uniform(8, 15, n)), 1, 2025 - first).astype(np.int32)
+
+    return {
+        'span_start': first.astype(np.int32),
+        'span_end': (first + seasons - 1).astype(np.int32),
+        'matches': matches,
+        'innings': innings,
+        'not_outs': not_outs,
+        'runs': runs,
+        'highest': highest,
+        'highest_not_out': highest_not_out,
+        'average': average,
+        'balls': balls,
+        'strike_rate': strike_rate,
+        'hundreds': hundreds.astype(np.int32),
+        'fifties': fifties.astype(np.int32),
+        'ducks': ducks,
+        'fours': fours,
+        'sixes': sixes,
+        # Decides which cells of the raw table are '-' placeholders
+        'placeholder': rng.random(n),
+    }
+
+
+def generate(players, seed=0, start=0):
+    """
+    Career records of players start .. start + players - 1
+
+    Args:
+        players (int): Number of rows
+        seed (int): Seed; the same seed always gives the same players
+        start (int): Global row number of the first player
+
+    Returns:
+        dict: Field -> NumPy array (numbers, NaN where undefined) plus
+        'player' with the names
+    """
+    stop = start + players
+    parts = []
+    for number in range(start // BLOCK, -(-stop // BLOCK)):
+        block = _block(seed, number)
+        lo = max(start - number * BLOCK, 0)
+        hi = min(stop - number * BLOCK, BLOCK)
+        parts.append({name: values[lo:hi] for name, values in block.items()})
+
+    columns = {name: np.concatenate([part[name] for part in parts]) if parts
+               else np.empty(0) for name in (parts[0] if parts else _block(seed, 0))}
+    columns['player'] = _player_names(np.arange(start, stop, dtype=np.int64))
+    return columns
+
+
+def clean_frame(players, seed=0):
+    """
+    A table shaped like clean_data's output, highest run scorer first
+
+    Returns:
+        DataFrame: Player, Runs, ..., Highest_Score_Not_Out and Insight
+    """
+    import pandas as pd
+
+    columns = generate(players, seed)
+    order = np.argsort(-columns['runs'], kind='stable')
+    rank = np.arange(players)
+    return pd.DataFrame({
+        'Player': columns['player'][order].astype(object),
+        'Runs': columns['runs'][order],
+        'Matches': columns['matches'][order],
+        'Innings': columns['innings'][order],
+        'Average': np.round(columns['average'][order], 2),
+        'Strike_Rate': np.round(columns['strike_rate'][order], 2),
+        'Highest_Score': columns['highest'][order],
+        'Centuries': columns['hundreds'][order],
+        'Fifties': columns['fifties'][order],
+        'Fours': columns['fours'][order],
+        'Sixes': columns['sixes'][order],
+        'Highest_Score_Not_Out': columns['highest_not_out'][order],
+        'Insight': np.select([rank < 5, rank < 15], ['Legend', 'Elite'],
+                             default='Good').astype(object),
+    })
+
+
+def _text(values):
+    """Non-negative integers as text"""
+    values = np.asarray(values, dtype=np.int64)
+    if values.size and values.max() >= len(_NUMBERS):
+        return values.astype('U21')
+    return _NUMBERS[values]
+
+
+def with_commas(values):
+    """Non-negative integers as text with thousands separators ('7,263')"""
+    values = np.asarray(values, dtype=np.int64)
+    rest = values // 1000
+    small = rest == 0
+    text = np.empty(len(values), dtype='U26')
+    text[small] = _text(values[small])
+    big = ~small
+    if big.any():
+        text[big] = np.char.add(np.char.add(with_commas(rest[big]), ','),
+                                _PADDED[values[big] % 1000])
+    return text
+
+
+def _decimal(values, placeholder='-'):
+    """Floats as text with two decimals, NaN as the placeholder"""
+    missing = np.isnan(values)
+    cents = np.rint(np.where(missing, 0, values) * 100).astype(np.int64)
+    text = np.char.add(np.char.add(_text(cents // 100), '.'), _PAIRS[cents % 100])
+    text[missing] = placeholder
+    return text
+
+
+def raw_columns(columns, placeholders=0.03):
+    """
+    Format generated columns the way source tables print them
+
+    Runs, balls faced and fours get thousands separators, HS a '*' when
+    not out, averages/strike rates without a value a '-', and a fraction
+    of the counter cells a '-' placeholder.
+
+    Args:
+        columns (dict): Output of generate()
+        placeholders (float): Fraction of counter cells shown as '-'
+
+    Returns:
+        dict: Header (RAW_HEADERS) -> array of strings
+    """
+    highest = _text(columns['highest']).astype('U8')
+    highest[columns['highest_not_out']] = np.char.add(highest[columns['highest_not_out']], '*')
+    raw = {
+        'Player': columns['player'],
+        'Span': np.char.add(np.char.add(_text(columns['span_start']), '-'),
+                            _text(columns['span_end'])),
+        'Mat': _text(columns['matches']),
+        'Inns': _text(columns['innings']),
+        'NO': _text(columns['not_outs']),
+        'Runs': with_commas(columns['runs']),
+        'HS': highest,
+        'Ave': _decimal(columns['average']),
+        'BF': with_commas(columns['balls']),
+        'SR': _decimal(columns['strike_rate']),
+        '100': _text(columns['hundreds']),
+        '50': _text(columns['fifties']),
+        '0': _text(columns['ducks']),
+        '4s': with_commas(columns['fours']),
+        '6s': _text(columns['sixes']),
+    }
+    # Each placeholder column uses its own slice of the uniform draw
+    for i, name in enumerate(PLACEHOLDER_COLUMNS):
+        low = i * placeholders
+        hide = (columns['placeholder'] >= low) & (columns['placeholder'] < low + placeholders)
+        raw[name] = raw[name].copy()
+        raw[name][hide] = '-'
+    return raw
+
+
+def raw_frame(players, seed=0, placeholders=0.03):
+    """
+    A source-style table of text cells, highest run scorer first (what
+    extract_table returns for a scraped page, ready for clean_data)
+
+    Returns:
+        DataFrame: RAW_HEADERS columns, every cell a string
+    """
+    import pandas as pd
+
+    columns = generate(players, seed)
+    order = np.argsort(-columns['runs'], kind='stable')
+    columns = {name: values[order] for name, values in columns.items()}
+    raw = raw_columns(columns, placeholders)
+    return pd.DataFrame({name: np.asarray(values, dtype=object) for name, values in raw.items()})
+
+
+def html_rows(players, seed=0, placeholders=0.03, chunk_rows=4 * BLOCK):
+    """
+    Yield the <tr> rows of a source-style stats table in chunks
+
+    Rows come in generation order (not sorted), so any number of players
+    can be written with memory bounded by chunk_rows.
+
+    Yields:
+        str: Rows of one chunk
+    """
+    for start in range(0, players, chunk_rows):
+        raw = raw_columns(generate(min(chunk_rows, players - start), seed, start), placeholders)
+        # str.format over lists beats growing fixed-width arrays cell by cell
+        yield '\n'.join(map(ROW_TEMPLATE.format, *(raw[name].tolist() for name in RAW_HEADERS))) + '\n'
+
+
+def write_html(path, players, seed=0, placeholders=0.03, filler_tables=5):
+    """
+    Write an ESPN-like page: unrelated tables, then the stats table
+
+    Args:
+        path (str): Output file
+        players (int): Rows of the stats table
+        seed (int): Generator seed
+        placeholders (float): Fraction of counter cells shown as '-'
+        filler_tables (int): Unrelated tables before the stats table
+
+    Returns:
+        int: Bytes written
+    """
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        def emit(text):
+            nonlocal written
+            written += f.write(text)
+
+        emit('<html><head><title>Most runs in career</title></head><body>\n')
+        for t in range(filler_tables):
+            emit('<table><thead><tr><th>Date</th><th>Match</th><th>Venue</th></tr></thead><tbody>')
+            emit(''.join(f'<tr><td>2024-04-{r % 28 + 1:02}</td><td>Match {t}-{r}</td>'
+                         f'<td>Ground {r}</td></tr>' for r in range(20)))
+            emit('</tbody></table>\n')
+
+        emit('<table><thead><tr>' + ''.join(f'<th>{h}</th>' for h in RAW_HEADERS)
+             + '</tr></thead><tbody>\n')
+        for chunk in html_rows(players, seed, placeholders):
+            emit(chunk)
+        emit('</tbody></table>\n</body></html>\n')
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic IPL batting records")
+    parser.add_argument('players', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--placeholders', type=float, default=0.03,
+                        help="fraction of counter cells written as '-'")
+    parser.add_argument('--html', help="write a source-style page here instead of publishing")
+    parser.add_argument('--output', default=OUTPUT_DIR,
+                        help=f"directory to publish into (default: {OUTPUT_DIR})")
+    parser.add_argument('--force', action='store_true',
+                        help="allow publishing into the current directory over real data")
+    args = parser.parse_args(argv)
+
+    if args.html:
+        size = write_html(args.html, args.players, args.seed, args.placeholders)
+        print(f"Wrote {args.players:,} players to {args.html} ({size / 1e6:,.1f} MB)")
+        return 0
+
+    output = os.path.abspath(args.output)
+    if output == os.getcwd() and not args.force:
+        print("Refusing to publish synthetic data over the current directory (use --force)")
+        return 2
+
+    from scraper import IPLScraper
+
+    scraper = IPLScraper()
+    scraper.df = raw_frame(args.players, args.seed, args.placeholders)
+    scraper.data_source = 'synthetic'
+    scraper.clean_data()
+
+    # Saved under the usual file names, so the app can be run from output
+    os.makedirs(output, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(output)
+    try:
+        changes = scraper.save_incremental()
+    finally:
+        os.chdir(cwd)
+    if changes is None:
+        print("Failed to save data files")
+        return 1
+    print(f"Published {len(scraper.df):,} synthetic players to {output} "
+          f"(version {scraper.published_version})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
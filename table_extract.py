@@ -0,0 +1,127 @@
+"""
+IPL SCRAPER TABLE EXTRACTOR
+Streams page HTML and builds only the stats table we need
+"""
+
+import pandas as pd
+from lxml import etree
+
+# Header keywords that identify the player stats table
+STATS_KEYWORDS = ('player', 'runs', 'matches')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _chunks(source):
+    """Yield the page in pieces so parsing can stop part way through"""
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), CHUNK_SIZE):
+            yield source[start:start + CHUNK_SIZE]
+    else:
+        yield from source
+
+
+def _cell_text(element):
+    return ' '.join(''.join(element.itertext()).split())
+
+
+def _release(element):
+    """Free a finished element and the empty siblings before it"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _to_frame(header, rows):
+    """Build a DataFrame, converting columns that are fully numeric"""
+    width = len(header) if header else max((len(r) for r in rows), default=0)
+    rows = [(r + [None] * width)[:width] for r in rows]
+    df = pd.DataFrame(rows, columns=header if header else None)
+
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def extract_table(source, keywords=STATS_KEYWORDS, min_columns=4, fallback_rows=None):
+    """
+    Find the first table whose header matches, without parsing the rest
+
+    The HTML is fed to an lxml pull parser in chunks. Rows of tables
+    that do not match are dropped as soon as they close, and parsing
+    stops as soon as the matching table closes, so only one table is
+    ever turned into a DataFrame.
+
+    Args:
+        source (str | bytes | iterable): Page HTML, or an iterable of chunks
+        keywords (tuple): Header must contain one of these (None: any table)
+        min_columns (int): Minimum number of header cells
+        fallback_rows (int): If nothing matches, return the first table
+            when it has more than this many rows (None: no fallback)
+
+    Returns:
+        DataFrame: The matching table, or None
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+
+    # One entry per open <table>: [header, rows, state]
+    stack = []
+    first_table = None
+    row = []
+
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            tag = element.tag
+            if event == 'start':
+                if tag == 'table':
+                    stack.append([None, [], 'open'])
+                elif tag == 'tr':
+                    row = []
+                continue
+
+            if not stack:
+                # Nothing outside tables is needed
+                _release(element)
+                continue
+            table = stack[-1]
+
+            if tag in ('th', 'td'):
+                # Cells of a rejected table are not worth reading
+                if table[2] != 'skip' or first_table is None:
+                    row.append((tag, _cell_text(element)))
+
+            elif tag == 'tr':
+                texts = [text for _, text in row]
+                if table[0] is None and row and all(cell == 'th' for cell, _ in row):
+                    table[0] = texts
+                    if keywords is not None:
+                        header = ' '.join(texts).lower()
+                        matched = len(texts) >= min_columns and any(k in header for k in keywords)
+                        table[2] = 'match' if matched else 'skip'
+                elif row and (table[2] != 'skip' or first_table is None):
+                    table[1].append(texts)
+                # Rows are copied out, free the parsed elements
+                _release(element)
+
+            elif tag == 'table':
+                stack.pop()
+                header, rows, state = table
+                if state == 'match' or (keywords is None and rows):
+                    parser.close()
+                    return _to_frame(header, rows)
+                if first_table is None:
+                    first_table = (header, rows)
+                _release(element)
+
+    parser.close()
+
+    if fallback_rows is not None and first_table and len(first_table[1]) > fallback_rows:
+        return _to_frame(*first_table)
+    return None
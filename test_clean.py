@@ -0,0 +1,58 @@
+"""
+Check that scraped numeric columns are parsed into numbers
+"""
+
+import numpy as np
+import pandas as pd
+
+from scraper import IPLScraper
+
+
+def clean(columns):
+    scraper = IPLScraper()
+    scraper.df = pd.DataFrame(columns)
+    scraper._clean_numeric_columns()
+    return scraper.df
+
+
+def test_separators_not_outs_and_dashes():
+    df = clean({
+        'Player': ['A', 'B', 'C', 'D'],
+        'Runs': ['7,263', '6,634', '45', '-'],
+        'Highest_Score': ['113*', '109', '-', '52*'],
+        'Average': ['37.24', '-', '29.5', '12'],
+        'Sixes': ['1,024', '292', '0', '-'],
+    })
+
+    assert df['Runs'].tolist() == [7263, 6634, 45, 0]
+    assert df['Highest_Score'].tolist() == [113, 109, 0, 52]
+    assert df['Highest_Score_Not_Out'].tolist() == [True, False, False, True]
+    assert df['Sixes'].tolist() == [1024, 292, 0, 0]
+    assert df['Average'].tolist() == [37.24, 0.0, 29.5, 12.0]
+    assert pd.api.types.is_integer_dtype(df['Runs'])
+    assert pd.api.types.is_integer_dtype(df['Highest_Score'])
+
+
+def test_plain_text_numbers_take_the_fast_path():
+    df = clean({'Runs': ['10', '20'], 'Strike_Rate': ['130.5', '99']})
+    assert df['Runs'].tolist() == [10, 20]
+    assert df['Strike_Rate'].tolist() == [130.5, 99.0]
+    assert 'Highest_Score_Not_Out' not in df.columns
+
+
+def test_unparseable_cells_become_missing_and_runs_zero():
+    df = clean({'Runs': ['1,000', 'n/a', None], 'Matches': ['3', 'DNB', '5']})
+    assert df['Runs'].tolist() == [1000, 0, 0]
+    # A missing counter keeps the column as floats
+    assert df['Matches'].iloc[0] == 3 and np.isnan(df['Matches'].iloc[1])
+    assert not pd.api.types.is_integer_dtype(df['Matches'])
+
+
+def test_numeric_scores_keep_their_not_out_flag():
+    df = clean({'Runs': [120, 80], 'Highest_Score': [101, 64],
+                'Highest_Score_Not_Out': [True, False]})
+    assert df['Highest_Score_Not_Out'].tolist() == [True, False]
+
+    # Without a flag column every numeric score counts as out
+    df = clean({'Runs': [120], 'Highest_Score': [101]})
+    assert df['Highest_Score_Not_Out'].tolist() == [False]
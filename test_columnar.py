@@ -0,0 +1,60 @@
+"""
+Round-trip DataFrames through the columnar format
+"""
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarFile, read_columnar, write_arrays, write_columnar
+
+
+def make_frame():
+    return pd.DataFrame({
+        'Player': ['Virat Kohli', 'Rashid Khan', '', 'Ñandú Ürün'],
+        'Runs': np.array([7263, 0, 42, 1 << 40], dtype=np.int64),
+        'Matches': np.array([237, 1, 3, 12], dtype=np.int16),
+        'Average': [37.25, np.nan, 0.0, 12.5],
+        'Highest_Score_Not_Out': [True, False, False, True],
+        'Insight': pd.Categorical(['Legend', 'Good', 'Good', 'Elite']),
+    })
+
+
+def test_round_trip(tmp_path):
+    df = make_frame()
+    path = str(tmp_path / 'players.cols')
+    metadata = {'season': 'IPL Career Runs', 'total_players': len(df)}
+    write_columnar(df, path, metadata)
+
+    read, read_metadata = read_columnar(path)
+    assert read_metadata == metadata
+    assert list(read.columns) == list(df.columns)
+    assert read['Player'].tolist() == df['Player'].tolist()
+    np.testing.assert_array_equal(read['Runs'], df['Runs'])
+    assert read['Matches'].dtype == np.int16
+    np.testing.assert_array_equal(read['Average'], df['Average'])
+    assert read['Highest_Score_Not_Out'].tolist() == df['Highest_Score_Not_Out'].tolist()
+    assert read['Insight'].tolist() == df['Insight'].tolist()
+    assert list(read['Insight'].cat.categories) == list(df['Insight'].cat.categories)
+
+
+def test_selected_columns_and_lazy_reads(tmp_path):
+    path = str(tmp_path / 'players.cols')
+    write_columnar(make_frame(), path)
+
+    read, _ = read_columnar(path, columns=['Runs', 'Player'])
+    assert list(read.columns) == ['Runs', 'Player']
+
+    source = ColumnarFile(path)
+    assert source.length == 4
+    assert source.column('Player')[1:3] == ['Rashid Khan', '']
+    assert source.column('Runs').flags.writeable is False
+
+
+def test_arrays_of_any_length(tmp_path):
+    path = str(tmp_path / 'index.cols')
+    write_arrays({'order': np.array([3, 1, 2]), 'names': ['b', 'a']}, path, {'kind': 'test'})
+
+    source = ColumnarFile(path)
+    assert source.metadata == {'kind': 'test'}
+    assert source.column('order').tolist() == [3, 1, 2]
+    assert list(source.column('names')) == ['b', 'a']
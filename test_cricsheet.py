@@ -0,0 +1,121 @@
+"""
+Check the batting totals cricsheet.aggregate_match derives from
+ball-by-ball match documents
+"""
+
+import json
+
+from benchmarks.bench_ingest import to_yaml_layout
+from cricsheet import (BALLS, FIFTIES, FOURS, HIGHEST, HIGHEST_NOT_OUT, HUNDREDS, INNINGS,
+                       MATCHES, NOT_OUTS, RUNS, SIXES, aggregate_match, ingest, merge_totals,
+                       to_frame)
+
+
+def ball(batter, runs, non_striker='B', bowler='X', **extra):
+    delivery = {'batter': batter, 'bowler': bowler, 'non_striker': non_striker,
+                'runs': {'batter': runs, 'extras': 0, 'total': runs}}
+    delivery.update(extra)
+    return delivery
+
+
+def out(batter, kind='caught', non_striker='B'):
+    return ball(batter, 0, non_striker, wickets=[{'player_out': batter, 'kind': kind}])
+
+
+def make_match():
+    """
+    Team 1: A scores 4, 6, 1 (three balls plus a wide) and is caught;
+    B runs out at the other end for 0 from 1 ball; C comes in and makes
+    52* from 14 balls. Team 2: D retires hurt on 3, E is never out.
+    A super over follows and must be ignored.
+    """
+    first = [ball('A', 4), ball('A', 6),
+             dict(ball('A', 0), runs={'batter': 0, 'extras': 1, 'total': 1},
+                  extras={'wides': 1}),
+             ball('A', 1), ball('B', 0, non_striker='A',
+                                wickets=[{'player_out': 'B', 'kind': 'run out'}]),
+             out('A', non_striker='C')]
+    first += [ball('C', 4, non_striker='Z') for _ in range(13)] + [ball('C', 0, non_striker='Z')]
+    second = [ball('D', 3, non_striker='E'),
+              ball('D', 0, non_striker='E',
+                   wickets=[{'player_out': 'D', 'kind': 'retired hurt'}]),
+              ball('E', 6, non_striker='F')]
+    return {
+        'info': {'match_type': 'T20',
+                 'players': {'Team 1': ['A', 'B', 'C', 'Z'], 'Team 2': ['D', 'E', 'F', 'G']}},
+        'innings': [
+            {'team': 'Team 1', 'overs': [{'over': 0, 'deliveries': first}]},
+            {'team': 'Team 2', 'overs': [{'over': 0, 'deliveries': second}]},
+            {'team': 'Team 1', 'super_over': True,
+             'overs': [{'over': 0, 'deliveries': [ball('A', 6)] * 6}]},
+        ],
+    }
+
+
+def test_innings_balls_and_dismissals():
+    totals = aggregate_match(make_match())
+
+    a = totals['A']
+    assert (a[INNINGS], a[RUNS], a[BALLS], a[NOT_OUTS]) == (1, 11, 4, 0)
+    assert (a[FOURS], a[SIXES]) == (1, 1)
+    assert (a[HIGHEST], a[HIGHEST_NOT_OUT]) == (11, False)
+
+    # Run out at the non-striker's end: an innings, not a not-out
+    b = totals['B']
+    assert (b[INNINGS], b[RUNS], b[BALLS], b[NOT_OUTS]) == (1, 0, 1, 0)
+
+    c = totals['C']
+    assert (c[RUNS], c[BALLS], c[NOT_OUTS], c[FIFTIES], c[HUNDREDS]) == (52, 14, 1, 1, 0)
+    assert (c[HIGHEST], c[HIGHEST_NOT_OUT]) == (52, True)
+
+    # Only at the non-striker's end: an innings without a ball faced
+    assert (totals['Z'][INNINGS], totals['Z'][BALLS], totals['Z'][NOT_OUTS]) == (1, 0, 1)
+
+    # Retired hurt is not a dismissal
+    assert (totals['D'][RUNS], totals['D'][NOT_OUTS]) == (3, 1)
+
+
+def test_matches_count_the_whole_team_list():
+    totals = aggregate_match(make_match())
+    assert all(totals[name][MATCHES] == 1 for name in 'ABCDEFGZ')
+    assert totals['G'][INNINGS] == 0
+
+
+def test_super_overs_are_ignored():
+    assert aggregate_match(make_match())['A'][RUNS] == 11
+
+
+def test_highest_prefers_the_not_out_innings_of_equal_runs():
+    totals = aggregate_match(make_match())
+    again = aggregate_match(make_match())
+    again['A'][HIGHEST_NOT_OUT] = True
+    merged = merge_totals(totals, again)
+    assert merged['A'][MATCHES] == 2
+    assert merged['A'][RUNS] == 22
+    assert (merged['A'][HIGHEST], merged['A'][HIGHEST_NOT_OUT]) == (11, True)
+
+
+def test_older_layout_gives_the_same_totals():
+    match = make_match()
+    match['innings'] = match['innings'][:2]
+    # The older layout has no team lists: only players who batted count a match
+    del match['info']['players']
+    assert aggregate_match(to_yaml_layout(match)) == aggregate_match(match)
+    assert 'G' not in aggregate_match(match)
+
+
+def test_ingest_a_directory(tmp_path):
+    for number in range(3):
+        (tmp_path / f'{number}.json').write_text(json.dumps(make_match()))
+    (tmp_path / 'broken.json').write_text('{')
+    (tmp_path / 'README.txt').write_text('not a match')
+
+    totals, summary = ingest(str(tmp_path), workers=1)
+    assert (summary['files'], summary['matches'], len(summary['failed'])) == (4, 3, 1)
+
+    df = to_frame(totals).set_index('Player')
+    assert df.loc['C', 'Runs'] == 156
+    assert df.loc['C', 'Average'] == 0.0
+    assert df.loc['A', 'Average'] == 11.0
+    assert bool(df.loc['C', 'Highest_Score_Not_Out'])
+    assert 'G' not in df.index
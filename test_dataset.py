@@ -0,0 +1,112 @@
+"""
+Check that DatasetCache only parses the data file when it changes
+"""
+
+import json
+import os
+
+import pytest
+
+from dataset import Dataset, DatasetCache, compute_statistics
+
+
+def write_players(path, *runs, mtime=None):
+    players = [{'Player': f'Player {i}', 'Runs': r} for i, r in enumerate(runs)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'players': players, 'metadata': {'total_players': len(players)}}, f)
+    if mtime is not None:
+        # Stat changes must not depend on the file system's timestamp resolution
+        os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Cache over one JSON file, counting how often it is parsed"""
+    path = str(tmp_path / 'players.json')
+    write_players(path, 500, 400, mtime=1_000_000_000)
+    cache = DatasetCache(sources=(path,), manifest=str(tmp_path / 'manifest.json'))
+    cache.path = path
+    cache.loads = 0
+    load = cache._load
+
+    def counting(key):
+        cache.loads += 1
+        return load(key)
+
+    cache._load = counting
+    return cache
+
+
+def test_hits_reuse_the_loaded_copy(cache):
+    first = cache.get()
+    assert len(first.table) == 2
+    assert cache.get() is first
+    assert cache.get() is first
+    assert cache.loads == 1
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits'], stats['reloads']) == (1, 2, 0)
+    assert stats['source'] == cache.path
+
+
+def test_reload_on_stat_change(cache):
+    first = cache.get()
+    write_players(cache.path, 500, 400, 300, mtime=2_000_000_000)
+    second = cache.get()
+    assert second is not first
+    assert len(second.table) == 3
+    assert second.version != first.version
+    assert cache.stats()['reloads'] == 1
+
+    seen = []
+    cache.subscribe(lambda dataset, previous: seen.append((dataset, previous)))
+    write_players(cache.path, 1, mtime=3_000_000_000)
+    third = cache.get()
+    assert seen == [(third, second)]
+
+
+def test_failed_load_is_not_retried_until_the_file_changes(cache, capsys):
+    good = cache.get()
+    with open(cache.path, 'w') as f:
+        f.write('{"players": [')
+    os.utime(cache.path, ns=(2_000_000_000, 2_000_000_000))
+
+    for _ in range(5):
+        assert cache.get() is good
+    assert cache.loads == 2
+    assert cache.stats()['failures'] == 1
+    assert 'Error loading data' in capsys.readouterr().out
+
+    write_players(cache.path, 7, 8, 9, 10, mtime=3_000_000_000)
+    assert len(cache.get().table) == 4
+    assert cache.loads == 3
+
+
+def test_failed_first_load_serves_an_empty_dataset(tmp_path):
+    path = str(tmp_path / 'players.json')
+    with open(path, 'w') as f:
+        f.write('not json')
+    cache = DatasetCache(sources=(path,), manifest=str(tmp_path / 'manifest.json'))
+    assert len(cache.get().table) == 0
+    assert len(cache.get().table) == 0
+    assert cache.stats()['failures'] == 1
+
+
+def test_missing_runs_are_left_out_of_the_average():
+    dataset = Dataset([{'Player': 'A', 'Runs': 300}, {'Player': 'B', 'Runs': None},
+                       {'Player': 'C', 'Runs': 100}], {})
+    assert dataset.stats['avg_runs'] == 200
+    assert dataset.stats['median_runs'] == 200
+    assert dataset.stats['total_runs'] == 400
+    assert dataset.prefix_runs == [0, 300, 300, 400]
+
+    stats = compute_statistics([{'Player': 'A', 'Runs': ''}, {'Player': 'B', 'Runs': 40}])
+    assert (stats['avg_runs'], stats['top_runs']) == (40, 0)
+    assert compute_statistics([{'Player': 'A'}])['avg_runs'] == 0
+
+
+def test_no_data_file(tmp_path):
+    cache = DatasetCache(sources=(str(tmp_path / 'missing.json'),),
+                         manifest=str(tmp_path / 'manifest.json'))
+    dataset = cache.get()
+    assert len(dataset.table) == 0
+    assert cache.get() is dataset
@@ -0,0 +1,60 @@
+"""
+Race the scraper's sources against the local stub server
+(benchmarks/stub_server.py) and check the per-source timings
+"""
+
+import contextlib
+import io
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubServer, stub_urls
+from http_client import HttpClient
+from scraper import IPLScraper
+
+
+def fetch(server):
+    # Own client without a rate limiter: every stub site shares one host
+    scraper = IPLScraper(client=HttpClient(max_retries=0))
+    scraper.urls, scraper.alternative_urls = stub_urls(server.base_url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = scraper.fetch_data_concurrent()
+    return scraper, ok
+
+
+def check_timings(scraper):
+    """One row per source, in priority order, that no late thread changes"""
+    timings = scraper.fetch_timings
+    sources = scraper.urls + scraper.alternative_urls
+    assert [t['priority'] for t in timings] == list(range(len(sources)))
+    assert [t['url'] for t in timings] == sources
+    rows = [dict(t) for t in timings]
+
+    # Downloads still running when the winner was picked finish meanwhile
+    time.sleep(0.5)
+    assert scraper.fetch_timings == rows
+    return {t['priority']: t['status'] for t in rows}
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_first_source_wins(seed):
+    with StubServer(latency=0.1, jitter=0.08, seed=seed) as server:
+        scraper, ok = fetch(server)
+        statuses = check_timings(scraper)
+
+    assert ok and scraper.data_source == 'live'
+    assert statuses[0] == 'ok'
+    assert scraper.fetch_timings[0]['rows'] == len(scraper.df)
+    assert set(statuses.values()) <= {'ok', 'cancelled'}
+
+
+def test_espn_down_falls_back_to_alternative():
+    with StubServer(latency=0.05, down=('espncricinfo',)) as server:
+        scraper, ok = fetch(server)
+        statuses = check_timings(scraper)
+
+    assert ok and scraper.data_source == 'live'
+    assert [statuses[p] for p in range(3)] == ['HTTP 503'] * 3
+    assert statuses[3] == 'ok'
+    assert scraper.fetch_timings[3]['rows'] == len(scraper.df)
@@ -0,0 +1,165 @@
+"""
+Publish new versions while the web tier's cache reads them: a reader
+must only ever see one complete version
+"""
+
+import contextlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_memory import make_columns
+from columnar import ColumnarFile, write_columnar
+from dataset import DatasetCache
+from publish import read_manifest
+from scraper import IPLScraper
+
+PLAYERS = 60
+
+
+def make_scraper(version):
+    """A scraper holding a table where every Matches value is the version"""
+    columns = make_columns(PLAYERS, seed=version)
+    columns['Matches'] = np.full(PLAYERS, version)
+    scraper = IPLScraper()
+    scraper.df = pd.DataFrame(columns)
+    scraper._compact_dtypes()
+    return scraper
+
+
+def publish(version):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert make_scraper(version).save_incremental()
+
+
+def check(dataset):
+    """
+    Returns:
+        int: The version the dataset holds (fails if it mixes versions)
+    """
+    matches = set(dataset.table.column('Matches'))
+    assert len(matches) == 1, f"rows of versions {sorted(matches)}"
+    version = matches.pop()
+    assert len(dataset.table) == PLAYERS
+    assert dataset.metadata['total_players'] == PLAYERS
+    if dataset.shared is not None:
+        # The mapped index has to describe the mapped data
+        assert set(np.asarray(dataset.index.values('Matches')).tolist()) == {version}
+        np.testing.assert_array_equal(dataset.index.values('Runs'),
+                                      np.asarray(dataset.table.column('Runs'), dtype=float))
+    return version
+
+
+@pytest.fixture
+def directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def published_paths():
+    return {entry['path'] for entry in read_manifest()['files'].values()}
+
+
+def test_publish_and_load(directory):
+    publish(1)
+    dataset = DatasetCache().get()
+    assert check(dataset) == 1
+    assert dataset.shared is not None
+    assert dataset.version == read_manifest()['files']['columnar']['sha256']
+
+    # Versioned files behind the manifest, plain names for downloads
+    assert all('.v1-' in path for path in published_paths())
+    for name in ('ipl_most_runs_career.json', 'ipl_most_runs_career.csv',
+                 'ipl_most_runs_career.cols'):
+        assert os.path.exists(name)
+
+
+def test_superseded_files_are_removed(directory):
+    publish(1)
+    first = published_paths()
+    publish(2)
+    assert not any(os.path.exists(path) for path in first)
+    assert all(os.path.exists(path) for path in published_paths())
+    with open('ipl_most_runs_career.json', 'rb') as f, \
+            open(read_manifest()['files']['json']['path'], 'rb') as g:
+        assert f.read() == g.read()
+
+
+def test_files_written_ahead_of_the_manifest_are_not_served(directory):
+    publish(1)
+    cache = DatasetCache()
+    assert check(cache.get()) == 1
+
+    # Version 2 is saved (data files and index) but not published yet
+    scraper = make_scraper(2)
+    plain = {'columnar': 'ipl_most_runs_career.cols', 'json': 'ipl_most_runs_career.json',
+             'csv': 'ipl_most_runs_career.csv'}
+    with contextlib.redirect_stdout(io.StringIO()):
+        files = scraper.save_version(plain, 'ipl_most_runs_career.idx')
+    assert set(files.values()).isdisjoint(published_paths())
+
+    # A worker starting now still gets all of version 1
+    fresh = DatasetCache()
+    dataset = fresh.get()
+    assert check(dataset) == 1
+    assert dataset.shared is not None
+    assert check(cache.get()) == 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.publish(files, aliases=plain)
+    assert check(cache.get()) == 2
+    assert check(fresh.get()) == 2
+    assert fresh.stats()['failures'] == 0
+
+
+def test_readers_never_see_a_mixed_version(directory):
+    publish(1)
+    cache = DatasetCache()
+    versions = 8
+    done = threading.Event()
+    seen = []
+    errors = []
+
+    def read():
+        while not done.is_set():
+            try:
+                seen.append(check(cache.get()))
+                # A worker starting mid-publish always gets a whole version
+                seen.append(check(DatasetCache().get()))
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    try:
+        for version in range(2, versions + 1):
+            publish(version)
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+
+    assert not errors, errors[0]
+    assert seen and set(seen) <= set(range(1, versions + 1))
+    assert check(cache.get()) == versions
+
+
+def test_data_hash_follows_content(tmp_path):
+    paths = [str(tmp_path / f'{name}.cols') for name in ('a', 'b', 'c', 'd')]
+    df = pd.DataFrame(make_columns(PLAYERS))
+    write_columnar(df, paths[0], {'version': 1})
+    write_columnar(df, paths[1], {'version': 1})
+    write_columnar(df, paths[2], {'version': 2})
+    changed = df.copy()
+    changed.loc[0, 'Runs'] += 1
+    write_columnar(changed, paths[3], {'version': 1})
+
+    hashes = [ColumnarFile(path).data_sha256 for path in paths]
+    assert hashes[0] == hashes[1]
+    assert len(set(hashes[1:])) == 3
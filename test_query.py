@@ -0,0 +1,85 @@
+"""
+Check QueryIndex.select against a brute-force filter of the records
+"""
+
+import random
+
+import pytest
+
+from dataset import Dataset
+
+SYLLABLES = ('ka', 'ran', 'vi', 'sh', 'an', 'dh', 'ar', 'ma', 'ri', 'su')
+TIERS = ('Legend', 'Elite', 'Good')
+
+QUERIES = [
+    {},
+    {'sort': 'Runs'},
+    {'sort': 'Average', 'descending': False},
+    {'ranges': {'Runs': (1000, 5000)}},
+    {'ranges': {'Average': (None, 30)}, 'sort': 'Strike_Rate'},
+    {'ranges': {'Runs': (2000, None), 'Matches': (50, 150)}, 'sort': 'Average'},
+    {'tiers': {'Insight': ['elite', 'GOOD']}},
+    {'tiers': {'Insight': ['Legend']}, 'sort': 'Runs', 'descending': False},
+    {'prefix': 'Ka'},
+    {'prefix': 'ran', 'sort': 'Matches'},
+    {'contains': 'an'},
+    {'contains': 'ari', 'ranges': {'Strike_Rate': (120, 160)}},
+    {'contains': 'zzz'},
+    {'prefix': 'sh', 'contains': 'ma', 'tiers': {'Insight': ['good']}, 'sort': 'Runs'},
+]
+
+
+def make_records(count=400, seed=7):
+    """Player records with repeated values and a few missing averages"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        records.append({
+            'Player': f'{name} {i}',
+            'Runs': rng.randrange(0, 8000, 10),
+            'Matches': rng.randint(1, 250),
+            'Average': None if rng.random() < 0.05 else round(rng.uniform(5, 55), 1),
+            'Strike_Rate': round(rng.uniform(90, 180), 2),
+            'Insight': rng.choice(TIERS),
+        })
+    return records
+
+
+def brute_force(records, sort=None, descending=True, ranges=None, tiers=None,
+                prefix=None, contains=None):
+    """Row numbers select() should return, by scanning every record"""
+    rows = []
+    for i, record in enumerate(records):
+        name = record['Player'].lower()
+        if any(record[column] is None
+               or (low is not None and record[column] < low)
+               or (high is not None and record[column] > high)
+               for column, (low, high) in (ranges or {}).items()):
+            continue
+        if any(record[column].lower() not in [w.lower() for w in wanted]
+               for column, wanted in (tiers or {}).items()):
+            continue
+        if prefix and not name.startswith(prefix.lower()):
+            continue
+        if contains and contains.lower() not in name:
+            continue
+        rows.append(i)
+
+    if sort:
+        # Missing values last, ties in table order
+        present = [i for i in rows if records[i][sort] is not None]
+        missing = [i for i in rows if records[i][sort] is None]
+        rows = sorted(present, key=lambda i: records[i][sort], reverse=descending) + missing
+    return rows
+
+
+@pytest.fixture(scope='module')
+def records():
+    return make_records()
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_select_matches_brute_force(records, query):
+    dataset = Dataset(records, {})
+    assert dataset.index.select(**query).tolist() == brute_force(records, **query)
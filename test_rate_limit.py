@@ -0,0 +1,113 @@
+"""
+Check the token buckets' AIMD rate control and Retry-After pauses
+"""
+
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from rate_limit import MAX_RETRY_AFTER, HostRateLimiter, TokenBucket, retry_after_seconds
+
+URL = 'https://stats.example.com/records'
+
+
+def make_limiter(**options):
+    options = dict({'host_rates': {'example.com': 1.0}, 'increase': 0.1, 'decrease': 0.5,
+                    'min_factor': 0.25, 'max_factor': 2.0}, **options)
+    return HostRateLimiter(**options)
+
+
+def rate(limiter, url=URL):
+    return limiter.stats()[limiter.host_key(url)]['rate']
+
+
+def test_reservations_are_spaced_by_the_rate():
+    bucket = TokenBucket(rate=10, burst=1)
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.1, abs=0.01)
+    assert waits[2] == pytest.approx(0.2, abs=0.01)
+
+
+def test_pause_pushes_reservations_back():
+    bucket = TokenBucket(rate=10, burst=1)
+    bucket.pause(0.5)
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.shift == pytest.approx(0.5, abs=0.01)
+
+
+def test_additive_increase_up_to_the_ceiling():
+    limiter = make_limiter()
+    limiter.feedback(URL, True, 200)
+    assert rate(limiter) == pytest.approx(1.1)
+    for _ in range(50):
+        limiter.feedback(URL, True, 200)
+    assert rate(limiter) == pytest.approx(2.0)
+
+
+def test_multiplicative_decrease_down_to_the_floor():
+    limiter = make_limiter()
+    limiter.feedback(URL, False, 429)
+    assert rate(limiter) == pytest.approx(0.5)
+    limiter.feedback(URL, False, None)
+    limiter.feedback(URL, False, 500)
+    assert rate(limiter) == pytest.approx(0.25)
+
+    stats = limiter.stats()['example.com']
+    assert (stats['throttled'], stats['errors']) == (1, 2)
+
+
+def test_subdomains_share_their_site_and_other_hosts_are_separate():
+    limiter = make_limiter()
+    assert limiter.host_key('https://www.example.com/') == 'example.com'
+    assert limiter.host_key('https://notexample.com/') == 'notexample.com'
+
+    limiter.feedback('https://www.example.com/a', False, 503)
+    limiter.feedback('https://other.org/b', True, 200)
+    assert rate(limiter) == pytest.approx(0.5)
+    assert rate(limiter, 'https://other.org/') == pytest.approx(limiter.default_rate + 0.1)
+
+
+def test_retry_after_pauses_the_host():
+    limiter = make_limiter()
+    limiter.feedback(URL, False, 503, retry_after='2')
+    assert limiter.paused(URL) == pytest.approx(2, abs=0.1)
+    assert limiter.paused('https://other.org/') == 0.0
+    assert limiter.stats()['example.com']['paused_for'] > 1.5
+
+    # Other hosts are not held up
+    started = time.monotonic()
+    limiter.acquire('https://other.org/')
+    assert time.monotonic() - started < 0.1
+
+    # A cancelled caller stops waiting
+    cancel = threading.Event()
+    cancel.set()
+    started = time.monotonic()
+    limiter.acquire(URL, cancel=cancel)
+    assert time.monotonic() - started < 0.1
+
+
+def test_retry_after_delays_callers_already_waiting():
+    limiter = make_limiter(host_rates={'example.com': 10.0})
+    limiter.acquire(URL)
+    waited = []
+    caller = threading.Thread(target=lambda: waited.append(limiter.acquire(URL)))
+    caller.start()
+    time.sleep(0.03)
+    limiter.feedback(URL, False, 429, retry_after='0.3')
+    caller.join(5)
+    # About 0.1s of spacing plus the 0.3s pause that arrived meanwhile
+    assert waited[0] >= 0.35
+
+
+def test_retry_after_values():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds('abc') is None
+    assert retry_after_seconds('1.5') == 1.5
+    assert retry_after_seconds('-3') == 0.0
+    assert retry_after_seconds('99999') == MAX_RETRY_AFTER
+    assert retry_after_seconds(formatdate(time.time() + 30, usegmt=True)) \
+        == pytest.approx(30, abs=2)
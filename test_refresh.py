@@ -0,0 +1,115 @@
+"""
+Check that RefreshWorker never runs two refreshes at once, within a
+process or across processes sharing the lock file
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from refresh import RefreshWorker, fcntl
+
+
+class BlockingRefresh:
+    """Refresh function that runs until released"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return {'status': 'published'}
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / 'refresh.lock')
+
+
+def test_overlapping_runs_are_skipped(lock_path):
+    refresh = BlockingRefresh()
+    worker = RefreshWorker(refresh, 0, lock_path)
+    assert worker.trigger()
+    assert refresh.started.wait(5)
+
+    assert worker.running
+    assert worker.run_once() is None
+    assert not worker.trigger()
+    assert worker.skipped == 1
+
+    refresh.release.set()
+    for _ in range(500):
+        if not worker.running:
+            break
+        time.sleep(0.01)
+    assert worker.status()['runs'] == 1
+    assert worker.last_result == {'status': 'published'}
+    assert refresh.calls == 1
+
+    # The lock is free again
+    assert worker.run_once() == {'status': 'published'}
+    assert refresh.calls == 2
+
+
+@pytest.mark.skipif(fcntl is None, reason="no flock on this platform")
+def test_workers_sharing_the_lock_file_run_one_at_a_time(lock_path):
+    refresh = BlockingRefresh()
+    first = RefreshWorker(refresh, 0, lock_path)
+    second = RefreshWorker(lambda: pytest.fail("ran while the lock was held"), 0, lock_path)
+
+    thread = threading.Thread(target=first.run_once)
+    thread.start()
+    assert refresh.started.wait(5)
+    assert second.run_once() is None
+    assert second.skipped == 1
+    refresh.release.set()
+    thread.join(5)
+
+    calls = []
+    second.refresh = lambda: calls.append(1) or {'status': 'unchanged'}
+    assert second.run_once() == {'status': 'unchanged'}
+    assert calls == [1]
+
+
+@pytest.mark.skipif(fcntl is None, reason="no flock on this platform")
+def test_lock_held_by_another_process(lock_path):
+    holder = subprocess.Popen(
+        [sys.executable, '-c',
+         'import fcntl, sys; f = open(sys.argv[1], "a"); '
+         'fcntl.flock(f, fcntl.LOCK_EX); print("locked", flush=True); sys.stdin.read()',
+         lock_path],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        worker = RefreshWorker(lambda: pytest.fail("ran while the lock was held"), 0, lock_path)
+        assert worker.run_once() is None
+        assert worker.skipped == 1
+    finally:
+        holder.stdin.close()
+        holder.wait(5)
+
+    assert RefreshWorker(lambda: {'status': 'published'}, 0, lock_path).run_once() \
+        == {'status': 'published'}
+
+
+def test_failed_refresh_releases_the_lock(lock_path, capsys):
+    def broken():
+        raise RuntimeError("no source")
+
+    worker = RefreshWorker(broken, 0, lock_path)
+    assert worker.run_once() is None
+    assert worker.failures == 1
+    assert worker.last_error == 'RuntimeError: no source'
+    assert 'RuntimeError' in capsys.readouterr().err
+    assert not worker.running
+
+    worker.refresh = lambda: {'status': 'published'}
+    assert worker.run_once() == {'status': 'published'}
+    assert worker.last_error is None
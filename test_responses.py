@@ -0,0 +1,118 @@
+"""
+Check prepared responses: ETags, 304s, compressed variants and the
+bounds of the response store
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+import app as web
+from responses import PreparedResponse, ResponseStore
+from test_query import make_records
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client of the app serving a JSON file in tmp_path"""
+    with open(tmp_path / 'ipl_most_runs_career.json', 'w', encoding='utf-8') as f:
+        json.dump({'players': make_records(300), 'metadata': {'season': 'test'}}, f)
+    monkeypatch.chdir(tmp_path)
+    # The checkout keeps index.html next to app.py rather than in templates/
+    if not os.path.exists(os.path.join(web.app.root_path, web.app.template_folder, 'index.html')):
+        monkeypatch.setattr(web.app, 'template_folder', web.app.root_path)
+    web.dataset_cache.clear()
+    yield web.app.test_client()
+    web.dataset_cache.clear()
+
+
+def test_etag_and_not_modified(client):
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    etag = response.headers['ETag'].strip('"')
+    assert etag.startswith(web.dataset_cache.get().version[:24])
+
+    cached = client.get('/api/stats', headers={'If-None-Match': f'"{etag}"'})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'].strip('"') == etag
+
+    other = client.get('/api/stats', headers={'If-None-Match': '"something-else"'})
+    assert other.status_code == 200
+
+
+def test_gzip_variant(client):
+    identity = client.get('/api/players', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in identity.headers
+    etag = identity.headers['ETag'].strip('"')
+
+    compressed = client.get('/api/players', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'].strip('"') == f'{etag}-gzip'
+    assert compressed.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(compressed.data) == identity.data
+
+    # Either validator is a match for the same content
+    cached = client.get('/api/players', headers={'If-None-Match': f'"{etag}-gzip"'})
+    assert cached.status_code == 304
+
+
+def test_not_modified_skips_the_query(client, monkeypatch):
+    response = client.get('/api/players?sort=Runs&limit=5&min_Runs=100')
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 5
+    etag = response.headers['ETag']
+
+    dataset = web.dataset_cache.get()
+
+    def fail(**query):
+        raise AssertionError("select() ran for a 304")
+
+    monkeypatch.setattr(dataset.index, 'select', fail)
+    cached = client.get('/api/players?min_Runs=100&limit=5&sort=Runs',
+                        headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+
+
+def test_bad_query(client):
+    response = client.get('/api/players?sort=Nope')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert client.get('/api/players?min_Runs=abc').status_code == 400
+
+
+def prepared(size):
+    return PreparedResponse(b'x' * size, 'application/json', f'etag-{size}')
+
+
+def test_store_is_bounded_by_bytes():
+    store = ResponseStore(max_entries=10, max_bytes=1000)
+    store.set_version('v1')
+    for key in 'abc':
+        store.put('v1', key, prepared(400))
+    assert store.get('v1', 'a') is None
+    assert store.get('v1', 'c') is not None
+    assert store.stats()['bytes'] == 800
+
+    # Too large to keep at all: returned, not stored, nothing evicted
+    big = prepared(2000)
+    assert store.put('v1', 'big', big) is big
+    assert store.get('v1', 'big') is None
+    assert store.stats()['entries'] == 2
+
+
+def test_store_ignores_other_versions():
+    store = ResponseStore()
+    store.set_version('v2')
+    store.put('v2', 'a', prepared(10))
+    store.put('v1', 'a', prepared(20))
+    assert store.version == 'v2'
+    assert store.get('v2', 'a').size == 10
+    assert store.get('v1', 'a') is None
+    assert store.stats()['hit_rate'] == 0.5
+
+    store.set_version('v3')
+    assert store.get('v3', 'a') is None
+    assert store.stats()['bytes'] == 0
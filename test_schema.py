@@ -0,0 +1,45 @@
+"""
+Check how BATTING_SCHEMA maps scraped headers to our column names
+"""
+
+from schema import BATTING_SCHEMA, ColumnSchema
+
+
+def test_known_headers_are_renamed():
+    mapping, unknown = BATTING_SCHEMA.resolve(
+        ['Player', 'Mat', 'Inns', 'Runs', 'HS', 'Ave', 'SR', '100', '50', '4s', '6s'])
+    assert mapping == {'Mat': 'Matches', 'Inns': 'Innings', 'HS': 'Highest_Score',
+                       'Ave': 'Average', 'SR': 'Strike_Rate', '100': 'Centuries',
+                       '50': 'Fifties', '4s': 'Fours', '6s': 'Sixes'}
+    assert unknown == []
+
+
+def test_headers_are_normalized():
+    mapping, _ = BATTING_SCHEMA.resolve(['Batsman Name', 'strike_rate', '  Highest   Score '])
+    assert mapping == {'Batsman Name': 'Player', 'strike_rate': 'Strike_Rate',
+                       '  Highest   Score ': 'Highest_Score'}
+
+
+def test_unknown_headers_are_reported():
+    mapping, unknown = BATTING_SCHEMA.resolve(['Player', 'Runs', 'Team Colour', 'Span', 'Dots', 3])
+    assert mapping == {}
+    # Span is a column we know about and keep as it is
+    assert unknown == ['Team Colour', 'Dots', 3]
+
+
+def test_second_header_for_the_same_column_is_unknown():
+    mapping, unknown = BATTING_SCHEMA.resolve(['Player', 'Runs', 'Run', 'Mat', 'Matches'])
+    # 'Runs' already has the canonical name, so 'Run' must not be renamed onto it
+    assert mapping == {'Mat': 'Matches'}
+    assert unknown == ['Run', 'Matches']
+
+
+def test_resolution_is_memoized():
+    schema = ColumnSchema('test', columns=[('Runs', r'runs?')])
+    headers = ['runs', 'other']
+    first = schema.resolve(headers)
+    assert first == ({'runs': 'Runs'}, ['other'])
+    assert schema.resolve(list(headers)) is first
+    assert schema.cache_size() == 1
+    schema.resolve(['run'])
+    assert schema.cache_size() == 2
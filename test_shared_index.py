@@ -0,0 +1,62 @@
+"""
+Serve queries from a shared index file and check that an index is only
+attached to the data it was built from
+"""
+
+import pandas as pd
+import pytest
+
+from columnar import ColumnarFile, write_columnar
+from dataset import Dataset, PlayerTable
+from shared_index import open_index, write_index
+from test_query import QUERIES, brute_force, make_records
+
+
+def index_entry(path):
+    return {'path': path, 'size': ColumnarFile(path).size}
+
+
+@pytest.fixture(scope='module')
+def records():
+    return make_records()
+
+
+@pytest.fixture(scope='module')
+def published(records, tmp_path_factory):
+    """(data path, index path) of the records and their shared index"""
+    directory = tmp_path_factory.mktemp('shared')
+    data_path = str(directory / 'players.cols')
+    index_path = str(directory / 'players.idx')
+    write_columnar(pd.DataFrame(records), data_path)
+    write_index(data_path, index_path)
+    return data_path, index_path
+
+
+@pytest.fixture(scope='module')
+def shared_dataset(published):
+    data_path, index_path = published
+    source = ColumnarFile(data_path)
+    index = open_index(index_entry(index_path), source.data_sha256)
+    assert index is not None
+    return Dataset(PlayerTable.from_columnar(source), {}, shared=index)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_select_from_shared_index_matches_brute_force(records, shared_dataset, query):
+    assert shared_dataset.index.select(**query).tolist() == brute_force(records, **query)
+
+
+def test_stats_match_an_unshared_dataset(records, shared_dataset):
+    assert shared_dataset.stats == Dataset(records, {}).stats
+
+
+def test_index_of_other_data_is_rejected(records, published, tmp_path):
+    _, index_path = published
+    other_path = str(tmp_path / 'other.cols')
+    other = pd.DataFrame(records)
+    other.loc[0, 'Runs'] += 10
+    write_columnar(other, other_path)
+
+    assert open_index(index_entry(index_path), ColumnarFile(other_path).data_sha256) is None
+    assert open_index(None, ColumnarFile(other_path).data_sha256) is None
+    assert open_index({'path': str(tmp_path / 'missing.idx'), 'size': 0}, 'x') is None
@@ -0,0 +1,61 @@
+"""
+Check the change summary diff_records produces between two versions
+"""
+
+from snapshot import changed_columns, diff_records
+
+
+def record(name, runs, average=30.0, **fields):
+    return dict({'Player': name, 'Runs': runs, 'Average': average}, **fields)
+
+
+PREVIOUS = [record('A', 500), record('B', 400), record('C', 300, float('nan')), record('D', 200)]
+
+
+def test_counts():
+    current = [record('A', 520), record('B', 400), record('C', 300, float('nan')),
+               record('E', 100), record('F', 90)]
+    changes = diff_records(PREVIOUS, current)
+    summary = changes.summary()
+
+    assert changes
+    assert summary['counts'] == {'added': 2, 'removed': 1, 'updated': 1}
+    assert summary['added'] == ['E', 'F']
+    assert summary['removed'] == ['D']
+    assert changes.updated == {'A': {'Runs': [500, 520]}}
+    assert summary['rows'] == [0, 3, 4]
+    assert summary['columns'] == ['Runs']
+    assert summary['same_order'] is False
+    assert summary['previous_snapshot'] == diff_records([], PREVIOUS).snapshot
+
+
+def test_no_changes():
+    changes = diff_records(PREVIOUS, [dict(r) for r in PREVIOUS])
+    assert not changes
+    assert changes.summary()['counts'] == {'added': 0, 'removed': 0, 'updated': 0}
+    assert changes.snapshot == changes.previous_snapshot
+
+
+def test_reordering_only():
+    changes = diff_records(PREVIOUS, list(reversed(PREVIOUS)))
+    assert changes
+    assert changes.summary()['counts'] == {'added': 0, 'removed': 0, 'updated': 0}
+    assert changes.summary()['same_order'] is False
+
+
+def test_first_version():
+    changes = diff_records([], PREVIOUS)
+    assert changes.summary()['counts'] == {'added': 4, 'removed': 0, 'updated': 0}
+    assert changes.previous_snapshot is None
+
+
+def test_changed_columns():
+    previous_metadata = {'snapshot': diff_records([], PREVIOUS).snapshot}
+    updated = [record('A', 500), record('B', 400, 31.5), record('C', 300, float('nan')),
+               record('D', 200)]
+    summary = diff_records(PREVIOUS, updated).summary()
+    assert changed_columns(summary, previous_metadata) == {'Average'}
+
+    # Players added: indexes cannot be carried over
+    added = diff_records(PREVIOUS, PREVIOUS + [record('E', 100)]).summary()
+    assert changed_columns(added, previous_metadata) is None